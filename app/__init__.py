@@ -1,15 +1,35 @@
-from flask import Flask
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_mail import Mail
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from config import config
 import os
 
+class LazyMail:
+    """Flask-Mail extension imported and configured on first use"""
+    
+    def __init__(self):
+        self._mail = None
+    
+    def init_app(self, app):
+        # Settings are read from the app config when mail is first used
+        app.extensions.pop('mail', None)
+    
+    def _load(self):
+        if self._mail is None:
+            from flask_mail import Mail
+            self._mail = Mail()
+        if 'mail' not in current_app.extensions:
+            self._mail.init_app(current_app._get_current_object())
+        return self._mail
+    
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
 db = SQLAlchemy()
 login_manager = LoginManager()
-mail = Mail()
+mail = LazyMail()
 limiter = Limiter(key_func=get_remote_address)
 
 def create_app(config_name=None):
@@ -23,12 +43,53 @@ def create_app(config_name=None):
     
     app.config.from_object(config[config_name])
     
+    # Pick the connection pool setup before the engine is created
+    from app.db_pool import configure_engine, warm_pool
+    connection_strategy = configure_engine(app)
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
+    # Registers the sqlite:// rate limit storage before the limiter opens its URI
+    from app import rate_limit  # noqa: F401
     limiter.init_app(app)
     
+    # Keep the dashboard statistics rollup in sync with model changes
+    from app.stats import register_stats_listeners
+    register_stats_listeners()
+    
+    # Keep the paper access list in step with authorship and review assignments
+    from app.access import register_access_listeners
+    register_access_listeners()
+    
+    # Count and time SQL per request, flagging probable N+1 patterns
+    from app.instrumentation import init_instrumentation
+    init_instrumentation(app)
+    
+    # Request, pool, cache, upload and mail queue metrics at /metrics
+    from app.metrics import init_metrics
+    init_metrics(app)
+    
+    if connection_strategy == 'warm':
+        warm_pool(app, db)
+    
+    # Drop cached session principals when a user's identity changes
+    from app.principal import register_principal_listeners
+    register_principal_listeners()
+    
+    # Reload cached lookup tables whenever their rows change
+    from app.reference_data import register_reference_listeners
+    register_reference_listeners()
+    
+    # Expire cached public pages when papers or conferences change
+    from app.page_cache import register_page_cache_listeners
+    register_page_cache_listeners()
+    
+    # Create full-text search structures alongside the papers table
+    from app.search import register_search_index
+    register_search_index()
+    
     # Initialize Supabase (with fallback)
     try:
         from app.supabase_utils import supabase_client
@@ -43,8 +104,8 @@ def create_app(config_name=None):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+        from app.principal import load_principal
+        return load_principal(int(user_id))
     
     # Register blueprints after app is created to avoid circular imports
     with app.app_context():
@@ -56,18 +117,20 @@ def create_app(config_name=None):
         app.register_blueprint(auth, url_prefix='/auth')
         app.register_blueprint(admin, url_prefix='/admin')
     
-    # Create upload directory (for local development)
-    upload_dir = app.config.get('UPLOAD_FOLDER')
-    if upload_dir and not os.path.exists(upload_dir):
-        try:
-            os.makedirs(upload_dir, exist_ok=True)
-        except Exception as e:
-            app.logger.warning(f"Could not create upload directory: {e}")
+    # The upload directory is created on the first local save, not at startup
     
     # Register template filters
     from app.utils import register_template_filters
     register_template_filters(app)
     
+    # {% cache %} tag for template fragments
+    from app.fragment_cache import init_fragment_cache
+    init_fragment_cache(app)
+    
+    # Fingerprinted static files from `flask build-assets`, served with long-lived headers
+    from app.assets import init_assets
+    init_assets(app)
+    
     # Add context processor for current year
     @app.context_processor
     def inject_current_year():
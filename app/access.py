@@ -0,0 +1,173 @@
+"""
+Paper access list
+
+paper_access holds one row per user, paper and reason (authorship or a
+review assignment), so a permission check is a single primary key EXISTS
+instead of loading the author list and the user's reviews. Session hooks
+keep the rows in step with ORM changes; bulk writers insert theirs with
+grant_access, and rebuild_access recreates the table from paper_authors
+and reviews. When create_all adds the table to an existing database it is
+filled the same way.
+
+Accepted papers are readable by everyone, so acceptance needs no rows:
+checks that allow public papers test the paper's status alongside the
+access rows.
+"""
+from sqlalchemy import delete, event, exists, inspect, insert, literal, or_, select, true, tuple_
+from app import db
+from app.models import Paper, Review, User, UserRole, PaperStatus, PaperAccess, paper_authors
+from app.utils import insert_missing
+
+# Access kinds stored in paper_access.kind
+AUTHOR = 'author'
+REVIEWER = 'reviewer'
+
+def _access_exists(user_id, paper_id, kinds=None):
+    criteria = [PaperAccess.user_id == user_id, PaperAccess.paper_id == paper_id]
+    if kinds:
+        criteria.append(PaperAccess.kind.in_(kinds))
+    return exists().where(*criteria)
+
+def can_access(user, paper, kinds=None, public=True):
+    """Check whether a user may open a paper
+
+    Admins always may, anyone may open accepted papers when `public` is
+    set, and otherwise the user needs an access row of one of `kinds`
+    (any kind when None).
+    """
+    if user.role == UserRole.ADMIN:
+        return True
+    if public and paper.status == PaperStatus.ACCEPTED:
+        return True
+    return db.session.query(_access_exists(user.id, paper.id, kinds)).scalar()
+
+def accessible_filter(user, kinds=None, public=True):
+    """Criterion limiting a Paper query to what can_access would allow, for listings
+
+    The user's access rows are read once as an uncorrelated subquery and
+    probed as a set, rather than running the EXISTS for every candidate row.
+    """
+    if user.role == UserRole.ADMIN:
+        return true()
+    granted = select(PaperAccess.paper_id).where(PaperAccess.user_id == user.id)
+    if kinds:
+        granted = granted.where(PaperAccess.kind.in_(kinds))
+    criterion = Paper.id.in_(granted)
+    if public:
+        criterion = or_(criterion, Paper.status == PaperStatus.ACCEPTED)
+    return criterion
+
+def grant_access(session, grants):
+    """Insert (user_id, paper_id, kind) rows that do not exist yet
+
+    A second review of a paper by the same reviewer (the assignment check
+    is not atomic) finds its row already there and leaves it.
+    """
+    insert_missing(session, PaperAccess, [
+        {'user_id': user_id, 'paper_id': paper_id, 'kind': kind}
+        for user_id, paper_id, kind in grants
+    ])
+
+def revoke_access(session, revokes):
+    """Delete (user_id, paper_id, kind) rows"""
+    if revokes:
+        session.execute(delete(PaperAccess).where(
+            tuple_(PaperAccess.user_id, PaperAccess.paper_id, PaperAccess.kind).in_(list(revokes))
+        ))
+
+def _previous(state, name):
+    """Attribute value before the flush"""
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[name].value
+
+def _authorship_changes(obj, grants, revokes):
+    """Collect authorship added or removed on either side of paper_authors"""
+    if isinstance(obj, Paper):
+        history = inspect(obj).attrs.authors.history
+        pairs = lambda users: {(user.id, obj.id) for user in users}
+    else:
+        history = inspect(obj).attrs.authored_papers.history
+        pairs = lambda papers: {(obj.id, paper.id) for paper in papers}
+    grants.update((user_id, paper_id, AUTHOR) for user_id, paper_id in pairs(history.added))
+    revokes.update((user_id, paper_id, AUTHOR) for user_id, paper_id in pairs(history.deleted))
+
+def access_changes(session):
+    """Access rows to grant and revoke for the objects in a flush"""
+    grants, revokes = set(), set()
+    removed_papers, removed_users = set(), set()
+
+    for obj in session.new:
+        if isinstance(obj, Review):
+            grants.add((obj.reviewer_id, obj.paper_id, REVIEWER))
+        elif isinstance(obj, (Paper, User)):
+            _authorship_changes(obj, grants, revokes)
+
+    for obj in session.deleted:
+        if isinstance(obj, Review):
+            state = inspect(obj)
+            revokes.add((_previous(state, 'reviewer_id'), _previous(state, 'paper_id'), REVIEWER))
+        elif isinstance(obj, Paper):
+            removed_papers.add(obj.id)
+        elif isinstance(obj, User):
+            removed_users.add(obj.id)
+
+    for obj in session.dirty:
+        if isinstance(obj, Review):
+            state = inspect(obj)
+            if state.attrs.reviewer_id.history.has_changes() or state.attrs.paper_id.history.has_changes():
+                revokes.add((_previous(state, 'reviewer_id'), _previous(state, 'paper_id'), REVIEWER))
+                grants.add((obj.reviewer_id, obj.paper_id, REVIEWER))
+        elif isinstance(obj, (Paper, User)):
+            _authorship_changes(obj, grants, revokes)
+
+    # The same link can show up on both sides of the relationship or be removed and re-added
+    unchanged = grants & revokes
+    return grants - unchanged, revokes - unchanged, removed_papers, removed_users
+
+def _after_flush(session, flush_context):
+    """Session hook keeping paper_access in step with authorship and assignments"""
+    grants, revokes, removed_papers, removed_users = access_changes(session)
+    revoke_access(session, revokes)
+    grant_access(session, grants)
+    # Foreign keys cascade on PostgreSQL, SQLite needs the rows removed by hand
+    if removed_papers:
+        session.execute(delete(PaperAccess).where(PaperAccess.paper_id.in_(removed_papers)))
+    if removed_users:
+        session.execute(delete(PaperAccess).where(PaperAccess.user_id.in_(removed_users)))
+
+def _fill_statements():
+    columns = ['user_id', 'paper_id', 'kind']
+    return [
+        insert(PaperAccess).from_select(
+            columns, select(paper_authors.c.user_id, paper_authors.c.paper_id, literal(AUTHOR))
+        ),
+        insert(PaperAccess).from_select(
+            columns, select(Review.reviewer_id, Review.paper_id, literal(REVIEWER)).distinct()
+        ),
+    ]
+
+def _after_create(metadata, connection, tables=(), **kw):
+    """Fill paper_access when create_all adds it to a database that already has papers"""
+    if PaperAccess.__table__ in tables:
+        for statement in _fill_statements():
+            connection.execute(statement)
+
+def register_access_listeners():
+    """Attach the access list maintenance hooks to the application session and schema"""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+    if not event.contains(db.metadata, 'after_create', _after_create):
+        event.listen(db.metadata, 'after_create', _after_create)
+
+def rebuild_access():
+    """Recreate every access row from paper_authors and reviews"""
+    session = db.session
+    session.execute(delete(PaperAccess))
+    for statement in _fill_statements():
+        session.execute(statement)
+    session.commit()
+
+    counts = dict(session.query(PaperAccess.kind, db.func.count()).group_by(PaperAccess.kind).all())
+    return {'authors': counts.get(AUTHOR, 0), 'reviewers': counts.get(REVIEWER, 0)}
@@ -1,12 +1,22 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from sqlalchemy import func, desc
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import User, Paper, Review, Conference, Category, UserRole, PaperStatus, ReviewRecommendation
-from app.forms import UserManagementForm, ConferenceForm, CategoryForm, ReviewerAssignmentForm
+from app.forms import UserManagementForm, ConferenceForm, CategoryForm, ReviewerAssignmentForm, AutoAssignForm
+from app.assignment import plan_assignments, commit_plan
+from app.export import export_stream, EXPORT_FORMATS
+from app.search import search_papers, search_snippets
+from app.utils import paginate_listing
+from app.instrumentation import query_budget
+from app.fragment_cache import prefetch_misses
+from app.reference_data import reviewer_choices
+from app.stats import dashboard_summary, monthly_submissions as monthly_submission_counts
 from datetime import datetime, timedelta
 import calendar
 from functools import wraps
+from werkzeug.utils import secure_filename
 
 admin = Blueprint('admin', __name__)
 
@@ -23,74 +33,36 @@ def admin_required(f):
 @login_required
 @admin_required
 @admin_required
+@query_budget(8)
 def dashboard():
     """Admin dashboard with system overview"""
     
-    # Basic statistics
-    total_users = User.query.count()
-    total_papers = Paper.query.count()
-    total_reviews = Review.query.filter_by(is_completed=True).count()
-    active_conferences = Conference.query.filter_by(status='ACTIVE').count()
-    
-    # User statistics by role
-    user_stats = db.session.query(
-        User.role,
-        func.count(User.id).label('count')
-    ).group_by(User.role).all()
-    
-    # Paper statistics by status
-    paper_stats = db.session.query(
-        Paper.status,
-        func.count(Paper.id).label('count')
-    ).group_by(Paper.status).all()
-    
-    # Monthly submission trends (last 12 months)
-    twelve_months_ago = datetime.now() - timedelta(days=365)
-    monthly_submissions = db.session.query(
-        func.year(Paper.submission_date).label('year'),
-        func.month(Paper.submission_date).label('month'),
-        func.count(Paper.id).label('count')
-    ).filter(
-        Paper.submission_date >= twelve_months_ago
-    ).group_by(
-        func.year(Paper.submission_date),
-        func.month(Paper.submission_date)
-    ).order_by(
-        func.year(Paper.submission_date),
-        func.month(Paper.submission_date)
-    ).all()
-    
-    # Recent activity
+    # Counts come from the statistics rollup instead of scanning base tables
+    summary = dashboard_summary()
+    monthly_submissions = monthly_submission_counts()
+    
+    # Recent activity; rows are cached fragments, so only uncached ones load their relations
     recent_papers = Paper.query.order_by(desc(Paper.submission_date)).limit(5).all()
     recent_reviews = Review.query.filter_by(is_completed=True).order_by(desc(Review.review_date)).limit(5).all()
-    
-    # Pending reviews
-    pending_reviews = Review.query.filter_by(is_completed=False).count()
-    overdue_reviews = Review.query.filter(
-        Review.deadline < datetime.now(),
-        Review.is_completed == False
-    ).count()
+    prefetch_misses('admin-recent-paper', recent_papers,
+                    lambda paper: (paper.id, paper.last_updated, paper.submitted_by),
+                    joinedload(Paper.submitter))
+    prefetch_misses('admin-recent-review', recent_reviews,
+                    lambda review: (review.id, review.review_date, review.paper_id, review.reviewer_id),
+                    joinedload(Review.paper), joinedload(Review.reviewer))
     
     return render_template('admin/dashboard.html',
                          title='Admin Dashboard',
-                         total_users=total_users,
-                         total_papers=total_papers,
-                         total_reviews=total_reviews,
-                         active_conferences=active_conferences,
-                         user_stats=user_stats,
-                         paper_stats=paper_stats,
                          monthly_submissions=monthly_submissions,
                          recent_papers=recent_papers,
                          recent_reviews=recent_reviews,
-                         pending_reviews=pending_reviews,
-                         overdue_reviews=overdue_reviews)
+                         **summary)
 
 @admin.route('/users')
 @login_required
 @admin_required
 def manage_users():
     """User management interface"""
-    page = request.args.get('page', 1, type=int)
     role_filter = request.args.get('role')
     search = request.args.get('search', '')
     
@@ -109,8 +81,7 @@ def manage_users():
             )
         )
     
-    query = query.order_by(User.name)
-    pagination = query.paginate(page=page, per_page=20, error_out=False)
+    pagination = paginate_listing(query, (User.name, User.id), per_page=20)
     users = pagination.items
     
     return render_template('admin/users.html',
@@ -179,18 +150,13 @@ def manage_papers():
     if conference_filter:
         query = query.filter_by(conference_id=conference_filter)
     
+    # Rank full-text matches by relevance, otherwise newest first
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            db.or_(
-                Paper.title.like(search_term),
-                Paper.abstract.like(search_term)
-            )
-        )
-    
-    query = query.order_by(desc(Paper.submission_date))
-    pagination = query.paginate(page=page, per_page=20, error_out=False)
+        pagination = search_papers(query, search).paginate(page=page, per_page=20, error_out=False)
+    else:
+        pagination = paginate_listing(query, (Paper.submission_date, Paper.id), descending=True, per_page=20)
     papers = pagination.items
+    snippets = search_snippets([p.id for p in papers], search) if search else {}
     
     # Get conferences for filter dropdown
     conferences = Conference.query.all()
@@ -199,6 +165,7 @@ def manage_papers():
                          title='Manage Papers',
                          papers=papers,
                          pagination=pagination,
+                         snippets=snippets,
                          conferences=conferences,
                          status_filter=status_filter,
                          conference_filter=conference_filter,
@@ -226,23 +193,56 @@ def update_paper_status(paper_id):
 @admin.route('/assign-reviewers')
 @login_required
 @admin_required
+@query_budget(6)
 def assign_reviewers():
     """Reviewer assignment interface"""
-    # Get papers that need reviewers
+    # Get papers that need reviewers, using the stored assignment counts
+    conferences = {c.name: c for c in Conference.query.all()}
     papers_needing_reviewers = []
     
     for paper in Paper.query.filter(Paper.status.in_([PaperStatus.SUBMITTED, PaperStatus.UNDER_REVIEW])).all():
-        assigned_reviewers = Review.query.filter_by(paper_id=paper.id).count()
-        if assigned_reviewers < paper.conference.reviews_per_paper:
+        conference = conferences.get(paper.conference_name)
+        reviews_per_paper = conference.reviews_per_paper if conference else 3
+        assigned_reviewers = paper.assigned_review_count
+        if assigned_reviewers < reviews_per_paper:
             papers_needing_reviewers.append({
                 'paper': paper,
                 'assigned_reviewers': assigned_reviewers,
-                'needed_reviewers': paper.conference.reviews_per_paper - assigned_reviewers
+                'needed_reviewers': reviews_per_paper - assigned_reviewers
             })
     
     return render_template('admin/assign_reviewers.html',
                          title='Assign Reviewers',
-                         papers_needing_reviewers=papers_needing_reviewers)
+                         papers_needing_reviewers=papers_needing_reviewers,
+                         conferences=list(conferences.values()))
+
+@admin.route('/conferences/<int:conference_id>/auto-assign', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def auto_assign_reviewers(conference_id):
+    """Preview and commit a conference-wide reviewer assignment"""
+    conference = Conference.query.get_or_404(conference_id)
+    form = AutoAssignForm()
+    max_load = request.values.get('max_load', type=int)
+    plan = plan_assignments(conference, max_load=max_load)
+    
+    if form.validate_on_submit():
+        # Only commit the plan the admin actually previewed
+        if form.digest.data != plan.digest:
+            flash('Assignments changed since the preview was generated. Please review the updated plan.', 'warning')
+        else:
+            created = commit_plan(plan)
+            flash(f'Assigned {created} reviews for "{conference.name} {conference.year}".', 'success')
+            return redirect(url_for('admin.assign_reviewers'))
+    
+    form.digest.data = plan.digest
+    form.max_load.data = max_load
+    
+    return render_template('admin/auto_assign.html',
+                         title=f'Auto-assign Reviewers: {conference.name} {conference.year}',
+                         conference=conference,
+                         plan=plan,
+                         form=form)
 
 @admin.route('/papers/<int:paper_id>/assign-reviewer', methods=['GET', 'POST'])
 @login_required
@@ -253,14 +253,8 @@ def assign_reviewer_to_paper(paper_id):
     form = ReviewerAssignmentForm()
     
     # Get reviewers not already assigned to this paper
-    assigned_reviewer_ids = [r.reviewer_id for r in Review.query.filter_by(paper_id=paper_id).all()]
-    available_reviewers = User.query.filter(
-        User.role == UserRole.REVIEWER,
-        User.is_active == True,
-        ~User.id.in_(assigned_reviewer_ids)
-    ).all()
-    
-    form.reviewer_id.choices = [(r.id, f"{r.name} ({r.email})") for r in available_reviewers]
+    assigned_reviewer_ids = [reviewer_id for reviewer_id, in db.session.query(Review.reviewer_id).filter_by(paper_id=paper_id)]
+    form.reviewer_id.choices = reviewer_choices(exclude=assigned_reviewer_ids)
     
     if form.validate_on_submit():
         # Check if reviewer is already assigned
@@ -284,10 +278,11 @@ def assign_reviewer_to_paper(paper_id):
             if paper.status == PaperStatus.SUBMITTED:
                 paper.status = PaperStatus.UNDER_REVIEW
             
+            Paper.refresh_review_aggregates([paper.id])
             db.session.commit()
             
-            reviewer = User.query.get(form.reviewer_id.data)
-            flash(f'Reviewer {reviewer.name} assigned to paper "{paper.title}"', 'success')
+            reviewer_name = dict(form.reviewer_id.choices)[form.reviewer_id.data]
+            flash(f'Reviewer {reviewer_name} assigned to paper "{paper.title}"', 'success')
             return redirect(url_for('admin.assign_reviewers'))
     
     return render_template('admin/assign_reviewer.html',
@@ -388,6 +383,47 @@ def add_category():
                          title='Add Category',
                          form=form)
 
+@admin.route('/api/pool-stats')
+@login_required
+@admin_required
+def pool_stats():
+    """Connection pool metrics for this instance"""
+    from app.db_pool import pool_metrics
+    
+    stats = pool_metrics.snapshot(db.engine.pool)
+    stats['strategy'] = current_app.config['DB_CONNECTION_STRATEGY']
+    return jsonify(stats)
+
+@admin.route('/export/papers')
+@login_required
+@admin_required
+def export_papers():
+    """Stream paper metadata (accepted papers by default) as CSV or JSONL"""
+    file_format = request.args.get('format', 'csv')
+    if file_format not in EXPORT_FORMATS:
+        abort(400)
+    
+    status = request.args.get('status', PaperStatus.ACCEPTED.value)
+    try:
+        statuses = None if status == 'all' else [PaperStatus[name.strip().upper()] for name in status.split(',')]
+    except KeyError:
+        abort(400)
+    conference = request.args.get('conference') or None
+    compress = request.args.get('gzip', 'false').lower() in ['true', 'on', '1']
+    
+    filename = secure_filename(f"papers-{conference or 'all'}.{file_format}") + ('.gz' if compress else '')
+    if compress:
+        mimetype = 'application/gzip'
+    else:
+        mimetype = 'text/csv' if file_format == 'csv' else 'application/x-ndjson'
+    
+    response = Response(
+        stream_with_context(export_stream(file_format, compress, conference_name=conference, statuses=statuses)),
+        mimetype=mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @admin.route('/api/dashboard-stats')
 @login_required
 @admin_required
@@ -395,36 +431,18 @@ def dashboard_stats():
     """API endpoint for dashboard statistics"""
     
     # Monthly submission data for chart
-    twelve_months_ago = datetime.now() - timedelta(days=365)
-    monthly_data = db.session.query(
-        func.year(Paper.submission_date).label('year'),
-        func.month(Paper.submission_date).label('month'),
-        func.count(Paper.id).label('submissions')
-    ).filter(
-        Paper.submission_date >= twelve_months_ago
-    ).group_by(
-        func.year(Paper.submission_date),
-        func.month(Paper.submission_date)
-    ).all()
-    
-    # Format data for charts
     chart_data = []
-    for item in monthly_data:
-        month_name = calendar.month_abbr[item.month]
+    for item in monthly_submission_counts():
+        month_name = calendar.month_abbr[item['month']]
         chart_data.append({
-            'month': f"{month_name} {item.year}",
-            'submissions': item.submissions
+            'month': f"{month_name} {item['year']}",
+            'submissions': item['count']
         })
     
     # Status distribution
-    status_data = db.session.query(
-        Paper.status,
-        func.count(Paper.id).label('count')
-    ).group_by(Paper.status).all()
-    
     status_distribution = [
         {'status': status.value.replace('_', ' ').title(), 'count': count}
-        for status, count in status_data
+        for status, count in dashboard_summary()['paper_stats']
     ]
     
     return jsonify({
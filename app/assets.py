@@ -0,0 +1,153 @@
+"""
+Fingerprinted static assets
+
+`flask build-assets` copies the stylesheets, scripts and icons in the static
+folder to static/dist under content-hashed names (css/custom.3f9a1c0d2b7e.css),
+next to gzip and, when the brotli package is installed, brotli versions made
+ahead of time. A manifest maps each source path to its hashed name.
+
+Templates link them with asset_url('css/custom.css'). Without a manifest
+(nothing built yet) it falls back to the plain static URL. Hashed files are
+served from ASSETS_URL_PATH with a one-year immutable Cache-Control: a
+changed file gets a new name, so browsers and the CDN never revalidate. The
+precompressed variant the client accepts is sent as is, so workers neither
+compress nor re-read large files per request.
+
+The Vercel build only installs requirements, so the built files are
+committed: run `flask build-assets --clean` after changing a static file
+(the deploy scripts do it before uploading).
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST = 'manifest.json'
+
+# Text formats worth compressing; other files are only fingerprinted
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.map', '.ico'}
+FINGERPRINTED = COMPRESSIBLE | {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2'}
+
+# Preferred first when a client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+assets = Blueprint('assets', __name__)
+
+def _output_folder(app):
+    return os.path.join(app.static_folder, app.config.get('ASSETS_FOLDER', 'dist'))
+
+def _fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+def _write(path, data):
+    # Write then rename, so a running server never serves a half-written file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+def _compressed_variants(data):
+    """(suffix, bytes) for each encoding that actually shrinks the file"""
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    return [(suffix, payload) for suffix, payload in variants if len(payload) < len(data)]
+
+def build_assets(app, clean=False):
+    """Write hashed and precompressed copies of the static files and their manifest"""
+    source = app.static_folder
+    output = _output_folder(app)
+    manifest, report = {}, {'files': 0, 'bytes': 0, 'gzip_bytes': 0, 'brotli_bytes': 0}
+
+    for directory, subdirectories, filenames in os.walk(source):
+        if os.path.abspath(directory) == os.path.abspath(source):
+            subdirectories[:] = [name for name in subdirectories
+                                 if os.path.join(directory, name) != output]
+        for filename in sorted(filenames):
+            stem, extension = os.path.splitext(filename)
+            if extension.lower() not in FINGERPRINTED:
+                continue
+            path = os.path.join(directory, filename)
+            logical = os.path.relpath(path, source).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            hashed = f'{os.path.dirname(logical)}/{stem}.{_fingerprint(data)}{extension}'.lstrip('/')
+            target = os.path.join(output, hashed)
+            _write(target, data)
+            report['files'] += 1
+            report['bytes'] += len(data)
+            if extension.lower() in COMPRESSIBLE:
+                for suffix, payload in _compressed_variants(data):
+                    _write(target + suffix, payload)
+                    report['gzip_bytes' if suffix == '.gz' else 'brotli_bytes'] += len(payload)
+            manifest[logical] = hashed
+
+    if clean and os.path.isdir(output):
+        # Old hashes stay by default so pages rendered before a deploy still load
+        keep = {os.path.join(output, hashed) for hashed in manifest}
+        for directory, _, filenames in os.walk(output):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                base = path[:-3] if path.endswith(('.gz', '.br')) else path
+                if filename != MANIFEST and base not in keep:
+                    os.remove(path)
+
+    _write(os.path.join(output, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    app.extensions['asset_manifest'] = manifest
+    return report
+
+def load_manifest(app):
+    """Source path -> hashed path from the last build, empty when there is none"""
+    try:
+        with open(os.path.join(_output_folder(app), MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def asset_url(filename):
+    """URL of the fingerprinted copy of a static file, or the plain static URL"""
+    hashed = current_app.extensions.get('asset_manifest', {}).get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets.serve_asset', filename=hashed)
+
+@assets.route('/<path:filename>')
+def serve_asset(filename):
+    """Hashed asset, precompressed when the client accepts it"""
+    folder = _output_folder(current_app)
+    if filename == MANIFEST or filename.endswith(('.gz', '.br')):
+        abort(404)
+
+    encoding, suffix = None, ''
+    for name, candidate in ENCODINGS:
+        if request.accept_encodings[name] and os.path.isfile(os.path.join(folder, filename + candidate)):
+            encoding, suffix = name, candidate
+            break
+
+    # Typed after the original name, not the .gz/.br file actually sent
+    response = send_from_directory(
+        folder, filename + suffix,
+        mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+        max_age=current_app.config.get('ASSETS_MAX_AGE', 31536000)
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def init_assets(app):
+    """Load the asset manifest and serve the hashed files"""
+    app.extensions['asset_manifest'] = load_manifest(app)
+    app.register_blueprint(assets, url_prefix=app.config.get('ASSETS_URL_PATH', '/assets'))
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,220 @@
+"""
+Conference-wide automatic reviewer assignment
+
+The whole conference is solved in memory as a min-cost flow: every paper
+needs `reviews_per_paper` units of flow, every eligible (paper, reviewer)
+pair is a unit-capacity arc and each reviewer drains to the sink through
+arcs whose cost grows with their load. Because pair arcs are free and the
+load cost is convex and identical for all reviewers, the shortest
+augmenting path from a paper always ends at the least-loaded reviewer
+reachable through alternating paths, so successive shortest paths reduce
+to a breadth-first search per review slot.
+"""
+import hashlib
+from collections import defaultdict, deque
+from sqlalchemy import func, insert, update
+from app import db
+from app.models import (Paper, Review, User, UserRole, PaperStatus, StatsCounter,
+                        paper_authors)
+from app.stats import REVIEWS_BY_STATE, PENDING_BY_DEADLINE, PAPERS_BY_STATUS, apply_deltas
+from app.access import grant_access, REVIEWER
+
+ASSIGNABLE_STATUSES = [PaperStatus.SUBMITTED, PaperStatus.UNDER_REVIEW]
+
+class AssignmentPlan:
+    """Proposed reviewer assignments for one conference"""
+
+    def __init__(self, conference, deadline, papers, reviewers, load_before):
+        self.conference = conference
+        self.deadline = deadline
+        self.papers = papers          # {paper_id: (title, status)}
+        self.reviewers = reviewers    # {reviewer_id: (name, email)}
+        self.load_before = load_before
+        self.assignments = defaultdict(set)
+        self.unfilled = {}
+
+    @property
+    def pairs(self):
+        """New (paper_id, reviewer_id) pairs in a stable order"""
+        return sorted(
+            (paper_id, reviewer_id)
+            for paper_id, reviewer_ids in self.assignments.items()
+            for reviewer_id in reviewer_ids
+        )
+
+    @property
+    def load_after(self):
+        load = dict(self.load_before)
+        for _, reviewer_id in self.pairs:
+            load[reviewer_id] += 1
+        return load
+
+    @property
+    def digest(self):
+        """Fingerprint used to check a committed plan matches its preview"""
+        payload = ';'.join(f'{p}:{r}' for p, r in self.pairs)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def diff(self):
+        """Per-paper preview rows: paper, reviewers to add and missing slots"""
+        rows = []
+        for paper_id in sorted(set(self.assignments) | set(self.unfilled)):
+            title, status = self.papers[paper_id]
+            rows.append({
+                'paper_id': paper_id,
+                'title': title,
+                'status': status,
+                'add': [(r, self.reviewers[r][0]) for r in sorted(self.assignments.get(paper_id, ()))],
+                'unfilled': self.unfilled.get(paper_id, 0),
+            })
+        return rows
+
+    def load_changes(self):
+        """Reviewers whose load changes, as (id, name, before, after)"""
+        after = self.load_after
+        return [
+            (reviewer_id, self.reviewers[reviewer_id][0], self.load_before[reviewer_id], after[reviewer_id])
+            for reviewer_id in sorted(self.reviewers)
+            if after[reviewer_id] != self.load_before[reviewer_id]
+        ]
+
+def plan_assignments(conference, deadline=None, max_load=None):
+    """Compute a balanced assignment for every paper of a conference still needing reviewers"""
+    reviews_per_paper = conference.reviews_per_paper or 3
+
+    papers = {
+        paper_id: (title, status)
+        for paper_id, title, status in db.session.query(Paper.id, Paper.title, Paper.status).filter(
+            Paper.conference_name == conference.name,
+            Paper.status.in_(ASSIGNABLE_STATUSES)
+        ).order_by(Paper.id)
+    }
+    reviewers = {
+        reviewer_id: (name, email)
+        for reviewer_id, name, email in db.session.query(User.id, User.name, User.email).filter(
+            User.role == UserRole.REVIEWER,
+            User.is_active == True
+        ).order_by(User.id)
+    }
+
+    # Current workload: incomplete reviews across all conferences
+    load = {reviewer_id: 0 for reviewer_id in reviewers}
+    for reviewer_id, count in db.session.query(Review.reviewer_id, func.count(Review.id)).filter(
+        Review.is_completed.isnot(True)
+    ).group_by(Review.reviewer_id):
+        if reviewer_id in load:
+            load[reviewer_id] = count
+
+    plan = AssignmentPlan(conference, deadline or conference.review_deadline, papers, reviewers, load)
+    if not papers:
+        return plan
+
+    # Existing reviews and authorship both rule a reviewer out for a paper
+    excluded = defaultdict(set)
+    assigned = defaultdict(int)
+    for paper_id, reviewer_id in db.session.query(Review.paper_id, Review.reviewer_id).join(
+        Paper, Paper.id == Review.paper_id
+    ).filter(Paper.conference_name == conference.name, Paper.status.in_(ASSIGNABLE_STATUSES)):
+        excluded[paper_id].add(reviewer_id)
+        assigned[paper_id] += 1
+    for paper_id, user_id in db.session.query(paper_authors.c.paper_id, paper_authors.c.user_id).join(
+        Paper, Paper.id == paper_authors.c.paper_id
+    ).filter(Paper.conference_name == conference.name, Paper.status.in_(ASSIGNABLE_STATUSES)):
+        excluded[paper_id].add(user_id)
+
+    _solve(plan, reviews_per_paper, assigned, excluded, dict(load), max_load)
+    return plan
+
+def _solve(plan, reviews_per_paper, assigned, excluded, load, max_load):
+    """Fill every open review slot with one shortest augmenting path each"""
+    reviewer_ids = sorted(plan.reviewers)
+    holders = defaultdict(set)    # reviewer -> papers newly assigned to them
+
+    def eligible(paper_id, reviewer_id):
+        return reviewer_id not in excluded[paper_id] and reviewer_id not in plan.assignments[paper_id]
+
+    def has_capacity(reviewer_id):
+        return max_load is None or load[reviewer_id] < max_load
+
+    for paper_id in plan.papers:
+        for _ in range(reviews_per_paper - assigned[paper_id]):
+            open_loads = [load[r] for r in reviewer_ids if has_capacity(r)]
+            if not open_loads:
+                plan.unfilled[paper_id] = plan.unfilled.get(paper_id, 0) + 1
+                continue
+            floor = min(open_loads)
+
+            # Breadth-first search over alternating paths for the least-loaded reviewer
+            reviewer_parent = {}
+            paper_parent = {paper_id: None}
+            queue = deque([paper_id])
+            best = None
+            while queue:
+                current = queue.popleft()
+                for reviewer_id in reviewer_ids:
+                    if reviewer_id in reviewer_parent or not eligible(current, reviewer_id):
+                        continue
+                    reviewer_parent[reviewer_id] = current
+                    if has_capacity(reviewer_id) and (best is None or load[reviewer_id] < load[best]):
+                        best = reviewer_id
+                    for holder in holders[reviewer_id]:
+                        if holder not in paper_parent:
+                            paper_parent[holder] = reviewer_id
+                            queue.append(holder)
+                if best is not None and load[best] == floor:
+                    break
+
+            if best is None:
+                plan.unfilled[paper_id] = plan.unfilled.get(paper_id, 0) + 1
+                continue
+
+            # Augment: each paper on the path hands its reviewer to the previous one
+            reviewer_id = best
+            while reviewer_id is not None:
+                holder = reviewer_parent[reviewer_id]
+                released = paper_parent[holder]
+                plan.assignments[holder].add(reviewer_id)
+                holders[reviewer_id].add(holder)
+                if released is not None:
+                    plan.assignments[holder].discard(released)
+                    holders[released].discard(holder)
+                reviewer_id = released
+            load[best] += 1
+
+    # Drop papers whose proposed set ended up empty after reassignments
+    for paper_id in [p for p, reviewers in plan.assignments.items() if not reviewers]:
+        del plan.assignments[paper_id]
+
+def commit_plan(plan):
+    """Insert the planned reviews in one bulk statement and update dependants"""
+    pairs = plan.pairs
+    if not pairs:
+        return 0
+
+    db.session.execute(insert(Review), [
+        {'paper_id': paper_id, 'reviewer_id': reviewer_id, 'deadline': plan.deadline, 'is_completed': False}
+        for paper_id, reviewer_id in pairs
+    ])
+
+    # Papers receiving their first reviewer move to UNDER_REVIEW
+    paper_ids = sorted(plan.assignments)
+    started = [p for p in paper_ids if plan.papers[p][1] == PaperStatus.SUBMITTED]
+    if started:
+        db.session.execute(
+            update(Paper).where(Paper.id.in_(started)).values(status=PaperStatus.UNDER_REVIEW),
+            execution_options={'synchronize_session': False}
+        )
+    Paper.refresh_review_aggregates(paper_ids)
+
+    # Bulk statements bypass the session hooks, so grant access and feed the rollup directly
+    grant_access(db.session, [(reviewer_id, paper_id, REVIEWER) for paper_id, reviewer_id in pairs])
+    deltas = {(StatsCounter, (REVIEWS_BY_STATE, 'pending')): len(pairs)}
+    if plan.deadline is not None:
+        deltas[(StatsCounter, (PENDING_BY_DEADLINE, plan.deadline.date().isoformat()))] = len(pairs)
+    if started:
+        deltas[(StatsCounter, (PAPERS_BY_STATUS, PaperStatus.SUBMITTED.value))] = -len(started)
+        deltas[(StatsCounter, (PAPERS_BY_STATUS, PaperStatus.UNDER_REVIEW.value))] = len(started)
+    apply_deltas(db.session, deltas)
+
+    db.session.commit()
+    return len(pairs)
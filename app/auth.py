@@ -5,6 +5,7 @@ from app import db, limiter
 from app.models import User, UserRole
 from app.forms import LoginForm, RegistrationForm, PasswordResetRequestForm, PasswordResetForm
 from app.utils import send_email, generate_reset_token, verify_reset_token
+from app.passwords import PasswordServiceBusy
 from datetime import datetime
 
 auth = Blueprint('auth', __name__)
@@ -20,13 +21,26 @@ def login():
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
         
-        if user and user.check_password(form.password.data):
+        try:
+            valid = user is not None and user.check_password(form.password.data)
+        except PasswordServiceBusy:
+            flash('Too many people are signing in right now. Please try again in a moment.', 'error')
+            return render_template('auth/login.html', title='Sign In', form=form), 503
+        
+        if valid:
             if not user.is_active:
                 flash('Your account has been deactivated. Please contact an administrator.', 'error')
                 return redirect(url_for('auth.login'))
             
             login_user(user, remember=True)
             user.last_login = datetime.utcnow()
+            
+            # Upgrade hashes made under an older policy while the password is at hand
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(form.password.data)
+                except PasswordServiceBusy:
+                    current_app.logger.warning(f"Skipped password rehash for user {user.id}: hashing busy")
             db.session.commit()
             
             next_page = request.args.get('next')
@@ -70,11 +84,18 @@ def register():
                     'auth/email/welcome',
                     user=user
                 )
+                # Commits the queued message in async mode
+                db.session.commit()
             except Exception as e:
                 current_app.logger.error(f"Failed to send welcome email: {e}")
+                db.session.rollback()
             
             return redirect(url_for('auth.login'))
             
+        except PasswordServiceBusy:
+            db.session.rollback()
+            flash('Too many people are signing up right now. Please try again in a moment.', 'error')
+            return render_template('auth/register.html', title='Register', form=form), 503
         except Exception as e:
             current_app.logger.error(f"Registration error: {e}")
             db.session.rollback()
@@ -110,6 +131,7 @@ def reset_password_request():
                 user=user,
                 token=token
             )
+            db.session.commit()
         
         flash('Check your email for instructions to reset your password.', 'info')
         return redirect(url_for('auth.login'))
@@ -129,7 +151,12 @@ def reset_password(token):
     
     form = PasswordResetForm()
     if form.validate_on_submit():
-        user.set_password(form.password.data)
+        try:
+            user.set_password(form.password.data)
+        except PasswordServiceBusy:
+            db.session.rollback()
+            flash('Too many password changes are being processed right now. Please try again in a moment.', 'error')
+            return render_template('auth/reset_password.html', title='Reset Password', form=form), 503
         db.session.commit()
         flash('Your password has been reset successfully.', 'success')
         return redirect(url_for('auth.login'))
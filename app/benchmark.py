@@ -0,0 +1,589 @@
+"""
+Synthetic data and route benchmarks
+
+generate_dataset fills an empty database with a deterministic,
+production-sized data set: the same seed always produces the same users,
+papers, reviews and assignments. Rows are bulk inserted, so the rollups and
+caches that session hooks normally maintain are rebuilt at the end.
+
+run_benchmark drives the hot routes through the test client and records
+latency percentiles and query counts per route. Views whose template is
+missing render a bare base layout, noted per route, so they are still
+timed. Results are plain JSON so a baseline saved from one commit can be
+compared against a later run with compare_results. run_login_benchmark measures sign-in throughput with
+password hashing inline and in the worker pool, and run_rate_limit_benchmark
+the per-hit cost and cross-process accuracy of rate limit storages.
+"""
+import json
+import os
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import template_rendered
+from jinja2 import ChoiceLoader, FunctionLoader
+from sqlalchemy import event, func, insert, text
+from werkzeug.security import generate_password_hash
+from app import db
+from app.passwords import password_hasher
+from app.models import (User, UserRole, Paper, PaperStatus, Review, ReviewRecommendation,
+                        Conference, ConferenceStatus, Category, Affiliation,
+                        paper_authors, paper_categories)
+
+# Every generated account signs in with this password
+BENCHMARK_PASSWORD = 'benchmark'
+
+# Rendered in place of templates missing from the tree
+PLACEHOLDER_TEMPLATE = '{% extends "base.html" %}'
+
+DEFAULT_SIZES = {
+    'users': 20000,
+    'papers': 150000,
+    'reviews': 500000,
+    'categories': 40,
+    'conferences': 30,
+}
+
+REVIEWER_SHARE = 0.1
+COMPLETED_SHARE = 0.6
+
+FIRST_NAMES = ['Ada', 'Alan', 'Barbara', 'Claude', 'Donald', 'Edsger', 'Frances', 'Grace',
+               'Hedy', 'Ivan', 'John', 'Katherine', 'Leslie', 'Margaret', 'Niklaus', 'Radia',
+               'Shafi', 'Tim', 'Vint', 'Whitfield', 'Yann', 'Zhang']
+LAST_NAMES = ['Allen', 'Backus', 'Cerf', 'Dijkstra', 'Engelbart', 'Floyd', 'Goldwasser',
+              'Hamilton', 'Hopper', 'Kahn', 'Knuth', 'Lamport', 'Liskov', 'McCarthy',
+              'Perlman', 'Ritchie', 'Sutherland', 'Thompson', 'Turing', 'Wirth', 'Yao']
+INSTITUTIONS = ['Northfield University', 'Institute of Applied Computing', 'Lakeside College',
+                'Central Research Lab', 'Polytechnic of the Coast', 'Valley State University',
+                'Metropolitan Institute of Technology', 'Highland University']
+DEPARTMENTS = ['Computer Science', 'Electrical Engineering', 'Mathematics', 'Statistics',
+               'Information Systems']
+POSITIONS = ['Professor', 'Associate Professor', 'Lecturer', 'Postdoc', 'PhD Student']
+TOPICS = ['graph neural networks', 'query optimization', 'distributed consensus',
+          'program synthesis', 'differential privacy', 'compiler verification',
+          'reinforcement learning', 'cache coherence', 'federated learning',
+          'type inference', 'stream processing', 'quantum error correction',
+          'interpretable models', 'storage engines', 'network telemetry']
+TITLE_PATTERNS = ['Scalable {}', 'Towards Practical {}', 'Revisiting {}', 'Efficient {} at Scale',
+                  'A Study of {}', 'Rethinking {} for Modern Hardware', 'Learning-Based {}']
+SENTENCES = [
+    'We study {} in settings where existing approaches break down.',
+    'Our method improves on prior work in {} by a wide margin.',
+    'Experiments on public benchmarks show consistent gains for {}.',
+    'We release an open implementation and a new data set for {}.',
+    'The analysis reveals trade-offs in {} that earlier evaluations missed.',
+]
+
+# Paper statuses with their relative frequency
+STATUS_WEIGHTS = [
+    (PaperStatus.SUBMITTED, 30),
+    (PaperStatus.UNDER_REVIEW, 27),
+    (PaperStatus.REVIEWED, 8),
+    (PaperStatus.ACCEPTED, 12),
+    (PaperStatus.REJECTED, 18),
+    (PaperStatus.REVISION_REQUIRED, 5),
+]
+
+class _BulkWriter:
+    """Buffers generated rows and inserts them with executemany
+
+    Every buffer is flushed, in the order tables were first added, whenever
+    one fills up, so association rows never reach the database before the
+    rows they reference.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+
+    def add(self, table, row):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        for table, rows in self.buffers.items():
+            if rows:
+                db.session.execute(insert(table), rows)
+                name = getattr(table, '__tablename__', None) or table.name
+                self.counts[name] = self.counts.get(name, 0) + len(rows)
+                rows.clear()
+
+def _reset_sequences(tables):
+    """Move PostgreSQL id sequences past explicitly inserted ids"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+def _skewed_choice(rng, items, heavy_share=0.2):
+    """Pick from items, sending `heavy_share` of picks down a long tail towards the first ones"""
+    if rng.random() < heavy_share:
+        return items[min(int(rng.paretovariate(1.2)) - 1, len(items) - 1)]
+    return items[rng.randrange(len(items))]
+
+def _abstract(rng, topic):
+    sentences = rng.sample(SENTENCES, 3)
+    return ' '.join(sentence.format(topic) for sentence in sentences)
+
+def generate_dataset(users=None, papers=None, reviews=None, categories=None, conferences=None,
+                     seed=1, batch_size=5000, progress=None):
+    """Fill an empty database with deterministic synthetic data
+
+    User 1 is the admin, the next REVIEWER_SHARE of users are reviewers and
+    the rest are authors. Submissions and review load are skewed so a few
+    authors and reviewers carry much more than the median, as in real
+    conferences. Returns the number of rows created per table.
+    """
+    sizes = dict(DEFAULT_SIZES)
+    sizes.update({name: value for name, value in (
+        ('users', users), ('papers', papers), ('reviews', reviews),
+        ('categories', categories), ('conferences', conferences)
+    ) if value is not None})
+    progress = progress or (lambda message: None)
+
+    db.create_all()
+    if db.session.query(User.id).first() is not None:
+        raise ValueError('The database already contains users; generate into an empty database')
+
+    rng = random.Random(seed)
+    now = datetime(2025, 6, 1)
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+    writer = _BulkWriter(batch_size)
+
+    # Categories and conferences
+    for i in range(1, sizes['categories'] + 1):
+        topic = TOPICS[(i - 1) % len(TOPICS)]
+        writer.add(Category, {
+            'id': i,
+            'name': f'{topic.title()} {(i - 1) // len(TOPICS) + 1}',
+            'description': f'Research on {topic}',
+            'color': f'#{rng.randrange(0x1000000):06x}',
+        })
+    deadlines = []
+    for i in range(1, sizes['conferences'] + 1):
+        deadline = now - timedelta(days=30 * (sizes['conferences'] - i))
+        deadlines.append((f'SYNTH-{i:03d}', deadline))
+        writer.add(Conference, {
+            'id': i,
+            'name': f'SYNTH-{i:03d}',
+            'year': deadline.year,
+            'submission_deadline': deadline,
+            'review_deadline': deadline + timedelta(days=45),
+            'notification_date': deadline + timedelta(days=60),
+            'status': ConferenceStatus.ACTIVE if deadline + timedelta(days=60) > now else ConferenceStatus.CLOSED,
+            'description': f'Synthetic conference {i}',
+            'reviews_per_paper': 3,
+        })
+    writer.flush()
+
+    # Users and affiliations
+    reviewer_count = max(1, int(sizes['users'] * REVIEWER_SHARE))
+    for i in range(1, sizes['users'] + 1):
+        if i == 1:
+            role = UserRole.ADMIN
+        elif i <= reviewer_count + 1:
+            role = UserRole.REVIEWER
+        else:
+            role = UserRole.AUTHOR
+        writer.add(User, {
+            'id': i,
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'email': f'user{i}@bench.example',
+            'password_hash': password_hash,
+            'role': role,
+            'created_at': now - timedelta(days=rng.randrange(1500)),
+            'is_active': i == 1 or rng.random() > 0.01,
+        })
+        for primary in (True, False) if rng.random() < 0.3 else (True,):
+            writer.add(Affiliation, {
+                'user_id': i,
+                'institution_name': rng.choice(INSTITUTIONS),
+                'department': rng.choice(DEPARTMENTS),
+                'position': rng.choice(POSITIONS),
+                'is_primary': primary,
+            })
+    writer.flush()
+    progress(f"{writer.counts.get('users', 0)} users, {writer.counts.get('affiliations', 0)} affiliations")
+
+    # Papers with their co-authors and categories
+    authors = list(range(reviewer_count + 2, sizes['users'] + 1)) or [1]
+    reviewers = list(range(2, reviewer_count + 2))
+    statuses, weights = zip(*STATUS_WEIGHTS)
+    category_ids = range(1, sizes['categories'] + 1)
+    submitted_dates = []
+    for i in range(1, sizes['papers'] + 1):
+        submitter = _skewed_choice(rng, authors)
+        conference_name, deadline = deadlines[rng.randrange(len(deadlines))]
+        topic = rng.choice(TOPICS)
+        submitted = deadline - timedelta(minutes=rng.randrange(60 * 24 * 60))
+        submitted_dates.append(submitted)
+        writer.add(Paper, {
+            'id': i,
+            'title': f'{rng.choice(TITLE_PATTERNS).format(topic.title())} ({i})',
+            'abstract': _abstract(rng, topic),
+            'status': rng.choices(statuses, weights)[0],
+            'submission_date': submitted,
+            'last_updated': submitted,
+            'conference_name': conference_name,
+            'keywords': ', '.join(rng.sample(TOPICS, 3)),
+            'submitted_by': submitter,
+        })
+        for user_id in sorted({submitter} | {rng.choice(authors) for _ in range(rng.randrange(4))}):
+            writer.add(paper_authors, {'paper_id': i, 'user_id': user_id})
+        for category_id in sorted(rng.sample(category_ids, min(rng.randint(1, 3), len(category_ids)))):
+            writer.add(paper_categories, {'paper_id': i, 'category_id': category_id})
+    writer.flush()
+    progress(f"{writer.counts.get('papers', 0)} papers, {writer.counts.get('paper_authors', 0)} authorships")
+
+    # Reviews; a fifth of the reviewers take half of the load
+    busy_reviewers = reviewers[:max(1, len(reviewers) // 5)]
+    recommendations = list(ReviewRecommendation)
+    seen = set()
+    target = min(sizes['reviews'], len(submitted_dates) * len(reviewers))
+    while len(seen) < target:
+        paper_id = rng.randrange(len(submitted_dates)) + 1
+        reviewer = rng.choice(busy_reviewers) if rng.random() < 0.5 else rng.choice(reviewers)
+        if (paper_id, reviewer) in seen:
+            continue
+        seen.add((paper_id, reviewer))
+        assigned = submitted_dates[paper_id - 1] + timedelta(days=rng.randrange(1, 20))
+        row = {
+            'id': len(seen),
+            'paper_id': paper_id,
+            'reviewer_id': reviewer,
+            'assigned_date': assigned,
+            'deadline': assigned + timedelta(days=21),
+            'is_completed': rng.random() < COMPLETED_SHARE,
+        }
+        if row['is_completed']:
+            row.update(
+                score=rng.randint(1, 10),
+                technical_quality=rng.randint(1, 10),
+                novelty=rng.randint(1, 10),
+                clarity=rng.randint(1, 10),
+                significance=rng.randint(1, 10),
+                recommendation=rng.choice(recommendations),
+                comments='Synthetic review comments. ' * rng.randint(1, 8),
+                review_date=assigned + timedelta(days=rng.randrange(1, 21)),
+            )
+        writer.add(Review, row)
+    writer.flush()
+    progress(f"{writer.counts.get('reviews', 0)} reviews")
+
+    _reset_sequences(['users', 'affiliations', 'papers', 'reviews', 'conferences', 'categories'])
+    db.session.commit()
+
+    # Bulk inserts bypass the session hooks, so rebuild what they maintain
+    from app.stats import rebuild_stats
+    from app.access import rebuild_access
+    from app.search import rebuild_search_index
+    from app.reference_data import bump_versions, reference_cache, CATEGORIES, CONFERENCES, REVIEWERS
+    from app.principal import principal_cache
+    from app.page_cache import page_cache, PAGES
+
+    Paper.refresh_review_aggregates()
+    bump_versions(db.session, {CATEGORIES, CONFERENCES, REVIEWERS, PAGES})
+    db.session.commit()
+    rebuild_stats()
+    rebuild_access()
+    rebuild_search_index()
+    reference_cache.invalidate()
+    principal_cache.invalidate()
+    page_cache.invalidate()
+    progress('Rebuilt review aggregates, statistics, access list and the search index')
+
+    return writer.counts
+
+def _busiest(column, *criteria):
+    """Value of `column` with the most rows matching the criteria"""
+    return db.session.query(column).filter(*criteria).group_by(column).order_by(
+        func.count().desc(), column
+    ).limit(1).scalar()
+
+def benchmark_targets():
+    """(name, role, user id, url) for each benchmarked route
+
+    Dashboards are measured for the busiest author and reviewer, and paper
+    pages for the most reviewed paper, so the numbers track the worst case.
+    """
+    admin_id = db.session.query(User.id).filter(User.role == UserRole.ADMIN).order_by(User.id).limit(1).scalar()
+    author_id = _busiest(paper_authors.c.user_id)
+    reviewer_id = _busiest(Review.reviewer_id)
+    paper_id = _busiest(Review.paper_id)
+    if None in (admin_id, author_id, reviewer_id, paper_id):
+        raise ValueError('The benchmark database is empty; run `flask generate-data` first')
+    return [
+        ('main.browse_papers', admin_id, '/papers'),
+        ('main.browse_papers (search)', admin_id, '/papers?query=graph'),
+        ('main.author_dashboard', author_id, '/author/dashboard'),
+        ('main.reviewer_dashboard', reviewer_id, '/reviewer/dashboard'),
+        ('admin.dashboard', admin_id, '/admin/dashboard'),
+        ('admin.assign_reviewers', admin_id, '/admin/assign-reviewers'),
+        ('main.paper_detail', admin_id, f'/paper/{paper_id}'),
+        ('main.paper_stats', admin_id, f'/api/paper-stats/{paper_id}'),
+    ]
+
+def _percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+def _commit_id():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(app, iterations=20, warmup=2, only=None):
+    """Time each benchmark route through the test client
+
+    Each route is requested `warmup` times unmeasured, then `iterations`
+    times. Query counts come from an engine listener, so they include the
+    session lookup and everything the template lazily loads.
+    """
+    with app.app_context():
+        targets = benchmark_targets()
+        emails = dict(db.session.query(User.id, User.email).filter(
+            User.id.in_({user_id for _, user_id, _ in targets})
+        ))
+        dataset = {
+            'users': db.session.query(func.count(User.id)).scalar(),
+            'papers': db.session.query(func.count(Paper.id)).scalar(),
+            'reviews': db.session.query(func.count(Review.id)).scalar(),
+        }
+        engine = db.engine
+
+    clients = {}
+    for user_id, email in emails.items():
+        client = app.test_client()
+        client.post('/auth/login', data={'email': email, 'password': BENCHMARK_PASSWORD})
+        clients[user_id] = client
+
+    queries = [0]
+    def count(*args):
+        queries[0] += 1
+    event.listen(engine, 'after_cursor_execute', count)
+
+    # Views whose template is not in the tree yet render the base layout instead,
+    # so their queries are still measured rather than ending in a 500
+    placeholders = set()
+    def placeholder(template):
+        placeholders.add(template)
+        return PLACEHOLDER_TEMPLATE
+    rendered = []
+    def record_template(sender, template, context, **extra):
+        rendered.append(template.name)
+    loader = app.jinja_env.loader
+    app.jinja_env.loader = ChoiceLoader([loader, FunctionLoader(placeholder)])
+
+    routes = {}
+    # Failing routes show up in the status column; keep tracebacks out of the report
+    logger_disabled, app.logger.disabled = app.logger.disabled, True
+    try:
+        for name, user_id, url in targets:
+            if only and not any(part in name for part in only):
+                continue
+            client = clients[user_id]
+            rendered.clear()
+            with template_rendered.connected_to(record_template, app):
+                for _ in range(max(warmup, 1)):
+                    response = client.get(url)
+            stand_ins = sorted(placeholders.intersection(rendered))
+            # Error pages are not timed: their latency says nothing about the route
+            if response.status_code >= 400:
+                routes[name] = {'url': url, 'status': {str(response.status_code): 1}, 'failed': True}
+                continue
+            if stand_ins:
+                routes[name] = {'placeholder_templates': stand_ins}
+
+            timings = []
+            query_counts = []
+            statuses = {}
+            for _ in range(iterations):
+                queries[0] = 0
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+                query_counts.append(queries[0])
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+            routes[name] = {
+                **routes.get(name, {}),
+                'url': url,
+                'status': statuses,
+                'p50_ms': round(_percentile(timings, 50), 2),
+                'p90_ms': round(_percentile(timings, 90), 2),
+                'p99_ms': round(_percentile(timings, 99), 2),
+                'mean_ms': round(sum(timings) / len(timings), 2),
+                'queries': _percentile(query_counts, 50),
+            }
+    finally:
+        event.remove(engine, 'after_cursor_execute', count)
+        app.logger.disabled = logger_disabled
+        app.jinja_env.loader = loader
+
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'commit': _commit_id(),
+        'database': engine.dialect.name,
+        'dataset': dataset,
+        'iterations': iterations,
+        'routes': routes,
+    }
+
+def run_login_benchmark(app, logins=200, concurrency=8, workers=None):
+    """Sign-ins per second through the login view, hashing inline and in the pool
+
+    `concurrency` threads each post logins for distinct generated users with
+    a fresh client. The throughput is also given per CPU core, so runs on
+    machines of different sizes compare.
+    """
+    with app.app_context():
+        emails = [email for email, in db.session.query(User.email).filter(
+            User.role != UserRole.ADMIN
+        ).order_by(User.id).limit(logins)]
+    if not emails:
+        raise ValueError('The benchmark database is empty; run `flask generate-data` first')
+
+    cores = os.cpu_count() or 1
+    pool_workers = workers or app.config.get('PASSWORD_HASH_WORKERS') or cores
+    configured = app.config.get('PASSWORD_HASH_WORKERS')
+
+    def login(email):
+        started = time.perf_counter()
+        response = app.test_client().post('/auth/login', data={'email': email, 'password': BENCHMARK_PASSWORD})
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    modes = {}
+    logger_disabled, app.logger.disabled = app.logger.disabled, True
+    try:
+        for mode, hash_workers in (('inline', 0), ('pool', pool_workers)):
+            app.config['PASSWORD_HASH_WORKERS'] = hash_workers
+            # Starts the pool's processes and fills per-process caches
+            login(emails[0])
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(login, emails))
+            elapsed = time.perf_counter() - started
+
+            rate = len(results) / elapsed
+            modes[mode] = {
+                'workers': hash_workers,
+                'logins': len(results),
+                'succeeded': sum(1 for _, status in results if status == 302),
+                'logins_per_sec': round(rate, 1),
+                'logins_per_sec_per_core': round(rate / cores, 1),
+                'p50_ms': round(_percentile([ms for ms, _ in results], 50), 2),
+                'p90_ms': round(_percentile([ms for ms, _ in results], 90), 2),
+            }
+    finally:
+        app.config['PASSWORD_HASH_WORKERS'] = configured
+        app.logger.disabled = logger_disabled
+        password_hasher.shutdown()
+
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'commit': _commit_id(),
+        'cores': cores,
+        'concurrency': concurrency,
+        'hash_method': app.config.get('PASSWORD_HASH_METHOD'),
+        'modes': modes,
+    }
+
+def _rate_limit_worker(uri, strategy, hits, shared_key, shared_limit):
+    """Runs in a child process: hit latencies on private keys, then hits accepted on a shared key"""
+    from limits import parse, strategies
+    from limits.storage import storage_from_string
+    from app import rate_limit  # noqa: F401
+
+    limiter = strategies.STRATEGIES[strategy](storage_from_string(uri))
+    roomy = parse('1000000/minute')
+    timings = []
+    for i in range(hits):
+        started = time.perf_counter()
+        limiter.hit(roomy, f'bench/{os.getpid()}/{i % 100}')
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    tight = parse(f'{shared_limit}/minute')
+    accepted = sum(1 for _ in range(shared_limit * 2) if limiter.hit(tight, shared_key))
+    return timings, accepted
+
+def run_rate_limit_benchmark(uris, strategy='sliding-window-counter', hits=2000, processes=4, shared_limit=100):
+    """Per-hit overhead and cross-process accuracy of rate limit storages
+
+    Every storage is hit from `processes` worker processes at once. Each
+    worker times `hits` hits on its own keys, then tries to take twice
+    `shared_limit` hits on one key shared by all workers. A storage that
+    enforces the limit across processes accepts exactly `shared_limit` hits
+    in total.
+    """
+    import multiprocessing
+
+    context = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+    storages = {}
+    for uri in uris:
+        shared_key = f'bench/shared/{time.time_ns()}'
+        started = time.perf_counter()
+        with context.Pool(processes) as pool:
+            results = pool.starmap(_rate_limit_worker, [(uri, strategy, hits, shared_key, shared_limit)] * processes)
+        elapsed = time.perf_counter() - started
+        timings = [us for worker_timings, _ in results for us in worker_timings]
+        storages[uri] = {
+            'p50_us': round(_percentile(timings, 50), 1),
+            'p99_us': round(_percentile(timings, 99), 1),
+            'mean_us': round(sum(timings) / len(timings), 1),
+            'hits_per_sec': round(len(timings) / elapsed),
+            'accepted': sum(accepted for _, accepted in results),
+            'limit': shared_limit,
+        }
+    return {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'commit': _commit_id(),
+        'strategy': strategy,
+        'processes': processes,
+        'hits': hits,
+        'storages': storages,
+    }
+
+def compare_results(baseline, current, tolerance=0.2):
+    """Regressions of `current` against `baseline`, as readable lines
+
+    A route regresses when its p50 or p90 latency grows by more than
+    `tolerance` (a fraction), when it runs more queries than before or when
+    it fails where the baseline succeeded. Failed routes carry no timings,
+    and latency is not compared when one side rendered a placeholder
+    template the other did not.
+    """
+    regressions = []
+    for name, now in current['routes'].items():
+        before = baseline.get('routes', {}).get(name)
+        if now.get('failed'):
+            if before is not None and not before.get('failed'):
+                regressions.append(f"{name}: now fails with {', '.join(now['status'])}")
+            continue
+        if before is None or before.get('failed'):
+            continue
+        same_templates = before.get('placeholder_templates') == now.get('placeholder_templates')
+        for key in ('p50_ms', 'p90_ms'):
+            if same_templates and before[key] and now[key] > before[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {before[key]} -> {now[key]} (+{(now[key] / before[key] - 1) * 100:.0f}%)")
+        if now['queries'] > before['queries']:
+            regressions.append(f"{name}: queries {before['queries']} -> {now['queries']}")
+    return regressions
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
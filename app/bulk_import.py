@@ -0,0 +1,452 @@
+"""
+Bulk import of users, papers and review assignments
+
+Rows are streamed from CSV or JSON Lines files and handled in batches of
+IMPORT_BATCH_SIZE: each batch is validated with a few set-based lookups
+(existing emails, papers, reviewers, categories), inserted with a Core
+executemany, or COPY on PostgreSQL with psycopg2, and committed on its own.
+Memory use depends on the batch size, not the file size.
+
+Invalid rows are reported with their line number and skipped. Bulk
+statements bypass the session hooks, so each batch also feeds the stats
+rollup, review aggregates and reference data versions directly.
+"""
+import csv
+import enum
+import functools
+import io
+import itertools
+import json
+import re
+import time
+from datetime import datetime
+from email_validator import validate_email, EmailNotValidError
+from flask import current_app
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.exc import DBAPIError
+from app import db
+from app.models import (User, UserRole, Paper, PaperStatus, Review, Affiliation, StatsCounter,
+                        PaperAccess, paper_authors, paper_categories)
+from app.stats import apply_deltas, deltas_for_rows, PAPERS_BY_STATUS
+from app.access import AUTHOR, REVIEWER
+from app.passwords import hash_passwords
+
+IMPORT_KINDS = ('users', 'papers', 'reviews')
+
+# Rejected rows kept in the report; the rest are only counted (and written to the errors file)
+MAX_REPORTED_ERRORS = 20
+
+# Stored when a row has neither a password nor a hash; it never matches, so
+# imported users set their password through the reset flow
+UNUSABLE_PASSWORD = '!'
+
+class RowError(ValueError):
+    """A row that cannot be imported"""
+
+class ImportReport:
+    """Counts, throughput and rejected rows for one import"""
+
+    def __init__(self, kind, errors_file=None):
+        self.kind = kind
+        self.read = 0
+        self.inserted = 0
+        self.links = 0
+        self.rejected = 0
+        self.errors = []
+        self.errors_file = errors_file
+        self.started = time.perf_counter()
+
+    def reject(self, line, message, count=1):
+        self.rejected += count
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+        if self.errors_file is not None:
+            self.errors_file.write(f'{line}\t{message}\n')
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+def read_rows(path, file_format, report):
+    """Yield (line number, row dict) from a CSV or JSONL file, one row at a time"""
+    with open(path, newline='' if file_format == 'csv' else None, encoding='utf-8') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                report.read += 1
+                report.reject(line_number, f'invalid JSON: {e}')
+                continue
+            if not isinstance(row, dict):
+                report.read += 1
+                report.reject(line_number, 'expected a JSON object')
+                continue
+            yield line_number, row
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+# Row parsing helpers
+
+def _text(row, name, required=False, max_length=None):
+    value = row.get(name)
+    value = str(value).strip() if value is not None else ''
+    if not value:
+        if required:
+            raise RowError(f'{name} is required')
+        return None
+    if max_length and len(value) > max_length:
+        raise RowError(f'{name} is longer than {max_length} characters')
+    return value
+
+# Plain ASCII local parts, which only need the (cached) domain check
+SIMPLE_LOCAL_PART = re.compile(r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*\Z")
+
+@functools.lru_cache(maxsize=4096)
+def _email_domain(domain):
+    """Normalized domain; imports repeat a handful of domains many times"""
+    return validate_email(f'user@{domain}', check_deliverability=False).domain
+
+def _email(row, name, required=True):
+    value = _text(row, name, required=required, max_length=120)
+    if value is None:
+        return None
+    try:
+        local, _, domain = value.rpartition('@')
+        if len(local) <= 64 and SIMPLE_LOCAL_PART.match(local):
+            return f'{local}@{_email_domain(domain)}'
+        return validate_email(value, check_deliverability=False).normalized
+    except EmailNotValidError as e:
+        raise RowError(f'{name}: {e}')
+
+def _email_list(row, name):
+    value = row.get(name) or []
+    if isinstance(value, str):
+        value = [part for part in value.replace(',', ';').split(';') if part.strip()]
+    return [_email({name: part}, name) for part in value]
+
+def _name_list(row, name):
+    value = row.get(name) or []
+    if isinstance(value, str):
+        value = value.split(';')
+    return [part.strip() for part in value if part and part.strip()]
+
+def _enum(row, name, enum_class, default):
+    value = _text(row, name)
+    if value is None:
+        return default
+    try:
+        return enum_class[value.upper()]
+    except KeyError:
+        raise RowError(f"{name} must be one of {', '.join(member.value for member in enum_class)}")
+
+def _datetime(row, name):
+    value = _text(row, name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise RowError(f'{name} must be an ISO date or datetime')
+
+def _bool(row, name, default):
+    value = row.get(name)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ['true', 'on', '1', 'yes']
+
+def _existing_emails(emails):
+    """Map of email to user id and role for the given emails"""
+    if not emails:
+        return {}
+    return {email: (user_id, role) for user_id, email, role in db.session.query(
+        User.id, User.email, User.role
+    ).filter(User.email.in_(emails))}
+
+# Writing
+
+def _use_copy():
+    return (current_app.config.get('IMPORT_USE_COPY', True)
+            and db.engine.dialect.name == 'postgresql'
+            and db.engine.dialect.driver == 'psycopg2')
+
+def _copy_value(value):
+    """Encode a value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, enum.Enum):
+        value = value.value
+    elif isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, datetime):
+        value = value.isoformat(sep=' ')
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def _copy_rows(table, rows):
+    """Stream rows into a table with COPY, inside the session's transaction"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(row[column]) for column in columns))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+def _reserve_ids(table, count):
+    """Draw ids from a PostgreSQL sequence so COPY rows can be linked before insert"""
+    return list(db.session.execute(
+        text(f"SELECT nextval(pg_get_serial_sequence('{table.name}', 'id')) FROM generate_series(1, :count)"),
+        {'count': count}
+    ).scalars())
+
+def insert_rows(table, rows, returning_ids=False):
+    """Insert rows in one round trip, returning their ids in order when asked"""
+    if not rows:
+        return []
+    if _use_copy():
+        ids = []
+        if returning_ids:
+            ids = _reserve_ids(table, len(rows))
+            rows = [dict(row, id=row_id) for row, row_id in zip(rows, ids)]
+        _copy_rows(table, rows)
+        return ids
+    if returning_ids:
+        result = db.session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows)
+        return [row_id for (row_id,) in result]
+    db.session.execute(insert(table), rows)
+    return []
+
+# Importers: each takes a batch of (line, row) pairs and returns (rows inserted, links inserted)
+
+def _import_users(batch, report):
+    parsed = []
+    for line, row in batch:
+        try:
+            user = {
+                'name': _text(row, 'name', required=True, max_length=100),
+                'email': _email(row, 'email'),
+                'role': _enum(row, 'role', UserRole, UserRole.AUTHOR),
+                'is_active': _bool(row, 'is_active', True),
+                'created_at': _datetime(row, 'created_at') or datetime.utcnow(),
+            }
+            password_hash = _text(row, 'password_hash', max_length=255)
+            password = _text(row, 'password')
+            # Plain passwords are hashed once the batch is known to be inserted
+            user['password_hash'] = password_hash or (None if password else UNUSABLE_PASSWORD)
+            if user['password_hash'] is None:
+                user['password'] = password
+            affiliation = {
+                'institution_name': _text(row, 'institution', max_length=200),
+                'department': _text(row, 'department', max_length=200),
+                'position': _text(row, 'position', max_length=100),
+                'is_primary': True,
+            }
+        except RowError as e:
+            report.reject(line, str(e))
+            continue
+        parsed.append((line, user, affiliation))
+
+    existing = _existing_emails({user['email'] for _, user, _ in parsed})
+    users, affiliations, seen = [], [], set()
+    for line, user, affiliation in parsed:
+        if user['email'] in existing or user['email'] in seen:
+            report.reject(line, f"{user['email']} is already registered")
+            continue
+        seen.add(user['email'])
+        users.append(user)
+        affiliations.append(affiliation)
+
+    # Hashed under the configured policy, spread over the password hashing pool
+    plain = [user for user in users if 'password' in user]
+    for user, password_hash in zip(plain, hash_passwords([user.pop('password') for user in plain])):
+        user['password_hash'] = password_hash
+
+    ids = insert_rows(User.__table__, users, returning_ids=True)
+    links = [dict(affiliation, user_id=user_id)
+             for affiliation, user_id in zip(affiliations, ids) if affiliation['institution_name']]
+    insert_rows(Affiliation.__table__, links)
+
+    apply_deltas(db.session, deltas_for_rows(User, users))
+    if any(user['role'] == UserRole.REVIEWER for user in users):
+        from app.reference_data import bump_versions, REVIEWERS
+        bump_versions(db.session, {REVIEWERS})
+    return len(users), len(links)
+
+def _import_papers(batch, report):
+    from app.reference_data import category_choices
+    category_ids = {name.lower(): category_id for category_id, name in category_choices()}
+
+    parsed = []
+    for line, row in batch:
+        try:
+            submitter = _email(row, 'submitter_email')
+            paper = {
+                'title': _text(row, 'title', required=True, max_length=500),
+                'abstract': _text(row, 'abstract', required=True),
+                'conference_name': _text(row, 'conference_name', required=True, max_length=200),
+                'keywords': _text(row, 'keywords', max_length=500),
+                'file_path': _text(row, 'file_path', max_length=500),
+                'status': _enum(row, 'status', PaperStatus, PaperStatus.SUBMITTED),
+                'submission_date': _datetime(row, 'submission_date') or datetime.utcnow(),
+            }
+            paper['last_updated'] = paper['submission_date']
+            authors = [submitter] + [email for email in _email_list(row, 'author_emails') if email != submitter]
+            categories = []
+            for name in _name_list(row, 'categories'):
+                if name.lower() not in category_ids:
+                    raise RowError(f'unknown category {name!r}')
+                categories.append(category_ids[name.lower()])
+        except RowError as e:
+            report.reject(line, str(e))
+            continue
+        parsed.append((line, paper, authors, categories))
+
+    users = _existing_emails({email for _, _, authors, _ in parsed for email in authors})
+    papers, links = [], []
+    for line, paper, authors, categories in parsed:
+        missing = [email for email in authors if email not in users]
+        if missing:
+            report.reject(line, f"unknown user {', '.join(missing)}")
+            continue
+        paper['submitted_by'] = users[authors[0]][0]
+        papers.append(paper)
+        links.append(([users[email][0] for email in dict.fromkeys(authors)], sorted(set(categories))))
+
+    ids = insert_rows(Paper.__table__, papers, returning_ids=True)
+    author_rows = [{'paper_id': paper_id, 'user_id': user_id}
+                   for paper_id, (user_ids, _) in zip(ids, links) for user_id in user_ids]
+    category_rows = [{'paper_id': paper_id, 'category_id': category_id}
+                     for paper_id, (_, category_ids) in zip(ids, links) for category_id in category_ids]
+    insert_rows(paper_authors, author_rows)
+    insert_rows(paper_categories, category_rows)
+    insert_rows(PaperAccess.__table__, [dict(row, kind=AUTHOR) for row in author_rows])
+
+    apply_deltas(db.session, deltas_for_rows(Paper, papers))
+    if papers:
+        from app.page_cache import pages_changed
+        pages_changed(db.session)
+    return len(papers), len(author_rows) + len(category_rows)
+
+def _import_reviews(batch, report):
+    parsed = []
+    for line, row in batch:
+        try:
+            paper_id = _text(row, 'paper_id', required=True)
+            if not paper_id.isdigit():
+                raise RowError('paper_id must be a number')
+            parsed.append((line, int(paper_id), _email(row, 'reviewer_email'), _datetime(row, 'deadline')))
+        except RowError as e:
+            report.reject(line, str(e))
+
+    paper_ids = {paper_id for _, paper_id, _, _ in parsed}
+    papers = dict(db.session.query(Paper.id, Paper.status).filter(Paper.id.in_(paper_ids))) if paper_ids else {}
+    reviewers = _existing_emails({email for _, _, email, _ in parsed})
+    reviewer_ids = {user_id for user_id, role in reviewers.values() if role == UserRole.REVIEWER}
+    assigned = {tuple(pair) for pair in db.session.execute(
+        select(Review.paper_id, Review.reviewer_id).where(
+            Review.paper_id.in_(paper_ids), Review.reviewer_id.in_(reviewer_ids)
+        )
+    )} if paper_ids and reviewer_ids else set()
+
+    reviews = []
+    now = datetime.utcnow()
+    for line, paper_id, email, deadline in parsed:
+        if paper_id not in papers:
+            report.reject(line, f'paper {paper_id} does not exist')
+            continue
+        if email not in reviewers or reviewers[email][0] not in reviewer_ids:
+            report.reject(line, f'{email} is not a reviewer')
+            continue
+        pair = (paper_id, reviewers[email][0])
+        if pair in assigned:
+            report.reject(line, f'{email} is already assigned to paper {paper_id}')
+            continue
+        assigned.add(pair)
+        reviews.append({'paper_id': paper_id, 'reviewer_id': pair[1], 'assigned_date': now,
+                        'deadline': deadline, 'is_completed': False})
+
+    insert_rows(Review.__table__, reviews)
+    insert_rows(PaperAccess.__table__, [
+        {'user_id': review['reviewer_id'], 'paper_id': review['paper_id'], 'kind': REVIEWER}
+        for review in reviews
+    ])
+
+    # Papers receiving their first reviewer move to UNDER_REVIEW, as with planned assignments
+    touched = sorted({review['paper_id'] for review in reviews})
+    started = [paper_id for paper_id in touched if papers[paper_id] == PaperStatus.SUBMITTED]
+    if started:
+        db.session.execute(
+            update(Paper).where(Paper.id.in_(started)).values(status=PaperStatus.UNDER_REVIEW),
+            execution_options={'synchronize_session': False}
+        )
+    Paper.refresh_review_aggregates(touched)
+
+    deltas = deltas_for_rows(Review, reviews)
+    if started:
+        deltas[(StatsCounter, (PAPERS_BY_STATUS, PaperStatus.SUBMITTED.value))] = -len(started)
+        deltas[(StatsCounter, (PAPERS_BY_STATUS, PaperStatus.UNDER_REVIEW.value))] = len(started)
+    apply_deltas(db.session, deltas)
+    return len(reviews), 0
+
+IMPORTERS = {
+    'users': _import_users,
+    'papers': _import_papers,
+    'reviews': _import_reviews,
+}
+
+def import_file(kind, path, file_format=None, batch_size=None, dry_run=False, errors_file=None, progress=None):
+    """Import a CSV or JSONL file of users, papers or review assignments
+
+    Each batch is committed on its own (rolled back with dry_run), so a
+    failure part-way leaves earlier batches in place. A batch the database
+    rejects is skipped and reported once, as the range of its line numbers.
+    """
+    importer = IMPORTERS[kind]
+    file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    batch_size = batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 5000)
+    report = ImportReport(kind, errors_file)
+
+    for batch in _batches(read_rows(path, file_format, report), batch_size):
+        report.read += len(batch)
+        rejected_before = report.rejected
+        try:
+            inserted, links = importer(batch, report)
+            if dry_run:
+                db.session.rollback()
+            else:
+                db.session.commit()
+        except DBAPIError as e:
+            db.session.rollback()
+            message = str(e.orig).strip().splitlines()[0] if e.orig else str(e)
+            report.reject(f'{batch[0][0]}-{batch[-1][0]}', f'batch rejected by the database: {message}',
+                          count=len(batch) - (report.rejected - rejected_before))
+            inserted = links = 0
+        report.inserted += inserted
+        report.links += links
+        if progress:
+            progress(report)
+
+    return report
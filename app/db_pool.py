@@ -0,0 +1,168 @@
+"""
+Database connection strategies
+
+DB_CONNECTION_STRATEGY selects how each process talks to the database:
+
+- ``queue``: the configured SQLALCHEMY_ENGINE_OPTIONS as they are (a
+  QueuePool per process).
+- ``pooler``: no client-side pool. Every checkout opens a connection to a
+  transaction-mode pooler such as PgBouncer or the Supabase pooler
+  (DATABASE_POOLER_URL), and server-side prepared statements are disabled
+  because consecutive transactions may land on different backends. Suited
+  to serverless instances that come and go in bursts.
+- ``warm``: a LIFO QueuePool sized by DB_POOL_SIZE/DB_MAX_OVERFLOW, opened
+  at startup and recycled on a timer instead of pinged on every checkout.
+  Suited to long-lived servers.
+
+Whatever the strategy, checkouts are timed and counted in `pool_metrics`.
+"""
+import logging
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+STRATEGIES = ('queue', 'pooler', 'warm')
+
+# Engine options that only make sense for a client-side pool
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping', 'pool_use_lifo')
+
+class PoolMetrics:
+    """Per-process connection pool counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Callables given each checkout's wait in seconds, or None on a timeout
+        self.observers = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.overflow_peak = 0
+            self.in_use_peak = 0
+
+    def record_checkout(self, waited, pool):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if isinstance(pool, QueuePool):
+                self.overflow_peak = max(self.overflow_peak, pool.overflow())
+                self.in_use_peak = max(self.in_use_peak, pool.checkedout())
+        for observer in self.observers:
+            observer(waited)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+        for observer in self.observers:
+            observer(None)
+
+    def snapshot(self, pool=None):
+        """Counters plus the live state of a pool, as a plain dict"""
+        with self._lock:
+            data = {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms_total': round(self.wait_total * 1000, 3),
+                'wait_ms_avg': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_ms_max': round(self.wait_max * 1000, 3),
+                'overflow_peak': self.overflow_peak,
+                'in_use_peak': self.in_use_peak,
+            }
+        if pool is not None:
+            data['pool'] = type(pool).__name__
+            if isinstance(pool, QueuePool):
+                data.update(size=pool.size(), in_use=pool.checkedout(),
+                            idle=pool.checkedin(), overflow=max(pool.overflow(), 0))
+        return data
+
+pool_metrics = PoolMetrics()
+
+class _TimedCheckout:
+    """Pool mixin timing how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - started, self)
+        return connection
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+# SQLAlchemy names pool loggers after the pool class's module, which would put
+# their debug output under the Flask app logger
+logging.getLogger(__name__).setLevel(logging.WARNING)
+
+def _pooler_connect_args(url, connect_args):
+    """Connection arguments that keep prepared statements off the server"""
+    connect_args = dict(connect_args)
+    driver = url.get_driver_name()
+    if driver == 'psycopg':
+        # psycopg 3 prepares statements after a few executions by default
+        connect_args['prepare_threshold'] = None
+    # psycopg2 never uses server-side prepared statements
+    return connect_args
+
+def configure_engine(app):
+    """Rewrite the engine settings for the configured connection strategy"""
+    strategy = app.config.get('DB_CONNECTION_STRATEGY', 'queue')
+    if strategy not in STRATEGIES:
+        raise ValueError(f"DB_CONNECTION_STRATEGY must be one of {', '.join(STRATEGIES)}, not {strategy!r}")
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+
+    if strategy == 'pooler':
+        pooler_url = app.config.get('DATABASE_POOLER_URL')
+        if pooler_url:
+            app.config['SQLALCHEMY_DATABASE_URI'] = pooler_url
+            url = make_url(pooler_url)
+        for name in POOL_OPTIONS:
+            options.pop(name, None)
+        options['poolclass'] = TimedNullPool
+        if url.get_backend_name() == 'postgresql':
+            options['connect_args'] = _pooler_connect_args(url, options.get('connect_args', {}))
+    elif strategy == 'warm':
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=app.config.get('DB_POOL_SIZE', 5),
+            max_overflow=app.config.get('DB_MAX_OVERFLOW', 10),
+            pool_timeout=app.config.get('DB_POOL_TIMEOUT', 10),
+            pool_recycle=app.config.get('DB_POOL_RECYCLE', 1800),
+            pool_pre_ping=False,
+            pool_use_lifo=True,
+        )
+    elif 'poolclass' not in options and not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        options['poolclass'] = TimedQueuePool
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return strategy
+
+def warm_pool(app, db):
+    """Open the pool's connections up front so the first requests do not pay for them"""
+    size = app.config.get('DB_POOL_SIZE', 5)
+    with app.app_context():
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(db.engine.connect())
+        except exc.SQLAlchemyError as e:
+            app.logger.warning(f"Could not warm the connection pool: {e}")
+        finally:
+            for connection in connections:
+                connection.close()
+    return len(connections)
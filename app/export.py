@@ -0,0 +1,134 @@
+"""
+Streaming export of paper metadata for proceedings
+
+Papers are read with a server-side cursor (yield_per) in chunks of
+EXPORT_CHUNK_SIZE. Authors and categories are eager loaded per chunk and
+affiliations fetched with one query per chunk, then each paper is written
+out as a CSV or JSONL line, optionally gzip-compressed, by a generator.
+Memory stays at about one chunk whatever the conference size.
+"""
+import csv
+import io
+import json
+import zlib
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers, selectinload
+from app import db
+from app.models import Paper, PaperStatus, Affiliation
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+CSV_COLUMNS = [
+    'id', 'title', 'abstract', 'keywords', 'conference_name', 'status', 'submission_date',
+    'authors', 'author_emails', 'affiliations', 'categories', 'completed_reviews',
+    'avg_score', 'avg_technical_quality', 'avg_novelty', 'avg_clarity', 'avg_significance',
+]
+
+# Flush compressed output at least this often so the response keeps moving
+GZIP_FLUSH_BYTES = 64 * 1024
+
+def _affiliations(user_ids):
+    """Institution per user, preferring the primary affiliation"""
+    institutions = {}
+    if not user_ids:
+        return institutions
+    rows = db.session.query(Affiliation.user_id, Affiliation.institution_name).filter(
+        Affiliation.user_id.in_(user_ids)
+    ).order_by(Affiliation.user_id, Affiliation.is_primary.desc(), Affiliation.id)
+    for user_id, institution in rows:
+        institutions.setdefault(user_id, institution)
+    return institutions
+
+def _paper_row(paper, institutions):
+    # Submitter first, co-authors in a stable order after them
+    authors = sorted(paper.authors, key=lambda user: (user.id != paper.submitted_by, user.id))
+    return {
+        'id': paper.id,
+        'title': paper.title,
+        'abstract': paper.abstract,
+        'keywords': paper.keywords,
+        'conference_name': paper.conference_name,
+        'status': paper.status.value,
+        'submission_date': paper.submission_date.isoformat() if paper.submission_date else None,
+        'authors': [
+            {'name': user.name, 'email': user.email, 'affiliation': institutions.get(user.id)}
+            for user in authors
+        ],
+        'categories': sorted(category.name for category in paper.categories),
+        'completed_reviews': paper.completed_review_count,
+        'avg_score': paper.avg_score,
+        'avg_technical_quality': paper.avg_technical_quality,
+        'avg_novelty': paper.avg_novelty,
+        'avg_clarity': paper.avg_clarity,
+        'avg_significance': paper.avg_significance,
+    }
+
+def export_papers(conference_name=None, statuses=(PaperStatus.ACCEPTED,), chunk_size=None):
+    """Yield one dict per paper, ordered by id, reading a chunk at a time"""
+    chunk_size = chunk_size or current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    # Paper.authors is a backref from User, only present once mappers are configured
+    configure_mappers()
+    statement = select(Paper).options(
+        selectinload(Paper.authors),
+        selectinload(Paper.categories)
+    ).order_by(Paper.id).execution_options(yield_per=chunk_size)
+    if statuses:
+        statement = statement.where(Paper.status.in_(statuses))
+    if conference_name:
+        statement = statement.where(Paper.conference_name == conference_name)
+
+    for chunk in db.session.execute(statement).scalars().partitions():
+        institutions = _affiliations({user.id for paper in chunk for user in paper.authors})
+        for paper in chunk:
+            yield _paper_row(paper, institutions)
+
+def csv_lines(rows):
+    """Header plus one CSV line per row, with multi-valued fields joined by '; '"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    yield line(CSV_COLUMNS)
+    for row in rows:
+        authors = row['authors']
+        flat = dict(
+            row,
+            authors='; '.join(author['name'] for author in authors),
+            author_emails='; '.join(author['email'] for author in authors),
+            affiliations='; '.join(author['affiliation'] or '' for author in authors),
+            categories='; '.join(row['categories'])
+        )
+        yield line([flat[column] for column in CSV_COLUMNS])
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks, yielding compressed bytes as they fill up"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        pending += len(data)
+        output = compressor.compress(data)
+        if pending >= GZIP_FLUSH_BYTES:
+            output += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if output:
+            yield output
+    yield compressor.flush()
+
+def export_stream(file_format='csv', compress=False, **filters):
+    """Encoded export chunks, ready for a streaming response or a file"""
+    lines = (csv_lines if file_format == 'csv' else jsonl_lines)(export_papers(**filters))
+    if compress:
+        return gzip_chunks(lines)
+    return (line.encode('utf-8') for line in lines)
@@ -1,10 +1,11 @@
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileField, FileRequired, FileAllowed
-from wtforms import StringField, TextAreaField, SelectField, PasswordField, SubmitField, IntegerField, SelectMultipleField
+from wtforms import StringField, TextAreaField, SelectField, PasswordField, SubmitField, IntegerField, SelectMultipleField, HiddenField
 from wtforms.fields import DateTimeLocalField, EmailField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, NumberRange, ValidationError
+from wtforms.validators import DataRequired, Email, Length, EqualTo, NumberRange, ValidationError, Optional
 from wtforms.widgets import CheckboxInput, ListWidget
-from app.models import User, Category, Conference, UserRole, ReviewRecommendation, PaperStatus
+from app.models import User, UserRole, ReviewRecommendation, PaperStatus
+from app.reference_data import category_choices, conference_choices, reviewer_choices
 
 class MultiCheckboxField(SelectMultipleField):
     """Custom field for multiple checkboxes"""
@@ -63,7 +64,7 @@ class PaperSubmissionForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(PaperSubmissionForm, self).__init__(*args, **kwargs)
-        self.categories.choices = [(c.id, c.name) for c in Category.query.all()]
+        self.categories.choices = category_choices()
 
 class ReviewForm(FlaskForm):
     """Paper review form"""
@@ -119,8 +120,8 @@ class SearchForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(SearchForm, self).__init__(*args, **kwargs)
-        self.conference_id.choices = [('', 'All Conferences')] + [(c.id, f"{c.name} {c.year}") for c in Conference.query.all()]
-        self.category_id.choices = [('', 'All Categories')] + [(c.id, c.name) for c in Category.query.all()]
+        self.conference_id.choices = [('', 'All Conferences')] + conference_choices()
+        self.category_id.choices = [('', 'All Categories')] + category_choices()
 
 class ConferenceForm(FlaskForm):
     """Conference management form"""
@@ -175,8 +176,13 @@ class ReviewerAssignmentForm(FlaskForm):
     
     def __init__(self, *args, **kwargs):
         super(ReviewerAssignmentForm, self).__init__(*args, **kwargs)
-        self.reviewer_id.choices = [(u.id, f"{u.name} ({u.email})") 
-                                   for u in User.query.filter_by(role=UserRole.REVIEWER, is_active=True).all()]
+        self.reviewer_id.choices = reviewer_choices()
+
+class AutoAssignForm(FlaskForm):
+    """Form confirming a previewed conference-wide reviewer assignment"""
+    digest = HiddenField()
+    max_load = IntegerField('Maximum open reviews per reviewer', validators=[Optional(), NumberRange(min=1)])
+    submit = SubmitField('Commit Assignments')
 
 class PasswordResetRequestForm(FlaskForm):
     """Password reset request form"""
@@ -0,0 +1,175 @@
+"""
+Template fragment cache
+
+The {% cache %} tag stores the rendered HTML of a template block under a
+name and its dependency keys:
+
+    {% cache 'admin-recent-paper', paper.id, paper.last_updated, ttl=600 %}
+        ... paper.submitter.name ...
+    {% endcache %}
+
+While the dependencies are unchanged a hit skips the block entirely,
+including any lazy loads inside it. A change to one of them (a new
+last_updated, say) makes a new key, and the old entry ages out after its TTL
+(FRAGMENT_CACHE_TTL unless given). Views call prefetch_misses with the
+same keys to eager load only the rows that will render.
+
+The store is pluggable: FRAGMENT_CACHE_BACKEND is 'memory' (per process,
+bounded by FRAGMENT_CACHE_MAX_ENTRIES), 'null' (always render) or the
+'package.module:Class' path of a class with get/set/clear. Hits and misses
+are logged per request at FRAGMENT_CACHE_LOG_LEVEL and counted in the
+cache metrics.
+"""
+import hashlib
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, request
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from sqlalchemy import inspect as sa_inspect
+from app import db
+from app.metrics import record_cache
+
+class MemoryBackend:
+    """Fragments in this process, least recently used dropped first"""
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class NullBackend:
+    """Caches nothing, every fragment renders"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def clear(self):
+        pass
+
+BACKENDS = {'memory': MemoryBackend, 'null': NullBackend}
+
+def create_backend(config):
+    """Backend named by FRAGMENT_CACHE_BACKEND"""
+    name = config.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    if name == 'memory':
+        return MemoryBackend(config.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000))
+    if name in BACKENDS:
+        return BACKENDS[name]()
+    module, _, attribute = name.partition(':')
+    return getattr(importlib.import_module(module), attribute)()
+
+def fragment_key(name, dependencies):
+    """Store key for a fragment name and its dependency values"""
+    digest = hashlib.sha1(repr(tuple(dependencies)).encode('utf-8')).hexdigest()
+    return f'fragment:{name}:{digest}'
+
+def _backend():
+    return current_app.extensions['fragment_cache']
+
+def _count(hit):
+    record_cache('fragment', hit)
+    counts = g.setdefault('fragment_cache_counts', [0, 0])
+    counts[0 if hit else 1] += 1
+
+def fragment_misses(name, items, dependencies):
+    """Items whose fragment is not cached, so a view can eager load just those
+
+    `dependencies` maps an item to the values the template passes after the
+    fragment name.
+    """
+    backend = _backend()
+    return [item for item in items if backend.get(fragment_key(name, dependencies(item))) is None]
+
+def prefetch_misses(name, items, dependencies, *options):
+    """Apply loader options to just the rows whose fragment will render, in one query
+
+    Cached rows keep their relationships unloaded, so a warm page runs no
+    queries for them at all.
+    """
+    missing = fragment_misses(name, items, dependencies)
+    if missing:
+        model = type(missing[0])
+        key = sa_inspect(model).primary_key[0]
+        db.session.query(model).filter(key.in_([sa_inspect(item).identity[0] for item in missing])).options(*options).all()
+    return missing
+
+class FragmentCacheExtension(Extension):
+    """{% cache name, dependency, ..., ttl=seconds %} ... {% endcache %}"""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        arguments, ttl = [], nodes.Const(None)
+        while parser.stream.current.type != 'block_end':
+            if arguments:
+                parser.stream.expect('comma')
+            if parser.stream.current.test('name:ttl') and parser.stream.look().test('assign'):
+                parser.stream.skip(2)
+                ttl = parser.parse_expression()
+            else:
+                arguments.append(parser.parse_expression())
+        if not arguments:
+            parser.fail('cache tag needs a fragment name', lineno)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [arguments[0], nodes.List(arguments[1:]), ttl])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, name, dependencies, ttl, caller):
+        backend = _backend()
+        key = fragment_key(name, dependencies)
+        html = backend.get(key)
+        _count(html is not None)
+        if html is None:
+            html = caller()
+            backend.set(key, str(html), ttl or current_app.config.get('FRAGMENT_CACHE_TTL', 300))
+        return Markup(html)
+
+def _logger(app):
+    # A child of the app logger with its own level: outside debug the app logger
+    # is at WARNING, which would drop these lines
+    return app.logger.getChild('fragment_cache')
+
+def _log_counts(response):
+    counts = g.pop('fragment_cache_counts', None)
+    if counts:
+        _logger(current_app).info(
+            f"Fragment cache in {request.endpoint or request.path}: {counts[0]} hits, {counts[1]} misses"
+        )
+    return response
+
+def init_fragment_cache(app):
+    """Create the fragment store and enable the {% cache %} tag"""
+    app.extensions['fragment_cache'] = create_backend(app.config)
+    _logger(app).setLevel(app.config.get('FRAGMENT_CACHE_LOG_LEVEL', 'INFO'))
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.after_request(_log_counts)
@@ -0,0 +1,148 @@
+"""
+Per-request SQL instrumentation
+
+Engine events count every statement a request runs, time it and group it
+by shape (the SQL with literals and IN lists collapsed). A shape repeated
+N_PLUS_ONE_THRESHOLD times in one request is logged as a probable N+1 lazy
+load together with the app code that triggered it. Totals are exposed in a
+Server-Timing header, and views can declare a query budget with
+@query_budget that fails under TESTING when exceeded.
+"""
+import os
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)')
+_SPACES = re.compile(r'\s+')
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more queries than its declared budget"""
+
+def statement_shape(statement):
+    """Normalise SQL so repeated executions of the same query compare equal"""
+    shape = _SPACES.sub(' ', statement).strip()
+    shape = _LITERALS.sub('?', shape)
+    return _IN_LISTS.sub('(?)', shape)
+
+class QueryStats:
+    """Queries seen during one request (or one counted block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.origins = {}
+
+    def record(self, statement, duration, threshold):
+        shape = statement_shape(statement)
+        self.count += 1
+        self.duration += duration
+        self.shapes[shape] += 1
+        if self.shapes[shape] == threshold:
+            self.origins[shape] = _app_frame()
+
+    def repeated(self, threshold):
+        """Statement shapes executed at least `threshold` times"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+def _app_frame():
+    """Innermost frame in application code, to point at the lazy load"""
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            return f'{os.path.relpath(frame.filename, APP_DIR)}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+def _active_stats():
+    """Stats objects collecting for the current context, innermost last"""
+    if not has_app_context():
+        return ()
+    return g.get('sql_stats_stack', ())
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    stacks = _active_stats()
+    if stacks:
+        duration = time.perf_counter() - started
+        threshold = current_app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        for stats in stacks:
+            stats.record(statement, duration, threshold)
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
+
+@contextmanager
+def count_queries():
+    """Collect query statistics for the enclosed block"""
+    stats = QueryStats()
+    g.sql_stats_stack = g.get('sql_stats_stack', ()) + (stats,)
+    try:
+        yield stats
+    finally:
+        g.sql_stats_stack = tuple(s for s in g.sql_stats_stack if s is not stats)
+
+def query_budget(max_queries):
+    """Declare the most queries a view may run per request"""
+    def decorator(f):
+        # functools.wraps copies the attribute onto the login/role wrappers
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.sql_stats = QueryStats()
+    g.sql_stats_stack = (g.sql_stats,)
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    config = current_app.config
+    endpoint = request.endpoint or request.path
+
+    for shape, count in stats.repeated(config.get('N_PLUS_ONE_THRESHOLD', 5)):
+        current_app.logger.warning(
+            f"Probable N+1 in {endpoint}: {count} x {shape[:200]} (from {stats.origins.get(shape, 'unknown')})"
+        )
+
+    if config.get('SERVER_TIMING'):
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+        )
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is not None and stats.count > budget:
+        message = f"{endpoint} ran {stats.count} queries, budget is {budget}"
+        if config.get('TESTING') or config.get('QUERY_BUDGET_STRICT'):
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+def init_instrumentation(app):
+    """Attach statement timing to all engines and per-request bookkeeping to the app"""
+    if not app.config.get('SQL_INSTRUMENTATION', True):
+        return
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute),
+                           ('handle_error', _handle_error)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,144 @@
+"""
+Outbound mail queue
+
+Requests only insert a row into outbound_emails. A worker (`flask
+mail-worker`) claims due rows in batches and sends each batch over one SMTP
+connection. Temporary failures are retried with exponential backoff;
+permanent failures, and messages that run out of attempts, move to
+dead_letter_emails.
+"""
+import smtplib
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from app import db, mail
+from app.models import OutboundEmail, DeadLetterEmail
+
+def enqueue_email(to, subject, html, sender=None):
+    """Queue an email for background delivery
+
+    The message is only flushed, so it is sent exactly when the caller's
+    transaction commits and dropped with it on rollback.
+    """
+    email = OutboundEmail(
+        recipient=to,
+        sender=sender or current_app.config['MAIL_DEFAULT_SENDER'],
+        subject=subject,
+        html=html
+    )
+    db.session.add(email)
+    db.session.flush()
+    return email.id
+
+def _is_permanent(error):
+    """SMTP 5xx replies will fail the same way on every retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+def _retry_delay(attempts):
+    """Exponential backoff between delivery attempts, capped"""
+    base = current_app.config['MAIL_RETRY_BACKOFF']
+    return min(base * 2 ** (attempts - 1), current_app.config['MAIL_RETRY_MAX_BACKOFF'])
+
+def _claim_batch(batch_size, now):
+    """Due messages, locked so concurrent workers skip them"""
+    return OutboundEmail.query.filter(
+        OutboundEmail.next_attempt_at <= now
+    ).order_by(
+        OutboundEmail.next_attempt_at, OutboundEmail.id
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+def _fail(email, error, now):
+    """Schedule a retry, or dead-letter the message"""
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if _is_permanent(error) or email.attempts >= current_app.config['MAIL_MAX_ATTEMPTS']:
+        db.session.add(DeadLetterEmail(
+            recipient=email.recipient,
+            sender=email.sender,
+            subject=email.subject,
+            html=email.html,
+            attempts=email.attempts,
+            last_error=email.last_error,
+            created_at=email.created_at,
+            failed_at=now
+        ))
+        db.session.delete(email)
+        current_app.logger.error(f"Email {email.id} to {email.recipient} dead-lettered: {error}")
+        return 'dead'
+    email.next_attempt_at = now + timedelta(seconds=_retry_delay(email.attempts))
+    current_app.logger.warning(f"Email {email.id} to {email.recipient} failed (attempt {email.attempts}): {error}")
+    return 'retry'
+
+def drain_queue(batch_size=None, max_batches=None):
+    """Deliver due queued emails, one SMTP connection per batch"""
+    batch_size = batch_size or current_app.config['MAIL_QUEUE_BATCH_SIZE']
+    totals = {'sent': 0, 'retry': 0, 'dead': 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        now = datetime.utcnow()
+        batch = _claim_batch(batch_size, now)
+        if not batch:
+            db.session.rollback()
+            break
+        batches += 1
+
+        pending = list(batch)
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    email = pending[0]
+                    try:
+                        connection.send(Message(
+                            subject=email.subject,
+                            recipients=[email.recipient],
+                            html=email.html,
+                            sender=email.sender
+                        ))
+                    except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                        # Message-level rejection, the connection is still usable
+                        totals[_fail(email, e, now)] += 1
+                    else:
+                        db.session.delete(email)
+                        totals['sent'] += 1
+                    pending.pop(0)
+        except (smtplib.SMTPException, OSError) as e:
+            # Connection-level failure: everything not yet sent is retried later
+            for email in pending:
+                totals[_fail(email, e, now)] += 1
+        db.session.commit()
+
+        if pending:
+            break
+
+    return totals
+
+def run_worker(interval=5.0, batch_size=None):
+    """Drain the queue forever, sleeping while it is empty"""
+    while True:
+        totals = drain_queue(batch_size)
+        if any(totals.values()):
+            current_app.logger.info(f"Mail queue: {totals['sent']} sent, {totals['retry']} retrying, {totals['dead']} dead-lettered")
+        else:
+            time.sleep(interval)
+
+def requeue_dead_letters():
+    """Move every dead-lettered email back onto the queue"""
+    count = 0
+    for dead in DeadLetterEmail.query.order_by(DeadLetterEmail.id).all():
+        db.session.add(OutboundEmail(
+            recipient=dead.recipient,
+            sender=dead.sender,
+            subject=dead.subject,
+            html=dead.html,
+            created_at=dead.created_at
+        ))
+        db.session.delete(dead)
+        count += 1
+    db.session.commit()
+    return count
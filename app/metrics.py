@@ -0,0 +1,208 @@
+"""
+Prometheus metrics
+
+init_metrics creates the collectors (importing prometheus_client only when
+METRICS_ENABLED is on) and serves them at /metrics:
+
+- request latency histograms, request counts by status and in-flight
+  requests, per endpoint
+- connection pool checkouts, wait time, timeouts and connections in use
+- cache hits and misses, by cache
+- uploaded bytes and upload time, by storage backend
+- mail queue depth, read from the database at scrape time
+
+With several worker processes, point METRICS_MULTIPROC_DIR at a directory
+shared by the workers (and emptied on deploy). Each process then writes its
+samples there and any worker answering /metrics aggregates all of them.
+Under gunicorn, call mark_process_dead from the child_exit server hook so
+exited workers drop out of the in-flight and in-use gauges.
+
+Code elsewhere reports through record_cache and record_upload, which do
+nothing while metrics are disabled.
+"""
+import os
+import time
+from datetime import datetime
+from flask import Response, abort, current_app, g, request
+from sqlalchemy import event, func
+from sqlalchemy.pool import Pool
+
+# Request latency buckets in seconds, weighted towards page render times
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+UPLOAD_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_collectors = None
+
+class _Collectors:
+    """The process's metric objects"""
+
+    def __init__(self):
+        from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram
+
+        self.registry = registry = CollectorRegistry(auto_describe=True)
+        # Read at scrape time by whichever process answers, never aggregated
+        self.scrape_registry = CollectorRegistry(auto_describe=True)
+        self.scrape_registry.register(MailQueueCollector())
+        self.request_latency = Histogram(
+            'paper_cms_request_duration_seconds', 'Request latency by endpoint',
+            ['endpoint', 'method'], buckets=LATENCY_BUCKETS, registry=registry
+        )
+        self.requests = Counter(
+            'paper_cms_requests_total', 'Requests by endpoint and status code',
+            ['endpoint', 'method', 'status'], registry=registry
+        )
+        self.in_flight = Gauge(
+            'paper_cms_requests_in_flight', 'Requests being handled',
+            registry=registry, multiprocess_mode='livesum'
+        )
+        self.pool_checkouts = Counter(
+            'paper_cms_db_pool_checkouts_total', 'Connections handed out by the pool',
+            registry=registry
+        )
+        self.pool_timeouts = Counter(
+            'paper_cms_db_pool_timeouts_total', 'Checkouts that gave up waiting for a connection',
+            registry=registry
+        )
+        self.pool_wait = Histogram(
+            'paper_cms_db_pool_wait_seconds', 'Time spent waiting for a pooled connection',
+            buckets=POOL_WAIT_BUCKETS, registry=registry
+        )
+        self.pool_in_use = Gauge(
+            'paper_cms_db_pool_connections_in_use', 'Connections checked out of the pool',
+            registry=registry, multiprocess_mode='livesum'
+        )
+        self.cache_requests = Counter(
+            'paper_cms_cache_requests_total', 'Cache lookups by cache and result',
+            ['cache', 'result'], registry=registry
+        )
+        self.upload_bytes = Counter(
+            'paper_cms_upload_bytes_total', 'Bytes of uploaded files stored',
+            ['backend'], registry=registry
+        )
+        self.upload_duration = Histogram(
+            'paper_cms_upload_duration_seconds', 'Time to store an uploaded file',
+            ['backend'], buckets=UPLOAD_BUCKETS, registry=registry
+        )
+
+class MailQueueCollector:
+    """Queue depth gauges, read from the shared database when scraped"""
+
+    def _family(self):
+        from prometheus_client.core import GaugeMetricFamily
+        return GaugeMetricFamily('paper_cms_mail_queue_depth', 'Emails in the outbound queue', labels=['state'])
+
+    def describe(self):
+        # Lets the registry check names without querying the database
+        return [self._family()]
+
+    def collect(self):
+        from app import db
+        from app.models import OutboundEmail, DeadLetterEmail
+
+        queued = self._family()
+        try:
+            pending, due = db.session.query(
+                func.count(OutboundEmail.id),
+                func.count(OutboundEmail.id).filter(OutboundEmail.next_attempt_at <= datetime.utcnow())
+            ).one()
+            dead = db.session.query(func.count(DeadLetterEmail.id)).scalar()
+        except Exception as e:
+            current_app.logger.warning(f"Could not read mail queue depth: {e}")
+            db.session.rollback()
+            return
+        queued.add_metric(['pending'], pending)
+        queued.add_metric(['due'], due)
+        queued.add_metric(['dead_letter'], dead)
+        yield queued
+
+def record_cache(cache, hit):
+    """Count a cache lookup"""
+    if _collectors is not None:
+        _collectors.cache_requests.labels(cache, 'hit' if hit else 'miss').inc()
+
+def record_upload(backend, size, duration):
+    """Count a stored upload"""
+    if _collectors is not None:
+        _collectors.upload_bytes.labels(backend).inc(size)
+        _collectors.upload_duration.labels(backend).observe(duration)
+
+def mark_process_dead(pid):
+    """Drop an exited worker's live gauges (gunicorn child_exit hook)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+def _pool_observer(waited):
+    if waited is None:
+        _collectors.pool_timeouts.inc()
+    else:
+        _collectors.pool_checkouts.inc()
+        _collectors.pool_wait.observe(waited)
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    _collectors.pool_in_use.inc()
+
+def _on_checkin(dbapi_connection, connection_record):
+    _collectors.pool_in_use.dec()
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_in_flight = True
+    _collectors.in_flight.inc()
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        _collectors.request_latency.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        _collectors.requests.labels(endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+def _end_request(exc):
+    # Teardown runs even when the view raised, so the gauge always comes back down
+    if g.pop('metrics_in_flight', False):
+        _collectors.in_flight.dec()
+
+def metrics_view():
+    """Current metrics in the Prometheus text format"""
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        abort(401)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        output = generate_latest(registry)
+    else:
+        output = generate_latest(_collectors.registry)
+    output += generate_latest(_collectors.scrape_registry)
+    return Response(output, content_type=CONTENT_TYPE_LATEST)
+
+def init_metrics(app):
+    """Create the collectors and register the request hooks and /metrics"""
+    global _collectors
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    directory = app.config.get('METRICS_MULTIPROC_DIR')
+    if directory:
+        # prometheus_client picks its storage when first imported
+        os.makedirs(directory, exist_ok=True)
+        os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', directory)
+
+    if _collectors is None:
+        from app.db_pool import pool_metrics
+
+        _collectors = _Collectors()
+        pool_metrics.observers.append(_pool_observer)
+        event.listen(Pool, 'checkout', _on_checkout)
+        event.listen(Pool, 'checkin', _on_checkin)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_end_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
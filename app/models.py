@@ -1,10 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import enum
 
 from app import db
+from app.passwords import hash_password, verify_password, needs_rehash
 
 # Enums for better data integrity
 class UserRole(enum.Enum):
@@ -62,11 +62,15 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
         """Check if provided password matches hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check if the stored hash predates the current hashing policy"""
+        return needs_rehash(self.password_hash)
     
     def has_role(self, role):
         """Check if user has specific role"""
@@ -92,34 +96,91 @@ class Paper(db.Model):
     submitted_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Review aggregates, maintained by Paper.refresh_review_aggregates()
+    assigned_review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    avg_score = db.Column(db.Float)
+    avg_technical_quality = db.Column(db.Float)
+    avg_novelty = db.Column(db.Float)
+    avg_clarity = db.Column(db.Float)
+    avg_significance = db.Column(db.Float)
+    
     # Relationships
     reviews = db.relationship('Review', backref='paper', lazy='dynamic', cascade='all, delete-orphan')
     categories = db.relationship('Category', secondary=paper_categories, backref='papers')
     submitter = db.relationship('User', foreign_keys=[submitted_by])
+    # Names repeat across years, so this picks one edition (see _conference_edition)
+    conference = db.relationship('Conference', primaryjoin=lambda: _conference_edition(),
+                                 viewonly=True, uselist=False)
     
     @property
     def average_score(self):
-        """Calculate average review score"""
-        completed_reviews = self.reviews.filter(Review.score.isnot(None)).all()
-        if not completed_reviews:
-            return None
-        return sum(review.score for review in completed_reviews) / len(completed_reviews)
+        """Average overall score of completed reviews"""
+        return self.avg_score
     
     @property
     def review_count(self):
         """Get number of completed reviews"""
-        return self.reviews.filter(Review.score.isnot(None)).count()
+        return self.completed_review_count or 0
+    
+    @classmethod
+    def refresh_review_aggregates(cls, paper_ids=None):
+        """Recompute stored review aggregates from the reviews table
+        
+        Runs as a single UPDATE in the current transaction, so callers commit
+        it together with the review changes. Pass None to refresh every paper.
+        """
+        db.session.flush()
+        
+        completed = db.and_(Review.paper_id == cls.id, Review.is_completed == True)
+        
+        def completed_avg(column):
+            return db.select(db.func.avg(column)).where(completed).scalar_subquery()
+        
+        statement = db.update(cls.__table__).values(
+            assigned_review_count=db.select(db.func.count(Review.id)).where(Review.paper_id == cls.id).scalar_subquery(),
+            completed_review_count=db.select(db.func.count(Review.id)).where(completed).scalar_subquery(),
+            avg_score=completed_avg(Review.score),
+            avg_technical_quality=completed_avg(Review.technical_quality),
+            avg_novelty=completed_avg(Review.novelty),
+            avg_clarity=completed_avg(Review.clarity),
+            avg_significance=completed_avg(Review.significance),
+            # Set explicitly so the onupdate does not mark every refreshed paper as edited
+            last_updated=cls.__table__.c.last_updated
+        )
+        if paper_ids is not None:
+            paper_ids = list(paper_ids)
+            if not paper_ids:
+                return 0
+            statement = statement.where(cls.__table__.c.id.in_(paper_ids))
+        
+        result = db.session.execute(statement)
+        
+        # Drop stale in-memory copies of the aggregate columns
+        for obj in db.session.identity_map.values():
+            if isinstance(obj, cls) and (paper_ids is None or obj.id in paper_ids):
+                db.session.expire(obj, REVIEW_AGGREGATE_COLUMNS)
+        
+        return result.rowcount
     
     def __repr__(self):
         return f'<Paper {self.title}>'
 
+REVIEW_AGGREGATE_COLUMNS = [
+    'assigned_review_count', 'completed_review_count', 'avg_score',
+    'avg_technical_quality', 'avg_novelty', 'avg_clarity', 'avg_significance'
+]
+
 class Review(db.Model):
     """Peer review model"""
     __tablename__ = 'reviews'
     
     id = db.Column(db.Integer, primary_key=True)
-    paper_id = db.Column(db.Integer, db.ForeignKey('papers.id'), nullable=False)
-    reviewer_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # Old values are loaded on reassignment even when expired, so app.access can revoke them
+    paper_id = db.column_property(db.Column(db.Integer, db.ForeignKey('papers.id'), nullable=False),
+                                  active_history=True)
+    reviewer_id = db.column_property(db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False),
+                                     active_history=True)
     score = db.Column(db.Integer)  # 1-10 scale
     comments = db.Column(db.Text)
     recommendation = db.Column(db.Enum(ReviewRecommendation))
@@ -137,7 +198,7 @@ class Review(db.Model):
     def mark_completed(self):
         """Mark review as completed"""
         self.is_completed = True
-        self.review_date = datetime.utcnow
+        self.review_date = datetime.utcnow()
     
     def __repr__(self):
         return f'<Review {self.id} for Paper {self.paper_id}>'
@@ -162,6 +223,22 @@ class Conference(db.Model):
     def __repr__(self):
         return f'<Conference {self.name} {self.year}>'
 
+def _conference_edition():
+    """Join a paper to the edition of its conference it was submitted to
+
+    That is the edition with the earliest deadline still open at submission,
+    or the latest one when all had closed (imported papers, late entries).
+    """
+    edition = db.aliased(Conference)
+    same_name = edition.name == Paper.conference_name
+    deadline = db.func.coalesce(
+        db.select(db.func.min(edition.submission_deadline)).where(
+            same_name, edition.submission_deadline >= Paper.submission_date
+        ).scalar_subquery(),
+        db.select(db.func.max(edition.submission_deadline)).where(same_name).scalar_subquery()
+    )
+    return db.and_(db.foreign(Paper.conference_name) == Conference.name, Conference.submission_deadline == deadline)
+
 class Category(db.Model):
     """Research category/topic model"""
     __tablename__ = 'categories'
@@ -188,9 +265,90 @@ class Affiliation(db.Model):
     def __repr__(self):
         return f'<Affiliation {self.institution_name}>'
 
+class PaperAccess(db.Model):
+    """Why a user may open a paper, maintained by app.access"""
+    __tablename__ = 'paper_access'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    paper_id = db.Column(db.Integer, db.ForeignKey('papers.id', ondelete='CASCADE'), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    
+    def __repr__(self):
+        return f'<PaperAccess {self.user_id}:{self.paper_id} {self.kind}>'
+
+class StatsCounter(db.Model):
+    """Rolled-up counter maintained for the admin dashboard"""
+    __tablename__ = 'stats_counters'
+    
+    metric = db.Column(db.String(50), primary_key=True)
+    dimension = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<StatsCounter {self.metric}:{self.dimension}={self.value}>'
+
+class DailySubmissionStat(db.Model):
+    """Number of papers submitted per day and conference"""
+    __tablename__ = 'stats_daily_submissions'
+    
+    day = db.Column(db.Date, primary_key=True)
+    conference_name = db.Column(db.String(200), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<DailySubmissionStat {self.day} {self.conference_name}={self.count}>'
+
+class ReferenceDataVersion(db.Model):
+    """Version stamp of a cached lookup table, bumped whenever it changes"""
+    __tablename__ = 'reference_data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<ReferenceDataVersion {self.name}={self.version}>'
+
+class OutboundEmail(db.Model):
+    """Email waiting to be delivered by the mail queue worker"""
+    __tablename__ = 'outbound_emails'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    sender = db.Column(db.String(120))
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<OutboundEmail {self.id} to {self.recipient}>'
+
+class DeadLetterEmail(db.Model):
+    """Email the mail queue gave up on, kept for inspection and requeueing"""
+    __tablename__ = 'dead_letter_emails'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    sender = db.Column(db.String(120))
+    subject = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime)
+    failed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DeadLetterEmail {self.id} to {self.recipient}>'
+
 # Indexes for better performance
 db.Index('idx_users_email', User.email)
 db.Index('idx_papers_status', Paper.status)
 db.Index('idx_papers_conference', Paper.conference_name)
+db.Index('idx_papers_submission_date_id', Paper.submission_date, Paper.id)
+db.Index('idx_users_name_id', User.name, User.id)
+db.Index('idx_outbound_emails_next_attempt', OutboundEmail.next_attempt_at, OutboundEmail.id)
 db.Index('idx_reviews_paper', Review.paper_id)
-db.Index('idx_reviews_reviewer', Review.reviewer_id)
\ No newline at end of file
+db.Index('idx_reviews_reviewer_deadline', Review.reviewer_id, Review.is_completed, Review.deadline)
+db.Index('idx_paper_authors_user', paper_authors.c.user_id, paper_authors.c.paper_id)
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Response cache for public pages seen by anonymous visitors
+
+Views decorated with @cache_anonymous_page keep their rendered response
+per process for PAGE_CACHE_TTL seconds and answer repeat visits without
+touching the view or the database. Every response carries an ETag, so a
+matching If-None-Match gets an empty 304. The Cache-Control header lets the
+CDN keep the page as long and serve it stale for PAGE_CACHE_STALE seconds
+while it revalidates. The process cache does the same: after the TTL, one
+request renders a fresh copy and the others keep getting the old one.
+
+Only GET/HEAD requests without a query string, without a logged-in user
+and without pending flash messages are cached, and only 200 responses not
+marked Cache-Control: no-store (a view's degraded fallback render). Creating or deleting papers
+and changing conferences bumps the 'pages' version in
+reference_data_versions. The committing process drops its pages at once
+and other processes within REFERENCE_CACHE_CHECK_INTERVAL seconds.
+"""
+import functools
+import hashlib
+import threading
+import time
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import event
+from app import db
+from app.metrics import record_cache
+from app.models import Paper, Conference, ReferenceDataVersion
+
+PAGES = 'pages'
+
+class CachedPage:
+    """A rendered response body and the validators sent with it"""
+
+    __slots__ = ('body', 'content_type', 'etag', 'stored_at')
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.stored_at = time.monotonic()
+
+class PageCache:
+    """Per-process rendered pages, dropped when the shared pages version moves on"""
+
+    def __init__(self):
+        self._pages = {}
+        self._refreshing = set()
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self):
+        # At most one version query per check interval; every other lookup stays in memory
+        interval = current_app.config.get('REFERENCE_CACHE_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < interval:
+            return True
+        try:
+            version = db.session.query(ReferenceDataVersion.version).filter(
+                ReferenceDataVersion.name == PAGES
+            ).scalar() or 0
+        except Exception as e:
+            # No usable version (empty or unreachable database): leave it to the view
+            current_app.logger.warning(f'Page cache version check failed: {e}')
+            db.session.rollback()
+            return False
+        with self._lock:
+            if version != self._version:
+                self._pages.clear()
+                self._version = version
+            self._checked_at = now
+        return True
+
+    def lookup(self, key, ttl, stale):
+        """(page, state) where state is 'fresh', 'stale' (serve it, someone else refreshes) or 'miss'"""
+        if not self._sync_version():
+            return None, 'miss'
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                return None, 'miss'
+            age = time.monotonic() - page.stored_at
+            if age < ttl:
+                return page, 'fresh'
+            if age < ttl + stale and key in self._refreshing:
+                return page, 'stale'
+            # This request renders the replacement; concurrent ones get the stale copy meanwhile
+            self._refreshing.add(key)
+            return None, 'miss'
+
+    def store(self, key, page):
+        with self._lock:
+            self._refreshing.discard(key)
+            if page is not None:
+                self._pages[key] = page
+
+    def invalidate(self):
+        """Drop every cached page in this process"""
+        with self._lock:
+            self._pages.clear()
+            self._refreshing.clear()
+            self._checked_at = None
+
+page_cache = PageCache()
+
+def _cacheable_request():
+    return (
+        current_app.config.get('PAGE_CACHE_ENABLED', True)
+        and request.method in ('GET', 'HEAD')
+        and not request.query_string
+        and not current_user.is_authenticated
+        and '_flashes' not in session
+    )
+
+def _cache_headers(response, etag):
+    config = current_app.config
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = (
+        f"public, max-age=0, s-maxage={config.get('PAGE_CACHE_TTL', 60)}, "
+        f"stale-while-revalidate={config.get('PAGE_CACHE_STALE', 300)}"
+    )
+    # Signed-in visitors send a session cookie and must not be served the anonymous copy
+    response.vary.add('Cookie')
+    return response
+
+# X-Cache values for the lookup states, so a CDN log shows where a page came from
+X_CACHE = {'fresh': 'HIT', 'stale': 'STALE', 'miss': 'MISS'}
+
+def _cached_response(page, state):
+    if request.if_none_match.contains(page.etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(page.body, content_type=page.content_type)
+    response.headers['X-Cache'] = X_CACHE[state]
+    return _cache_headers(response, page.etag)
+
+def cache_anonymous_page(view):
+    """Serve the view's rendered page to anonymous visitors from the page cache"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not _cacheable_request():
+            return view(*args, **kwargs)
+
+        config = current_app.config
+        key = request.path
+        page, state = page_cache.lookup(key, config.get('PAGE_CACHE_TTL', 60), config.get('PAGE_CACHE_STALE', 300))
+        record_cache('page', page is not None)
+        if page is not None:
+            return _cached_response(page, state)
+
+        page = None
+        try:
+            response = make_response(view(*args, **kwargs))
+            if (response.status_code == 200 and not response.direct_passthrough
+                    and 'Set-Cookie' not in response.headers and not response.cache_control.no_store):
+                page = CachedPage(response.get_data(), response.content_type)
+        finally:
+            page_cache.store(key, page)
+        if page is None:
+            return response
+        return _cached_response(page, 'miss')
+    return wrapper
+
+def pages_changed(session):
+    """Expire cached pages everywhere once the session commits, for writers bypassing the ORM"""
+    from app.reference_data import bump_versions
+    bump_versions(session, {PAGES})
+    session.info['pages_changed'] = True
+
+def _after_flush(session, flush_context):
+    if any(isinstance(obj, (Paper, Conference)) for obj in list(session.new) + list(session.deleted)) or any(
+        isinstance(obj, Conference) and session.is_modified(obj) for obj in session.dirty
+    ):
+        pages_changed(session)
+
+def _after_commit(session):
+    if session.info.pop('pages_changed', False):
+        page_cache.invalidate()
+
+def _after_rollback(session):
+    session.info.pop('pages_changed', None)
+
+def register_page_cache_listeners():
+    """Attach the page cache invalidation hooks to the application session"""
+    for name, listener in (('after_flush', _after_flush),
+                           ('after_commit', _after_commit),
+                           ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,133 @@
+"""
+Password hashing service
+
+Key derivation is deliberately slow, so hashing and verification run in a
+small process pool instead of on the request thread; other requests keep
+being served while a sign-in waits for its worker. PASSWORD_HASH_WORKERS
+sets the pool size (0 hashes inline) and PASSWORD_HASH_MAX_PENDING bounds
+the calls waiting for a worker. Past that, or after PASSWORD_HASH_TIMEOUT
+seconds, callers get PasswordServiceBusy rather than queueing without
+limit.
+
+The algorithm and its parameters are PASSWORD_HASH_METHOD in Werkzeug's
+notation ('scrypt:32768:8:1', 'pbkdf2:sha256:600000', ...). Hashes made
+under an older policy keep verifying, and needs_rehash tells the login view
+to store a fresh hash while it has the plain password.
+"""
+import functools
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Spawned workers re-import the main script (run.py would build a whole app per
+# worker), so fork where that is safe; workers only ever run the hash functions
+DEFAULT_START_METHOD = 'fork' if sys.platform.startswith('linux') else 'spawn'
+
+class PasswordServiceBusy(Exception):
+    """No hashing worker became free in time"""
+
+@functools.lru_cache(maxsize=8)
+def policy_prefix(method, salt_length):
+    """Stored method prefix and salt length a hash made under this policy has"""
+    # Werkzeug fills in defaults ('scrypt' -> 'scrypt:32768:8:1'), so ask it
+    method_part, salt, _ = generate_password_hash('', method, salt_length).split('$', 2)
+    return method_part, len(salt)
+
+class PasswordHasher:
+    """Process pool running the hash functions, created per process on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+    def _pool(self, config):
+        # A forked server worker must not reuse its parent's pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context(config.get('PASSWORD_HASH_START_METHOD') or DEFAULT_START_METHOD)
+                self._executor = ProcessPoolExecutor(config['PASSWORD_HASH_WORKERS'], mp_context=context)
+                self._slots = threading.BoundedSemaphore(config.get('PASSWORD_HASH_MAX_PENDING', 64))
+                self._pid = os.getpid()
+            return self._executor, self._slots
+
+    def run(self, function, *args):
+        """Call a hash function in the pool, or inline when the pool is disabled"""
+        config = current_app.config
+        if not config.get('PASSWORD_HASH_WORKERS'):
+            return function(*args)
+
+        executor, slots = self._pool(config)
+        timeout = config.get('PASSWORD_HASH_TIMEOUT', 10)
+        if not slots.acquire(timeout=timeout):
+            raise PasswordServiceBusy('Password hashing is busy, please try again')
+        try:
+            return executor.submit(function, *args).result(timeout=timeout)
+        except FutureTimeout:
+            raise PasswordServiceBusy('Password hashing is busy, please try again')
+        except BrokenProcessPool as e:
+            current_app.logger.error(f"Password hashing pool failed, hashing inline: {e}")
+            self.shutdown()
+            return function(*args)
+        finally:
+            slots.release()
+
+    def map(self, function, *iterables):
+        """Call a hash function over many arguments, spread across the pool
+
+        Meant for batch jobs such as imports: it does not take a pending
+        slot per call, so it never raises PasswordServiceBusy.
+        """
+        config = current_app.config
+        if not config.get('PASSWORD_HASH_WORKERS'):
+            return list(map(function, *iterables))
+
+        executor, _ = self._pool(config)
+        try:
+            return list(executor.map(function, *iterables, chunksize=16))
+        except BrokenProcessPool as e:
+            current_app.logger.error(f"Password hashing pool failed, hashing inline: {e}")
+            self.shutdown()
+            return list(map(function, *iterables))
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    """Hash a password under the current policy"""
+    config = current_app.config
+    return password_hasher.run(
+        generate_password_hash, password,
+        config.get('PASSWORD_HASH_METHOD', 'scrypt'), config.get('PASSWORD_SALT_LENGTH', 16)
+    )
+
+def hash_passwords(passwords):
+    """Hash a list of passwords under the current policy, in the worker pool"""
+    config = current_app.config
+    method = config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    salt_length = config.get('PASSWORD_SALT_LENGTH', 16)
+    return password_hasher.map(generate_password_hash, passwords,
+                               [method] * len(passwords), [salt_length] * len(passwords))
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash of any supported policy"""
+    return password_hasher.run(check_password_hash, password_hash, password)
+
+def needs_rehash(password_hash):
+    """Whether a valid stored hash was made with other parameters than the current policy"""
+    config = current_app.config
+    method, salt_length = policy_prefix(config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+                                        config.get('PASSWORD_SALT_LENGTH', 16))
+    parts = password_hash.split('$', 2)
+    return len(parts) != 3 or parts[0] != method or len(parts[1]) != salt_length
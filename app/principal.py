@@ -0,0 +1,133 @@
+"""
+Lightweight identity for authenticated requests
+
+Flask-Login's user loader runs on every request, but most requests only
+need the user's id, name and role. load_principal returns a small
+SessionPrincipal built from a short-lived per-process cache; the full ORM
+User is loaded the first time a route touches anything else (relationships,
+password helpers, ...). A session hook drops cached entries when a user's
+identity attributes change, so role changes and deactivation apply on the
+next request in this process and within PRINCIPAL_CACHE_TTL elsewhere.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, inspect
+from app import db
+from app.metrics import record_cache
+from app.models import User
+
+# Attributes copied into the principal; changing any of them invalidates it
+PRINCIPAL_ATTRS = ('id', 'name', 'email', 'role', 'is_active', 'last_login')
+
+class SessionPrincipal:
+    """Compact stand-in for the logged-in User"""
+
+    __slots__ = PRINCIPAL_ATTRS + ('_user',)
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, row):
+        for name, value in zip(PRINCIPAL_ATTRS, row):
+            setattr(self, name, value)
+        self._user = None
+
+    def get_id(self):
+        return str(self.id)
+
+    def has_role(self, role):
+        """Check if user has specific role"""
+        return self.role == role
+
+    @property
+    def user(self):
+        """The full User row, loaded on first use"""
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def __getattr__(self, name):
+        # Only reached for attributes the principal does not carry itself
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __eq__(self, other):
+        if isinstance(other, (User, SessionPrincipal)):
+            return other.id == self.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((User, self.id))
+
+    def __repr__(self):
+        return f'<SessionPrincipal {self.email}>'
+
+class PrincipalCache:
+    """Per-process cache of principal rows with a short time to live"""
+
+    def __init__(self):
+        self._rows = {}     # user id -> (expires_at, row)
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._rows.get(user_id)
+        hit = bool(cached and cached[0] > now)
+        record_cache('principal', hit)
+        if hit:
+            return cached[1]
+
+        columns = [getattr(User, name) for name in PRINCIPAL_ATTRS]
+        row = db.session.query(*columns).filter(User.id == user_id).first()
+        if row is not None:
+            row = tuple(row)
+            with self._lock:
+                self._rows[user_id] = (now + current_app.config.get('PRINCIPAL_CACHE_TTL', 60), row)
+        return row
+
+    def invalidate(self, *user_ids):
+        """Forget cached principals (all of them by default)"""
+        with self._lock:
+            if not user_ids:
+                self._rows.clear()
+            for user_id in user_ids:
+                self._rows.pop(user_id, None)
+
+principal_cache = PrincipalCache()
+
+def load_principal(user_id):
+    """Flask-Login user loader returning a SessionPrincipal, or None for unknown or inactive users"""
+    row = principal_cache.get(user_id)
+    if row is None:
+        return None
+    principal = SessionPrincipal(row)
+    return principal if principal.is_active else None
+
+def _after_flush(session, flush_context):
+    changed = set()
+    for obj in list(session.deleted) + list(session.dirty):
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if obj in session.deleted or any(state.attrs[name].history.has_changes() for name in PRINCIPAL_ATTRS):
+                changed.add(state.identity[0] if state.identity else obj.id)
+    if changed:
+        session.info.setdefault('principal_changes', set()).update(changed)
+
+def _after_commit(session):
+    user_ids = session.info.pop('principal_changes', None)
+    if user_ids:
+        principal_cache.invalidate(*user_ids)
+
+def _after_rollback(session):
+    session.info.pop('principal_changes', None)
+
+def register_principal_listeners():
+    """Attach the principal invalidation hooks to the application session"""
+    for name, listener in (('after_flush', _after_flush),
+                           ('after_commit', _after_commit),
+                           ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -0,0 +1,164 @@
+"""
+Rate limit storage shared by the worker processes on one host
+
+Flask-Limiter's memory:// storage is per process, so every limit is
+multiplied by the number of workers. SQLiteStorage keeps the counters in
+one SQLite database in WAL mode instead. Each counter is a single row
+updated with an atomic upsert, so any process sees every hit, and a
+sliding window check runs its read and write in one IMMEDIATE
+transaction. No external service is needed.
+
+Importing this module registers the sqlite:// scheme with limits, e.g.
+RATELIMIT_STORAGE_URI = 'sqlite:////var/run/paper-cms/ratelimit.db'.
+
+Expired rows are reused in place when their key is hit again. Every
+`purge_interval` seconds one writer also deletes a bounded batch of stale
+rows through the expiry index, so the file stays about as large as the
+set of active keys.
+"""
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from urllib.parse import urlparse
+from limits.storage import Storage, SlidingWindowCounterSupport
+from limits.storage.base import TimestampedSlidingWindow
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rate_limits_expires_at ON rate_limits (expires_at);
+"""
+
+# Resets the counter when the stored window has run out, adds to it otherwise
+INCREMENT = """
+INSERT INTO rate_limits (key, value, expires_at) VALUES (:key, :amount, :expires_at)
+ON CONFLICT (key) DO UPDATE SET
+    value = CASE WHEN expires_at <= :now THEN excluded.value ELSE value + excluded.value END,
+    expires_at = CASE WHEN expires_at <= :now THEN excluded.expires_at ELSE expires_at END
+RETURNING value
+"""
+
+PURGE = """
+DELETE FROM rate_limits WHERE key IN (
+    SELECT key FROM rate_limits WHERE expires_at <= ? LIMIT ?
+)
+"""
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """Fixed and sliding window counters in a WAL-mode SQLite file"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, busy_timeout=5.0, purge_interval=60.0,
+                 purge_batch=1000, **options):
+        # Same layout as SQLAlchemy URLs: sqlite:///relative.db, sqlite:////absolute.db
+        self.path = urlparse(uri).path[1:] or ':memory:'
+        self.busy_timeout = float(busy_timeout)
+        self.purge_interval = float(purge_interval)
+        self.purge_batch = int(purge_batch)
+        self._local = threading.local()
+        self._next_purge = time.time() + self.purge_interval
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    @property
+    def connection(self):
+        """This thread's connection, reopened after a fork"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # Losing the last few hits on power failure is fine for rate limits
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def _increment(self, connection, key, expiry, amount, now):
+        value = connection.execute(
+            INCREMENT, {'key': key, 'amount': amount, 'expires_at': now + expiry, 'now': now}
+        ).fetchone()[0]
+        if now >= self._next_purge:
+            self._next_purge = now + self.purge_interval
+            connection.execute(PURGE, (now, self.purge_batch))
+        return value
+
+    def incr(self, key, expiry, amount=1):
+        return self._increment(self.connection, key, expiry, amount, time.time())
+
+    def get(self, key):
+        row = self.connection.execute(
+            'SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self.connection.execute(
+            'SELECT expires_at FROM rate_limits WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self.connection.execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.connection.execute('DELETE FROM rate_limits').rowcount
+
+    def clear(self, key):
+        self.connection.execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+    def _window(self, connection, key, expiry, now):
+        """(previous count, previous TTL, current count, current TTL), as MemoryStorage computes them"""
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        counts = dict(connection.execute(
+            'SELECT key, value FROM rate_limits WHERE key IN (?, ?) AND expires_at > ?',
+            (previous_key, current_key, now)
+        ).fetchall())
+        previous_count = counts.get(previous_key, 0)
+        previous_ttl = (1 - (((now - expiry) / expiry) % 1)) * expiry if previous_count else 0.0
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_count, previous_ttl, counts.get(current_key, 0), current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        connection = self.connection
+        # The write lock is taken up front, so no other process can slip in between check and hit
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            previous_count, previous_ttl, current_count, _ = self._window(connection, key, expiry, now)
+            if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+                acquired = False
+            else:
+                _, current_key = self.sliding_window_keys(key, expiry, now)
+                self._increment(connection, current_key, 2 * expiry, amount, now)
+                acquired = True
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return acquired
+
+    def get_sliding_window(self, key, expiry):
+        return self._window(self.connection, key, expiry, time.time())
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.connection.execute('DELETE FROM rate_limits WHERE key IN (?, ?)', (previous_key, current_key))
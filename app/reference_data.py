@@ -0,0 +1,169 @@
+"""
+Process-local cache for lookup tables used by form choice lists
+
+Categories, conferences and active reviewers change rarely but are read on
+every submit, browse and assignment page. Each table is cached per process
+together with a version number from reference_data_versions. A session hook
+bumps the version in the same transaction as any change to the underlying
+rows, so other processes notice within REFERENCE_CACHE_CHECK_INTERVAL
+seconds and the committing process reloads immediately.
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, inspect
+from app import db
+from app.utils import upsert_add
+from app.metrics import record_cache
+from app.models import Category, Conference, User, UserRole, ReferenceDataVersion
+
+CATEGORIES = 'categories'
+CONFERENCES = 'conferences'
+REVIEWERS = 'reviewers'
+
+def _load_categories():
+    return db.session.query(Category.id, Category.name).order_by(Category.name).all()
+
+def _load_conferences():
+    return db.session.query(Conference.id, Conference.name, Conference.year).order_by(
+        Conference.year.desc(), Conference.name
+    ).all()
+
+def _load_reviewers():
+    return db.session.query(User.id, User.name, User.email).filter(
+        User.role == UserRole.REVIEWER,
+        User.is_active == True
+    ).order_by(User.name).all()
+
+class ReferenceCache:
+    """Versioned in-memory copies of small lookup tables"""
+
+    def __init__(self, loaders):
+        self._loaders = loaders
+        self._entries = {}      # name -> (version, rows)
+        self._versions = {}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """Cached rows for a table, reloaded when its version has moved on"""
+        interval = current_app.config.get('REFERENCE_CACHE_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        with self._lock:
+            stale_versions = self._checked_at is None or now - self._checked_at >= interval
+            versions = self._versions
+        # Queries run outside the lock so a slow database does not stall every other lookup
+        if stale_versions:
+            versions = dict(db.session.query(ReferenceDataVersion.name, ReferenceDataVersion.version))
+            with self._lock:
+                self._versions, self._checked_at = versions, now
+
+        version = versions.get(name, 0)
+        with self._lock:
+            entry = self._entries.get(name)
+        hit = entry is not None and entry[0] == version
+        if not hit:
+            entry = (version, [tuple(row) for row in self._loaders[name]()])
+            with self._lock:
+                # Keep whichever copy is newer if another thread reloaded meanwhile
+                current = self._entries.get(name)
+                if current is None or current[0] <= version:
+                    self._entries[name] = entry
+        record_cache(f'reference_{name}', hit)
+        return entry[1]
+
+    def invalidate(self, *names):
+        """Drop cached tables (all of them by default) in this process"""
+        with self._lock:
+            for name in names or list(self._entries):
+                self._entries.pop(name, None)
+            self._checked_at = None
+
+reference_cache = ReferenceCache({
+    CATEGORIES: _load_categories,
+    CONFERENCES: _load_conferences,
+    REVIEWERS: _load_reviewers,
+})
+
+def category_choices():
+    """(id, name) pairs for every category"""
+    return list(reference_cache.get(CATEGORIES))
+
+def conference_choices():
+    """(id, "name year") pairs for every conference, newest first"""
+    return [(conference_id, f"{name} {year}") for conference_id, name, year in reference_cache.get(CONFERENCES)]
+
+def reviewer_choices(exclude=()):
+    """(id, "name (email)") pairs for active reviewers"""
+    exclude = set(exclude)
+    return [
+        (reviewer_id, f"{name} ({email})")
+        for reviewer_id, name, email in reference_cache.get(REVIEWERS)
+        if reviewer_id not in exclude
+    ]
+
+# Reviewer list attributes; other user changes (e.g. last_login) leave the cache alone
+REVIEWER_ATTRS = ('role', 'is_active', 'name', 'email')
+
+def _affects_reviewers(obj, new_or_deleted=False):
+    """Whether a user change can alter the reviewer list
+
+    Role changes always count because the previous role may not have been
+    loaded; other changes only count for users who are reviewers.
+    """
+    state = inspect(obj)
+    role = state.dict.get('role', UserRole.REVIEWER)
+    if new_or_deleted:
+        return role == UserRole.REVIEWER
+    if state.attrs.role.history.has_changes():
+        return True
+    return role == UserRole.REVIEWER and any(
+        state.attrs[name].history.has_changes() for name in REVIEWER_ATTRS
+    )
+
+def _changed_tables(session):
+    """Cached tables touched by the objects in a flush"""
+    tables = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Category):
+            tables.add(CATEGORIES)
+        elif isinstance(obj, Conference):
+            tables.add(CONFERENCES)
+        elif isinstance(obj, User) and _affects_reviewers(obj, new_or_deleted=True):
+            tables.add(REVIEWERS)
+
+    for obj in session.dirty:
+        if isinstance(obj, Category) and session.is_modified(obj):
+            tables.add(CATEGORIES)
+        elif isinstance(obj, Conference) and session.is_modified(obj):
+            tables.add(CONFERENCES)
+        elif isinstance(obj, User) and _affects_reviewers(obj):
+            tables.add(REVIEWERS)
+    return tables
+
+def bump_versions(session, tables):
+    """Advance the shared version of each table, creating rows as needed"""
+    for name in sorted(tables):
+        upsert_add(session, ReferenceDataVersion, {'name': name}, ReferenceDataVersion.version, 1)
+    session.info.setdefault('reference_changes', set()).update(tables)
+
+def _after_flush(session, flush_context):
+    tables = _changed_tables(session)
+    if tables:
+        bump_versions(session, tables)
+
+def _after_commit(session):
+    tables = session.info.pop('reference_changes', None)
+    if tables:
+        reference_cache.invalidate(*tables)
+
+def _after_rollback(session):
+    session.info.pop('reference_changes', None)
+
+def register_reference_listeners():
+    """Attach the cache invalidation hooks to the application session"""
+    for name, listener in (('after_flush', _after_flush),
+                           ('after_commit', _after_commit),
+                           ('after_rollback', _after_rollback)):
+        if not event.contains(db.session, name, listener):
+            event.listen(db.session, name, listener)
@@ -1,10 +1,16 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, send_file, abort, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, abort, jsonify, make_response
 from flask_login import login_required, current_user
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import selectinload, joinedload
 from app import db
-from app.models import Paper, Review, Conference, Category, User, PaperStatus, UserRole, ReviewRecommendation
+from app.models import Paper, Review, Conference, Category, User, PaperStatus, UserRole, ReviewRecommendation, paper_authors
 from app.forms import PaperSubmissionForm, ReviewForm, SearchForm, AffiliationForm
-from app.utils import save_file, get_file_path, paginate_query, is_deadline_approaching
+from app.utils import save_file, send_stored_file, paginate_query, paginate_listing, deadline_window
+from app.search import search_papers, search_snippets
+from app.instrumentation import query_budget
+from app.access import can_access, accessible_filter, AUTHOR
+from app.page_cache import cache_anonymous_page
+from app.fragment_cache import prefetch_misses
 from datetime import datetime
 import os
 
@@ -192,6 +198,7 @@ def init_db():
         }, 500
 
 @main.route('/')
+@cache_anonymous_page
 def index():
     """Homepage"""
     try:
@@ -200,6 +207,7 @@ def index():
         total_users = 0
         active_conferences = 0
         recent_papers = []
+        degraded = False
         
         try:
             total_papers = Paper.query.count()
@@ -208,14 +216,20 @@ def index():
             recent_papers = Paper.query.order_by(Paper.submission_date.desc()).limit(5).all()
         except Exception as db_error:
             current_app.logger.warning(f'Database query failed: {db_error}')
+            db.session.rollback()
+            degraded = True
             # Continue with default values
         
-        return render_template('index.html', 
+        response = make_response(render_template('index.html', 
                              title='PaperFlow CMS - Academic Paper Management',
                              total_papers=total_papers,
                              total_users=total_users,
                              active_conferences=active_conferences,
-                             recent_papers=recent_papers)
+                             recent_papers=recent_papers))
+        if degraded:
+            # The zeros are a stand-in; neither the page cache nor the CDN may keep them
+            response.headers['Cache-Control'] = 'no-store'
+        return response
     except Exception as e:
         current_app.logger.error(f'Index route error: {e}')
         return f'Error loading page: {str(e)}', 500
@@ -233,45 +247,89 @@ def dashboard():
 
 @main.route('/author/dashboard')
 @login_required
+@query_budget(8)
 def author_dashboard():
     """Author dashboard"""
     if current_user.role not in [UserRole.AUTHOR, UserRole.ADMIN]:
         abort(403)
     
-    # Get author's papers
-    papers = Paper.query.filter(Paper.authors.contains(current_user)).order_by(Paper.submission_date.desc()).all()
+    authored = Paper.query.join(paper_authors, paper_authors.c.paper_id == Paper.id).filter(
+        paper_authors.c.user_id == current_user.id
+    )
     
-    # Get statistics
+    # Statistics from one grouped count instead of loading every paper
+    counts = dict(
+        authored.with_entities(Paper.status, func.count(Paper.id)).group_by(Paper.status).all()
+    )
     stats = {
-        'total_papers': len(papers),
-        'accepted': len([p for p in papers if p.status == PaperStatus.ACCEPTED]),
-        'under_review': len([p for p in papers if p.status == PaperStatus.UNDER_REVIEW]),
-        'rejected': len([p for p in papers if p.status == PaperStatus.REJECTED])
+        'total_papers': sum(counts.values()),
+        'accepted': counts.get(PaperStatus.ACCEPTED, 0),
+        'under_review': counts.get(PaperStatus.UNDER_REVIEW, 0),
+        'rejected': counts.get(PaperStatus.REJECTED, 0)
     }
     
+    # One page of papers; the conference is loaded only for rows whose cached
+    # table row fragment is missing or out of date
+    pagination = paginate_listing(authored, (Paper.submission_date, Paper.id), descending=True, per_page=10)
+    
+    # Author counts for the page in one grouped query; they are part of the row
+    # key because adding a co-author does not touch last_updated
+    author_counts = dict(db.session.query(paper_authors.c.paper_id, func.count()).filter(
+        paper_authors.c.paper_id.in_([paper.id for paper in pagination.items])
+    ).group_by(paper_authors.c.paper_id).all()) if pagination.items else {}
+    prefetch_misses('author-paper-row', pagination.items,
+                    lambda paper: (paper.id, paper.last_updated, author_counts.get(paper.id, 0)),
+                    selectinload(Paper.conference))
+    
     return render_template('dashboard/author.html', 
                          title='Author Dashboard',
-                         papers=papers,
+                         papers=pagination.items,
+                         pagination=pagination,
+                         author_counts=author_counts,
                          stats=stats)
 
 @main.route('/reviewer/dashboard')
 @login_required
+@query_budget(6)
 def reviewer_dashboard():
     """Reviewer dashboard"""
     if current_user.role not in [UserRole.REVIEWER, UserRole.ADMIN]:
         abort(403)
     
-    # Get assigned reviews
-    assigned_reviews = Review.query.filter_by(reviewer_id=current_user.id, is_completed=False).all()
-    completed_reviews = Review.query.filter_by(reviewer_id=current_user.id, is_completed=True).order_by(Review.review_date.desc()).limit(10).all()
+    # Deadlines from today through the next 7 days, as is_deadline_approaching
+    window_start, window_end = deadline_window()
+    approaching = and_(
+        Review.is_completed == False,
+        Review.deadline >= window_start,
+        Review.deadline < window_end
+    )
     
-    # Get approaching deadlines
-    approaching_deadlines = [r for r in assigned_reviews if r.deadline and is_deadline_approaching(r.deadline)]
+    # All counts in one pass over the reviewer's assignments
+    pending, completed, approaching_count = db.session.query(
+        func.count(Review.id).filter(Review.is_completed == False),
+        func.count(Review.id).filter(Review.is_completed == True),
+        func.count(Review.id).filter(approaching)
+    ).filter(Review.reviewer_id == current_user.id).one()
+    
+    # Open assignments by deadline, flagged in SQL when the deadline is close
+    assignments = db.session.query(Review, approaching.label('approaching')).options(
+        joinedload(Review.paper)
+    ).filter(
+        Review.reviewer_id == current_user.id,
+        Review.is_completed == False
+    ).order_by(Review.deadline.asc().nulls_last(), Review.id).all()
+    assigned_reviews = [review for review, _ in assignments]
+    approaching_deadlines = [review for review, soon in assignments if soon]
+    
+    completed_reviews = Review.query.options(joinedload(Review.paper)).filter(
+        Review.reviewer_id == current_user.id,
+        Review.is_completed == True
+    ).order_by(Review.review_date.desc()).limit(10).all()
     
     stats = {
-        'pending_reviews': len(assigned_reviews),
-        'completed_reviews': Review.query.filter_by(reviewer_id=current_user.id, is_completed=True).count(),
-        'approaching_deadlines': len(approaching_deadlines)
+        'pending_reviews': pending,
+        'completed_reviews': completed,
+        'approaching_deadlines': approaching_count
     }
     
     return render_template('dashboard/reviewer.html',
@@ -308,7 +366,7 @@ def submit_paper():
         )
         
         # Add authors (include submitter)
-        paper.authors.append(current_user)
+        paper.authors.append(current_user.user)
         
         # Add categories
         for category_id in form.categories.data:
@@ -330,19 +388,13 @@ def paper_detail(id):
     """Paper detail view"""
     paper = Paper.query.get_or_404(id)
     
-    # Check access permissions
-    can_view = (
-        current_user.role == UserRole.ADMIN or
-        current_user in paper.authors or
-        Review.query.filter_by(paper_id=paper.id, reviewer_id=current_user.id).first()
-    )
-    
-    if not can_view:
+    # Only admins, authors and assigned reviewers open the detail page
+    if not can_access(current_user, paper, public=False):
         abort(403)
     
     # Get reviews if user is author or admin
     reviews = []
-    if current_user.role == UserRole.ADMIN or current_user in paper.authors:
+    if can_access(current_user, paper, kinds=[AUTHOR], public=False):
         reviews = Review.query.filter_by(paper_id=paper.id, is_completed=True).all()
     
     # Check if current user can review this paper
@@ -384,11 +436,12 @@ def submit_review(paper_id):
         review.confidential_comments = form.confidential_comments.data
         review.mark_completed()
         
-        # Update paper status if all reviews are completed
-        total_reviews = Review.query.filter_by(paper_id=paper_id).count()
-        completed_reviews = Review.query.filter_by(paper_id=paper_id, is_completed=True).count()
+        # Refresh stored review aggregates in the same transaction
+        Paper.refresh_review_aggregates([paper.id])
         
-        if completed_reviews >= paper.conference.reviews_per_paper:
+        # Update paper status if all reviews are completed
+        reviews_per_paper = paper.conference.reviews_per_paper if paper.conference else 3
+        if paper.completed_review_count >= reviews_per_paper:
             paper.status = PaperStatus.REVIEWED
         elif paper.status == PaperStatus.SUBMITTED:
             paper.status = PaperStatus.UNDER_REVIEW
@@ -415,13 +468,7 @@ def browse_papers():
     query = Paper.query
     
     # Apply filters from form
-    if request.args.get('query'):
-        search_term = f"%{request.args.get('query')}%"
-        query = query.filter(or_(
-            Paper.title.like(search_term),
-            Paper.abstract.like(search_term),
-            Paper.keywords.like(search_term)
-        ))
+    search = request.args.get('query', '')
     
     if request.args.get('conference_id'):
         query = query.filter_by(conference_id=request.args.get('conference_id', type=int))
@@ -434,33 +481,23 @@ def browse_papers():
         if category:
             query = query.filter(Paper.categories.contains(category))
     
-    # Apply role-based filtering
-    if current_user.role == UserRole.AUTHOR:
-        # Authors see their own papers and public accepted papers
-        query = query.filter(or_(
-            Paper.authors.contains(current_user),
-            Paper.status == PaperStatus.ACCEPTED
-        ))
-    elif current_user.role == UserRole.REVIEWER:
-        # Reviewers see papers they're assigned to review and public accepted papers
-        reviewed_paper_ids = [r.paper_id for r in Review.query.filter_by(reviewer_id=current_user.id).all()]
-        query = query.filter(or_(
-            Paper.id.in_(reviewed_paper_ids),
-            Paper.status == PaperStatus.ACCEPTED
-        ))
-    
-    # Order by submission date
-    query = query.order_by(Paper.submission_date.desc())
-    
-    # Paginate
-    pagination = paginate_query(query, page, per_page=10)
+    # Admins see everything, others their own and assigned papers plus public accepted ones
+    query = query.filter(accessible_filter(current_user))
+    
+    # Rank full-text matches by relevance, otherwise page by submission date
+    if search:
+        pagination = paginate_query(search_papers(query, search), page, per_page=10)
+    else:
+        pagination = paginate_listing(query, (Paper.submission_date, Paper.id), descending=True, per_page=10)
     papers = pagination.items
+    snippets = search_snippets([p.id for p in papers], search) if search else {}
     
     return render_template('papers/browse.html',
                          title='Browse Papers',
                          form=form,
                          papers=papers,
-                         pagination=pagination)
+                         pagination=pagination,
+                         snippets=snippets)
 
 @main.route('/download/<int:paper_id>')
 @login_required
@@ -469,24 +506,15 @@ def download_paper(paper_id):
     paper = Paper.query.get_or_404(paper_id)
     
     # Check access permissions
-    can_download = (
-        current_user.role == UserRole.ADMIN or
-        current_user in paper.authors or
-        Review.query.filter_by(paper_id=paper.id, reviewer_id=current_user.id).first() or
-        paper.status == PaperStatus.ACCEPTED
-    )
-    
-    if not can_download:
+    if not can_access(current_user, paper):
         abort(403)
     
     if not paper.file_path:
         abort(404)
     
-    file_path = get_file_path(paper.file_path)
-    if not os.path.exists(file_path):
-        abort(404)
-    
-    return send_file(file_path, as_attachment=True, download_name=f"{paper.title}.pdf")
+    # Remote files redirect to a signed URL, local files support ETag and Range
+    extension = os.path.splitext(paper.file_path.split('?', 1)[0])[1] or '.pdf'
+    return send_stored_file(paper.file_path, f"{paper.title}{extension}")
 
 @main.route('/profile', methods=['GET', 'POST'])
 @login_required
@@ -530,19 +558,25 @@ def paper_stats(paper_id):
     if current_user.role != UserRole.ADMIN and current_user not in paper.authors:
         abort(403)
     
-    reviews = Review.query.filter_by(paper_id=paper_id, is_completed=True).all()
+    # Recommendation counts are grouped in SQL, averages are stored on the paper
+    recommendation_counts = dict(
+        db.session.query(Review.recommendation, func.count(Review.id))
+        .filter_by(paper_id=paper_id, is_completed=True)
+        .group_by(Review.recommendation)
+        .all()
+    )
     
     stats = {
-        'total_reviews': len(reviews),
+        'total_reviews': paper.completed_review_count,
         'average_score': paper.average_score,
         'score_breakdown': {
-            'technical_quality': sum(r.technical_quality for r in reviews) / len(reviews) if reviews else 0,
-            'novelty': sum(r.novelty for r in reviews) / len(reviews) if reviews else 0,
-            'clarity': sum(r.clarity for r in reviews) / len(reviews) if reviews else 0,
-            'significance': sum(r.significance for r in reviews) / len(reviews) if reviews else 0,
+            'technical_quality': paper.avg_technical_quality or 0,
+            'novelty': paper.avg_novelty or 0,
+            'clarity': paper.avg_clarity or 0,
+            'significance': paper.avg_significance or 0,
         },
         'recommendations': {
-            rec.value: len([r for r in reviews if r.recommendation == rec])
+            rec.value: recommendation_counts.get(rec, 0)
             for rec in ReviewRecommendation
         }
     }
@@ -0,0 +1,160 @@
+"""
+Full-text search over papers
+
+PostgreSQL keeps a generated `search_vector` tsvector column behind a GIN
+index; SQLite keeps an FTS5 shadow table in step through triggers. Both are
+updated by the database itself on insert and update, so bulk writes stay in
+sync too. Other databases fall back to LIKE matching.
+"""
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, Float, Integer, event, func, literal_column, or_, text
+from app import db
+from app.models import Paper
+
+TS_CONFIG = 'english'
+MAX_TERMS = 16
+
+# Markers wrapped around matched terms before the snippet is escaped
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('{TS_CONFIG}', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('{TS_CONFIG}', coalesce(keywords, '')), 'B') ||
+            setweight(to_tsvector('{TS_CONFIG}', coalesce(abstract, '')), 'C')
+        ) STORED""",
+    "CREATE INDEX IF NOT EXISTS idx_papers_search_vector ON papers USING GIN (search_vector)",
+]
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+        title, keywords, abstract,
+        content='papers', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    # Weight title and keyword hits above abstract hits when ranking
+    "INSERT INTO papers_fts(papers_fts, rank) VALUES('rank', 'bm25(10.0, 5.0, 1.0)')",
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+        INSERT INTO papers_fts(rowid, title, keywords, abstract)
+        VALUES (new.id, new.title, new.keywords, new.abstract);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, keywords, abstract)
+        VALUES ('delete', old.id, old.title, old.keywords, old.abstract);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE OF title, keywords, abstract ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title, keywords, abstract)
+        VALUES ('delete', old.id, old.title, old.keywords, old.abstract);
+        INSERT INTO papers_fts(rowid, title, keywords, abstract)
+        VALUES (new.id, new.title, new.keywords, new.abstract);
+    END""",
+]
+
+_create_hooks = [
+    DDL(statement).execute_if(dialect=dialect)
+    for dialect, statements in (('postgresql', POSTGRES_DDL), ('sqlite', SQLITE_DDL))
+    for statement in statements
+]
+
+def register_search_index():
+    """Create the search structures whenever the papers table is created"""
+    for ddl in _create_hooks:
+        if not event.contains(Paper.__table__, 'after_create', ddl):
+            event.listen(Paper.__table__, 'after_create', ddl)
+
+def rebuild_search_index():
+    """Create missing search structures on an existing database and reindex"""
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        # The generated column is filled in by PostgreSQL when it is added
+        for statement in POSTGRES_DDL:
+            db.session.execute(text(statement))
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO papers_fts(papers_fts) VALUES('rebuild')"))
+    else:
+        return False
+    db.session.commit()
+    return True
+
+def _dialect():
+    return db.engine.dialect.name
+
+def _terms(search):
+    """Split user input into safe search terms"""
+    return re.findall(r'\w+', (search or '').lower())[:MAX_TERMS]
+
+def _tsquery(terms):
+    return func.to_tsquery(TS_CONFIG, ' & '.join(f'{term}:*' for term in terms))
+
+def _fts_match(terms):
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def search_papers(query, search):
+    """Restrict a Paper query to full-text matches, best matches first
+
+    Input without any search terms (only punctuation, say) filters nothing
+    and keeps the listing's newest-first order, so pages stay stable.
+    """
+    terms = _terms(search)
+    if not terms:
+        return query.order_by(Paper.submission_date.desc(), Paper.id.desc())
+
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        vector = literal_column('papers.search_vector')
+        tsquery = _tsquery(terms)
+        return query.filter(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank_cd(vector, tsquery).desc(), Paper.id.desc()
+        )
+
+    if dialect == 'sqlite':
+        matches = text(
+            "SELECT rowid, rank FROM papers_fts WHERE papers_fts MATCH :match"
+        ).bindparams(match=_fts_match(terms)).columns(rowid=Integer, rank=Float).subquery('fts')
+        return query.join(matches, matches.c.rowid == Paper.id).order_by(
+            matches.c.rank, Paper.id.desc()
+        )
+
+    # No full-text support for this database, fall back to pattern matching
+    search_term = f"%{search}%"
+    return query.filter(or_(
+        Paper.title.like(search_term),
+        Paper.abstract.like(search_term),
+        Paper.keywords.like(search_term)
+    )).order_by(Paper.submission_date.desc(), Paper.id.desc())
+
+def _render_snippet(raw):
+    """Escape a snippet and turn the highlight markers into <mark> tags"""
+    html = str(escape(raw or ''))
+    return Markup(html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
+
+def search_snippets(paper_ids, search):
+    """Highlighted abstract snippets for a page of search results"""
+    terms = _terms(search)
+    paper_ids = list(paper_ids)
+    if not terms or not paper_ids:
+        return {}
+
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MaxWords=30, MinWords=10'
+        rows = db.session.query(
+            Paper.id, func.ts_headline(TS_CONFIG, Paper.abstract, _tsquery(terms), options)
+        ).filter(Paper.id.in_(paper_ids))
+    elif dialect == 'sqlite':
+        rows = db.session.execute(
+            text(
+                "SELECT rowid, snippet(papers_fts, -1, :start, :stop, '…', 24) FROM papers_fts "
+                "WHERE papers_fts MATCH :match AND rowid IN (SELECT value FROM json_each(:ids))"
+            ),
+            {'start': HIGHLIGHT_START, 'stop': HIGHLIGHT_STOP,
+             'match': _fts_match(terms), 'ids': str(paper_ids)}
+        )
+    else:
+        return {}
+
+    return {paper_id: _render_snippet(snippet) for paper_id, snippet in rows}
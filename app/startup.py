@@ -0,0 +1,62 @@
+"""
+Cold-start profiling
+
+Runs `create_app` in a fresh interpreter with `-X importtime` and summarises
+where the startup time goes, so the cost of serverless cold starts can be
+tracked as dependencies change.
+"""
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+PROBE = (
+    "import time\n"
+    "started = time.perf_counter()\n"
+    "from app import create_app\n"
+    "imported = time.perf_counter()\n"
+    "create_app({config_name!r})\n"
+    "finished = time.perf_counter()\n"
+    "print(imported - started, finished - imported)\n"
+)
+
+def _parse_importtime(output):
+    """(module, self_us, cumulative_us) for each line of -X importtime output"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+def profile_startup(config_name=None):
+    """Time a cold create_app and attribute import time to packages and app modules"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(config_name=config_name)],
+        cwd=root, capture_output=True, text=True, check=True
+    )
+    import_seconds, init_seconds = (float(value) for value in result.stdout.split()[-2:])
+    modules = _parse_importtime(result.stderr)
+
+    # Self time summed per top-level package is what each dependency costs on its own
+    packages = defaultdict(lambda: [0, 0])
+    for name, self_us, _ in modules:
+        package = packages[name.split('.')[0]]
+        package[0] += self_us
+        package[1] += 1
+
+    return {
+        'import_ms': import_seconds * 1000,
+        'init_ms': init_seconds * 1000,
+        'packages': sorted(
+            ((name, self_us / 1000, count) for name, (self_us, count) in packages.items()),
+            key=lambda row: row[1], reverse=True
+        ),
+        'app_modules': sorted(
+            ((name, self_us / 1000, cumulative_us / 1000) for name, self_us, cumulative_us in modules
+             if name == 'app' or name.startswith('app.')),
+            key=lambda row: row[2], reverse=True
+        ),
+    }
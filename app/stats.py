@@ -0,0 +1,235 @@
+"""
+Statistics rollup for the admin dashboard
+
+Counts by role, status and review state are kept in small summary tables
+that are updated in the same transaction as the rows they describe, so the
+dashboard never has to scan users, papers or reviews.
+"""
+from collections import defaultdict
+from datetime import datetime, date, timedelta
+from sqlalchemy import event, func, inspect, insert, delete
+from app import db
+from app.utils import upsert_add
+from app.models import (User, Paper, Review, Conference, StatsCounter,
+                        DailySubmissionStat, UserRole, PaperStatus, ConferenceStatus)
+
+# Counter metrics stored in stats_counters
+USERS_BY_ROLE = 'users_by_role'
+PAPERS_BY_STATUS = 'papers_by_status'
+REVIEWS_BY_STATE = 'reviews_by_state'
+PENDING_BY_DEADLINE = 'pending_reviews_by_deadline'
+CONFERENCES_BY_STATUS = 'conferences_by_status'
+
+def _enum_value(value):
+    """Normalize enum members and raw strings to their stored value"""
+    return getattr(value, 'value', value)
+
+def _day(value):
+    """Truncate a datetime (or ISO string from SQLite) to a date"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+def _user_keys(values):
+    return [(StatsCounter, (USERS_BY_ROLE, _enum_value(values['role'])))]
+
+def _paper_keys(values):
+    keys = [(StatsCounter, (PAPERS_BY_STATUS, _enum_value(values['status'])))]
+    if values['submission_date'] is not None:
+        keys.append((DailySubmissionStat, (_day(values['submission_date']), values['conference_name'])))
+    return keys
+
+def _review_keys(values):
+    if values['is_completed']:
+        return [(StatsCounter, (REVIEWS_BY_STATE, 'completed'))]
+    keys = [(StatsCounter, (REVIEWS_BY_STATE, 'pending'))]
+    if values['deadline'] is not None:
+        keys.append((StatsCounter, (PENDING_BY_DEADLINE, _day(values['deadline']).isoformat())))
+    return keys
+
+def _conference_keys(values):
+    return [(StatsCounter, (CONFERENCES_BY_STATUS, _enum_value(values['status'])))]
+
+# Tracked models: attributes that feed the rollup and how they map to keys
+TRACKED_MODELS = {
+    User: (('role',), _user_keys),
+    Paper: (('status', 'submission_date', 'conference_name'), _paper_keys),
+    Review: (('is_completed', 'deadline'), _review_keys),
+    Conference: (('status',), _conference_keys),
+}
+
+def _snapshot(obj, attrs, previous=False):
+    """Read tracked attribute values, either as flushed or as they were before"""
+    state = inspect(obj)
+    values = {}
+    for name in attrs:
+        history = state.attrs[name].history
+        if previous and history.deleted:
+            values[name] = history.deleted[0]
+        elif previous and history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = state.attrs[name].value
+    return values
+
+def collect_deltas(session):
+    """Compute rollup deltas for the objects pending in a flush"""
+    deltas = defaultdict(int)
+
+    def add(obj, sign, previous=False):
+        attrs, key_func = TRACKED_MODELS[type(obj)]
+        for key in key_func(_snapshot(obj, attrs, previous)):
+            deltas[key] += sign
+
+    for obj in session.new:
+        if type(obj) in TRACKED_MODELS:
+            add(obj, 1)
+
+    for obj in session.deleted:
+        if type(obj) in TRACKED_MODELS:
+            add(obj, -1, previous=True)
+
+    for obj in session.dirty:
+        if type(obj) not in TRACKED_MODELS:
+            continue
+        attrs = TRACKED_MODELS[type(obj)][0]
+        state = inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in attrs):
+            add(obj, -1, previous=True)
+            add(obj, 1)
+
+    return {key: delta for key, delta in deltas.items() if delta}
+
+def apply_deltas(session, deltas):
+    """Add deltas to the summary rows, creating rows that do not exist yet"""
+    for (model, key), delta in deltas.items():
+        if model is StatsCounter:
+            upsert_add(session, StatsCounter, {'metric': key[0], 'dimension': key[1]}, StatsCounter.value, delta)
+        else:
+            upsert_add(session, DailySubmissionStat, {'day': key[0], 'conference_name': key[1]},
+                       DailySubmissionStat.count, delta)
+
+def deltas_for_rows(model, rows):
+    """Rollup deltas for new rows written with bulk statements
+
+    Rows are plain dicts as passed to insert(); tracked attributes they
+    leave out count as None.
+    """
+    attrs, key_func = TRACKED_MODELS[model]
+    deltas = defaultdict(int)
+    for row in rows:
+        for key in key_func({name: row.get(name) for name in attrs}):
+            deltas[key] += 1
+    return dict(deltas)
+
+def _after_flush(session, flush_context):
+    """Session hook keeping the rollup in step with tracked model changes"""
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session, deltas)
+
+def register_stats_listeners():
+    """Attach the rollup maintenance hook to the application session"""
+    if not event.contains(db.session, 'after_flush', _after_flush):
+        event.listen(db.session, 'after_flush', _after_flush)
+
+def rebuild_stats():
+    """Recompute every rollup row from the base tables"""
+    session = db.session
+    session.execute(delete(StatsCounter))
+    session.execute(delete(DailySubmissionStat))
+
+    counters = []
+    for role, count in session.query(User.role, func.count(User.id)).group_by(User.role):
+        counters.append({'metric': USERS_BY_ROLE, 'dimension': _enum_value(role), 'value': count})
+
+    for status, count in session.query(Paper.status, func.count(Paper.id)).group_by(Paper.status):
+        counters.append({'metric': PAPERS_BY_STATUS, 'dimension': _enum_value(status), 'value': count})
+
+    for status, count in session.query(Conference.status, func.count(Conference.id)).group_by(Conference.status):
+        counters.append({'metric': CONFERENCES_BY_STATUS, 'dimension': _enum_value(status), 'value': count})
+
+    completed = func.coalesce(Review.is_completed, False)
+    for is_completed, count in session.query(completed, func.count(Review.id)).group_by(completed):
+        counters.append({'metric': REVIEWS_BY_STATE,
+                         'dimension': 'completed' if is_completed else 'pending',
+                         'value': count})
+
+    deadline_day = func.date(Review.deadline)
+    pending_by_day = session.query(deadline_day, func.count(Review.id)).filter(
+        Review.is_completed.isnot(True),
+        Review.deadline.isnot(None)
+    ).group_by(deadline_day)
+    for day, count in pending_by_day:
+        counters.append({'metric': PENDING_BY_DEADLINE, 'dimension': _day(day).isoformat(), 'value': count})
+
+    submission_day = func.date(Paper.submission_date)
+    daily = [
+        {'day': _day(day), 'conference_name': conference_name, 'count': count}
+        for day, conference_name, count in session.query(
+            submission_day, Paper.conference_name, func.count(Paper.id)
+        ).filter(Paper.submission_date.isnot(None)).group_by(submission_day, Paper.conference_name)
+    ]
+
+    if counters:
+        session.execute(insert(StatsCounter), counters)
+    if daily:
+        session.execute(insert(DailySubmissionStat), daily)
+    session.commit()
+
+    return {'counters': len(counters), 'daily_rows': len(daily)}
+
+def get_counters():
+    """Load all rollup counters as {metric: {dimension: value}}"""
+    counters = defaultdict(dict)
+    for row in StatsCounter.query.all():
+        counters[row.metric][row.dimension] = row.value
+    return counters
+
+def dashboard_summary(today=None):
+    """Headline numbers for the admin dashboard, read from the rollup"""
+    today = today or datetime.now().date()
+    counters = get_counters()
+
+    users_by_role = counters[USERS_BY_ROLE]
+    papers_by_status = counters[PAPERS_BY_STATUS]
+    reviews_by_state = counters[REVIEWS_BY_STATE]
+
+    # Overdue reviews are tracked per deadline day, so a review becomes overdue
+    # the day after its deadline
+    overdue = sum(
+        count for day, count in counters[PENDING_BY_DEADLINE].items()
+        if day < today.isoformat()
+    )
+
+    return {
+        'total_users': sum(users_by_role.values()),
+        'total_papers': sum(papers_by_status.values()),
+        'total_reviews': reviews_by_state.get('completed', 0),
+        'active_conferences': counters[CONFERENCES_BY_STATUS].get(ConferenceStatus.ACTIVE.value, 0),
+        'user_stats': [(role, users_by_role[role.value]) for role in UserRole if users_by_role.get(role.value)],
+        'paper_stats': [(status, papers_by_status[status.value]) for status in PaperStatus if papers_by_status.get(status.value)],
+        'pending_reviews': reviews_by_state.get('pending', 0),
+        'overdue_reviews': overdue,
+    }
+
+def monthly_submissions(months=12, today=None):
+    """Submissions per month over the last `months` months, oldest first"""
+    today = today or datetime.now().date()
+    since = today - timedelta(days=months * 365 // 12)
+
+    totals = defaultdict(int)
+    rows = db.session.query(DailySubmissionStat.day, DailySubmissionStat.count).filter(
+        DailySubmissionStat.day >= since
+    )
+    for day, count in rows:
+        totals[(day.year, day.month)] += count
+
+    return [
+        {'year': year, 'month': month, 'count': totals[(year, month)]}
+        for year, month in sorted(totals)
+    ]
@@ -2,81 +2,302 @@
 Supabase integration utilities for Paper-CMS
 """
 import os
-from supabase import create_client, Client
+import time
+import base64
+import hashlib
+import threading
+from collections import namedtuple
+from urllib.parse import urljoin, quote
 from flask import current_app
 import tempfile
 from werkzeug.utils import secure_filename
+from app.metrics import record_upload
+
+# Where an upload ended up, how large it was and its SHA-256 hex digest
+UploadResult = namedtuple('UploadResult', ['location', 'size', 'sha256'])
+
+def _stream_size(stream):
+    """Size of a seekable stream, leaving it rewound"""
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+def _hashing_chunks(stream, chunk_size, digest):
+    """Yield fixed-size chunks from a stream while feeding them to a hash"""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        yield chunk
 
 class SupabaseClient:
     """Supabase client wrapper for Paper-CMS"""
     
     def __init__(self):
-        self.client: Client = None
+        self._client = None
+        self._credentials = None
         self.storage_bucket = None
+        self.storage_url = None
+        self.storage_key = None
+        self.signing_key = None
+        self.signed_url_expires = 300
+        self._signed_urls = {}
+        self._signed_urls_lock = threading.Lock()
+        self.upload_folder = os.path.join('/tmp', 'uploads')
+        self.chunk_size = 256 * 1024
+        self.resumable_threshold = 6 * 1024 * 1024
+        self.resumable_chunk_size = 6 * 1024 * 1024
+        self.upload_retries = 3
     
     def init_app(self, app):
         """Initialize Supabase client with Flask app"""
         supabase_url = app.config.get('SUPABASE_URL')
         supabase_key = app.config.get('SUPABASE_KEY') or app.config.get('SUPABASE_ANON_KEY')
         
+        # Streaming uploads talk to the Storage API directly
+        self.upload_folder = app.config.get('UPLOAD_FOLDER') or self.upload_folder
+        self.chunk_size = app.config.get('UPLOAD_CHUNK_SIZE', self.chunk_size)
+        self.resumable_threshold = app.config.get('RESUMABLE_UPLOAD_THRESHOLD', self.resumable_threshold)
+        self.resumable_chunk_size = app.config.get('RESUMABLE_UPLOAD_CHUNK_SIZE', self.resumable_chunk_size)
+        self.upload_retries = app.config.get('UPLOAD_RETRIES', self.upload_retries)
+        self.storage_bucket = app.config.get('SUPABASE_STORAGE_BUCKET', 'papers')
+        self.signed_url_expires = app.config.get('DOWNLOAD_URL_EXPIRES', self.signed_url_expires)
+        
         if supabase_url and supabase_key:
-            try:
-                self.client = create_client(supabase_url, supabase_key)
-                self.storage_bucket = app.config.get('SUPABASE_STORAGE_BUCKET', 'papers')
-                app.logger.info('Supabase client initialized successfully')
-            except Exception as e:
-                app.logger.warning(f'Failed to initialize Supabase client: {e}. Using local storage.')
-                self.client = None
+            self.storage_url = f"{supabase_url.rstrip('/')}/storage/v1"
+            self.storage_key = supabase_key
+            # Signing needs read access to private buckets, which the service key has
+            self.signing_key = app.config.get('SUPABASE_SERVICE_KEY') or supabase_key
+            # The SDK is slow to import, so the client is only built on first use
+            self._client = None
+            self._credentials = (supabase_url, supabase_key)
+            app.logger.info('Supabase storage configured')
         else:
             app.logger.warning('Supabase credentials not found, using local storage')
     
+    @property
+    def client(self):
+        """Supabase SDK client, created on first use"""
+        if self._client is None and self._credentials:
+            try:
+                from supabase import create_client
+                self._client = create_client(*self._credentials)
+            except Exception as e:
+                current_app.logger.warning(f'Failed to initialize Supabase client: {e}. Using local storage.')
+                self._credentials = None
+        return self._client
+    
     def upload_file(self, file, folder_path='papers'):
         """Upload file to Supabase Storage"""
-        if not self.client:
-            return self._save_local_file(file, folder_path)
+        result = self.upload_stream(file, folder_path)
+        return result.location if result else None
+    
+    def upload_stream(self, file, folder_path='papers'):
+        """Stream an uploaded file to Supabase Storage in fixed-size chunks
+        
+        Peak memory stays around one chunk regardless of file size. Falls back
+        to local storage, written with the same chunk loop, when Supabase is
+        not configured or the upload fails.
+        """
+        stream = getattr(file, 'stream', file)
+        filename = secure_filename(file.filename)
+        started = time.perf_counter()
+        
+        if self.storage_url:
+            try:
+                result = self._upload_remote(stream, f"{folder_path}/{filename}", file.content_type)
+                record_upload('supabase', result.size, time.perf_counter() - started)
+                return result
+            except Exception as e:
+                current_app.logger.error(f"Supabase upload error: {e}")
+                stream.seek(0)
+        
+        result = self._save_local_file(file, folder_path)
+        if result:
+            record_upload('local', result.size, time.perf_counter() - started)
+        return result
+    
+    def _auth_headers(self, key=None):
+        key = key or self.storage_key
+        return {
+            'Authorization': f'Bearer {key}',
+            'apikey': key
+        }
+    
+    def _upload_remote(self, stream, object_path, content_type):
+        """Send a stream to the Storage API, resumably when it is large"""
+        import httpx
+        
+        size = _stream_size(stream)
+        digest = hashlib.sha256()
+        content_type = content_type or 'application/octet-stream'
+        
+        with httpx.Client(timeout=httpx.Timeout(30.0, write=120.0)) as http:
+            if size > self.resumable_threshold:
+                self._upload_resumable(http, stream, size, object_path, content_type, digest)
+            else:
+                response = http.post(
+                    f"{self.storage_url}/object/{self.storage_bucket}/{object_path}",
+                    content=_hashing_chunks(stream, self.chunk_size, digest),
+                    headers={
+                        **self._auth_headers(),
+                        'Content-Type': content_type,
+                        'Content-Length': str(size),
+                        'Cache-Control': 'max-age=3600',
+                        'x-upsert': 'false'
+                    }
+                )
+                response.raise_for_status()
+        
+        current_app.logger.info(f"Uploaded {object_path} ({size} bytes, sha256 {digest.hexdigest()})")
+        return UploadResult(self.public_url(object_path), size, digest.hexdigest())
+    
+    def _upload_resumable(self, http, stream, size, object_path, content_type, digest):
+        """Upload with the TUS resumable protocol, resuming failed chunks"""
+        import httpx
+        
+        def encode(value):
+            return base64.b64encode(value.encode()).decode()
+        
+        endpoint = f"{self.storage_url}/upload/resumable"
+        tus_headers = {**self._auth_headers(), 'Tus-Resumable': '1.0.0'}
+        metadata = {
+            'bucketName': self.storage_bucket,
+            'objectName': object_path,
+            'contentType': content_type,
+            'cacheControl': '3600'
+        }
+        response = http.post(endpoint, headers={
+            **tus_headers,
+            'Upload-Length': str(size),
+            'Upload-Metadata': ','.join(f'{key} {encode(value)}' for key, value in metadata.items()),
+            'x-upsert': 'false'
+        })
+        response.raise_for_status()
+        location = urljoin(endpoint, response.headers['Location'])
+        
+        offset = 0
+        hashed = 0
+        failures = 0
+        
+        def read_range(start, length):
+            """Stream one TUS chunk from the file, hashing bytes the first time they are read"""
+            nonlocal hashed
+            stream.seek(start)
+            position = start
+            while position < start + length:
+                piece = stream.read(min(self.chunk_size, start + length - position))
+                if not piece:
+                    break
+                if position + len(piece) > hashed:
+                    digest.update(memoryview(piece)[hashed - position:])
+                    hashed = position + len(piece)
+                position += len(piece)
+                yield piece
+        
+        while offset < size:
+            length = min(self.resumable_chunk_size, size - offset)
+            try:
+                response = http.patch(location, content=read_range(offset, length), headers={
+                    **tus_headers,
+                    'Upload-Offset': str(offset),
+                    'Content-Length': str(length),
+                    'Content-Type': 'application/offset+octet-stream'
+                })
+                response.raise_for_status()
+                offset = int(response.headers['Upload-Offset'])
+                failures = 0
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                failures += 1
+                if failures > self.upload_retries:
+                    raise
+                current_app.logger.warning(f"Resumable upload chunk failed at {offset}: {e}, resuming")
+                response = http.head(location, headers=tus_headers)
+                response.raise_for_status()
+                offset = int(response.headers['Upload-Offset'])
+    
+    def public_url(self, object_path):
+        """Public URL of an object in the storage bucket"""
+        return f"{self.storage_url}/object/public/{self.storage_bucket}/{object_path}"
+    
+    def object_path(self, location):
+        """Bucket object path for a stored file URL, or None if it is not in our bucket"""
+        if not self.storage_url or not location:
+            return None
+        for prefix in (f"{self.storage_url}/object/public/{self.storage_bucket}/",
+                       f"{self.storage_url}/object/{self.storage_bucket}/"):
+            if location.startswith(prefix):
+                return location[len(prefix):].split('?', 1)[0]
+        return None
+    
+    def signed_url(self, object_path, download_name=None):
+        """Short-lived signed download URL for an object, or None if signing fails
+        
+        Signed URLs are reused until half of their lifetime has passed, so
+        repeated downloads of the same file redirect to the same URL and the
+        browser cache keeps working.
+        """
+        if not self.storage_url:
+            return None
+        
+        cache_key = (object_path, download_name)
+        now = time.monotonic()
+        with self._signed_urls_lock:
+            cached = self._signed_urls.get(cache_key)
+            if cached and cached[1] > now:
+                return cached[0]
+        
+        import httpx
         
         try:
-            filename = secure_filename(file.filename)
-            file_path = f"{folder_path}/{filename}"
-            
-            # Read file content
-            file_content = file.read()
-            file.seek(0)  # Reset file pointer
-            
-            # Upload to Supabase Storage
-            result = self.client.storage.from_(self.storage_bucket).upload(
-                path=file_path,
-                file=file_content,
-                file_options={
-                    "content-type": file.content_type,
-                    "cache-control": "3600"
-                }
+            response = httpx.post(
+                f"{self.storage_url}/object/sign/{self.storage_bucket}/{quote(object_path)}",
+                json={'expiresIn': self.signed_url_expires},
+                headers=self._auth_headers(self.signing_key),
+                timeout=10.0
             )
-            
-            if result.status_code == 200:
-                # Get public URL
-                public_url = self.client.storage.from_(self.storage_bucket).get_public_url(file_path)
-                return public_url
-            else:
-                current_app.logger.error(f"Failed to upload file: {result}")
-                return self._save_local_file(file, folder_path)
-                
-        except Exception as e:
-            current_app.logger.error(f"Supabase upload error: {e}")
-            return self._save_local_file(file, folder_path)
+            response.raise_for_status()
+            signed = response.json().get('signedURL') or response.json().get('signedUrl')
+        except (httpx.HTTPError, ValueError) as e:
+            current_app.logger.error(f"Error signing {object_path}: {e}")
+            return None
+        if not signed:
+            return None
+        
+        url = urljoin(f"{self.storage_url}/", signed.lstrip('/'))
+        if download_name:
+            url += f"&download={quote(download_name)}"
+        
+        with self._signed_urls_lock:
+            # Drop expired entries so the cache only holds live URLs
+            self._signed_urls = {k: v for k, v in self._signed_urls.items() if v[1] > now}
+            self._signed_urls[cache_key] = (url, now + self.signed_url_expires / 2)
+        return url
     
     def _save_local_file(self, file, folder_path):
         """Fallback to local file storage"""
         try:
-            # Create temp directory if it doesn't exist
-            temp_dir = os.path.join('/tmp', 'uploads', folder_path)
-            os.makedirs(temp_dir, exist_ok=True)
+            # Create upload directory if it doesn't exist
+            target_dir = os.path.join(self.upload_folder, folder_path)
+            os.makedirs(target_dir, exist_ok=True)
             
             filename = secure_filename(file.filename)
-            file_path = os.path.join(temp_dir, filename)
-            file.save(file_path)
+            file_path = os.path.join(target_dir, filename)
+            
+            # Write through a temporary file so readers never see partial uploads
+            stream = getattr(file, 'stream', file)
+            stream.seek(0)
+            digest = hashlib.sha256()
+            size = 0
+            with tempfile.NamedTemporaryFile(dir=target_dir, delete=False) as out:
+                for chunk in _hashing_chunks(stream, self.chunk_size, digest):
+                    out.write(chunk)
+                    size += len(chunk)
+            os.replace(out.name, file_path)
             
-            return file_path
+            return UploadResult(file_path, size, digest.hexdigest())
         except Exception as e:
             current_app.logger.error(f"Local file save error: {e}")
             return None
@@ -106,15 +327,11 @@ class SupabaseClient:
     
     def get_file_url(self, file_path):
         """Get public URL for file"""
-        if not self.client:
+        if not self.storage_url:
             return file_path  # Return local path
         
-        try:
-            public_url = self.client.storage.from_(self.storage_bucket).get_public_url(file_path)
-            return public_url
-        except Exception as e:
-            current_app.logger.error(f"Error getting file URL: {e}")
-            return file_path
+        # Public URLs follow a fixed layout, no SDK round trip needed
+        return self.public_url(file_path)
 
 # Global Supabase client instance
 supabase_client = SupabaseClient()
\ No newline at end of file
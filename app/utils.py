@@ -1,25 +1,38 @@
 import os
+import json
 import secrets
-from datetime import datetime, timedelta
-from flask import current_app, render_template
-from flask_mail import Message
+from datetime import datetime, date, timedelta
+from flask import current_app, render_template, request, abort, redirect, send_file
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from app import mail, db
 from app.models import User
-import jwt  # PyJWT
 from werkzeug.utils import secure_filename
 
-def send_email(to, subject, template, **kwargs):
-    """Send email using Flask-Mail"""
+def send_email(to, subject, template, async_send=None, **kwargs):
+    """Send email using Flask-Mail, or queue it for the mail worker in async mode"""
+    html = render_template(f'{template}.html', **kwargs)
+    if async_send is None:
+        async_send = current_app.config.get('MAIL_ASYNC', False)
+    
+    if async_send:
+        from app.mail_queue import enqueue_email
+        return enqueue_email(to, subject, html)
+    
+    from flask_mail import Message
     msg = Message(
         subject=subject,
         recipients=[to],
-        html=render_template(f'{template}.html', **kwargs),
+        html=html,
         sender=current_app.config['MAIL_DEFAULT_SENDER']
     )
     mail.send(msg)
 
 def generate_reset_token(user, expires_in=600):
     """Generate password reset token"""
+    import jwt  # PyJWT, imported on first use to keep cold starts fast
     payload = {
         'user_id': user.id,
         'exp': datetime.utcnow() + timedelta(seconds=expires_in)
@@ -28,6 +41,7 @@ def generate_reset_token(user, expires_in=600):
 
 def verify_reset_token(token):
     """Verify password reset token"""
+    import jwt
     try:
         payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
         user_id = payload['user_id']
@@ -87,6 +101,30 @@ def get_file_path(relative_path):
             return os.path.join(current_app.config['UPLOAD_FOLDER'], relative_path)
         return relative_path
 
+def send_stored_file(location, download_name):
+    """Serve a stored file: signed redirect for Supabase objects, conditional response for local files"""
+    from app.supabase_utils import supabase_client
+    
+    if location.startswith('http'):
+        object_path = supabase_client.object_path(location)
+        url = supabase_client.signed_url(object_path, download_name) if object_path else None
+        response = redirect(url or location)
+        # Let the browser reuse the redirect for part of the signed URL lifetime
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['DOWNLOAD_URL_EXPIRES'] // 2 if url else 0
+        return response
+    
+    if not os.path.isabs(location):
+        location = os.path.join(current_app.config['UPLOAD_FOLDER'], location)
+    if not os.path.isfile(location):
+        abort(404)
+    
+    # ETag/Last-Modified give 304s on re-download, and Range requests are honoured
+    response = send_file(location, as_attachment=True, download_name=download_name, conditional=True, etag=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
 def delete_file(file_path):
     """Delete file from Supabase Storage or local storage"""
     try:
@@ -203,6 +241,11 @@ def is_deadline_approaching(target_date, days_threshold=7):
     days_until = calculate_days_until(target_date)
     return days_until is not None and 0 <= days_until <= days_threshold
 
+def deadline_window(days_threshold=7):
+    """Datetime bounds [start, end) matching is_deadline_approaching, for SQL filters"""
+    start = datetime.combine(datetime.now().date(), datetime.min.time())
+    return start, start + timedelta(days=days_threshold + 1)
+
 def paginate_query(query, page, per_page=10):
     """Paginate SQLAlchemy query"""
     return query.paginate(
@@ -211,6 +254,165 @@ def paginate_query(query, page, per_page=10):
         error_out=False
     )
 
+class KeysetPagination:
+    """Cursor-based page of results, usable wherever a Pagination object is"""
+    
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+    
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+    
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+    
+    def __iter__(self):
+        return iter(self.items)
+
+def _cursor_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='pagination-cursor')
+
+def encode_cursor(columns, item, direction):
+    """Build an opaque token pointing just past `item` in the given direction"""
+    values = []
+    for column in columns:
+        value = getattr(item, column.key)
+        values.append(value.isoformat() if isinstance(value, (datetime, date)) else value)
+    return _cursor_serializer().dumps({'k': values, 'd': direction})
+
+def decode_cursor(columns, token):
+    """Decode a cursor token into (key values, direction)"""
+    data = _cursor_serializer().loads(token)
+    if len(data.get('k', [])) != len(columns) or data.get('d') not in ('next', 'prev'):
+        raise BadSignature('Malformed pagination cursor')
+    
+    values = []
+    for column, value in zip(columns, data['k']):
+        python_type = column.type.python_type
+        if value is not None and python_type is datetime:
+            value = datetime.fromisoformat(value)
+        elif value is not None and python_type is date:
+            value = date.fromisoformat(value)
+        values.append(value)
+    return values, data['d']
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN of a statement, executed like the statement itself
+    
+    Going through the normal execution path expands IN lists and runs the
+    bind processors (enums, dates), which a raw driver call would skip.
+    """
+    inherit_cache = False
+    
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    return f'EXPLAIN {compiler.process(element.statement, **kw)}'
+
+@compiles(Explain, 'postgresql')
+def _compile_explain_postgresql(element, compiler, **kw):
+    return f'EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kw)}'
+
+def estimate_count(query):
+    """Row estimate from the PostgreSQL planner, exact count elsewhere"""
+    if db.engine.dialect.name != 'postgresql':
+        return query.order_by(None).count()
+    
+    plan = db.session.execute(Explain(query.order_by(None).statement)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+def keyset_paginate_query(query, columns, cursor=None, per_page=10, descending=False, count=None):
+    """Paginate by seeking past the last seen key instead of using OFFSET
+    
+    `columns` must end with a unique column (usually the primary key) and
+    should be backed by a composite index. `count` is None (no total),
+    'exact' or 'estimate'.
+    """
+    direction = 'next'
+    values = None
+    if cursor:
+        values, direction = decode_cursor(columns, cursor)
+    
+    # Walking backwards flips both the comparison and the sort order
+    backwards = direction == 'prev'
+    reverse = descending != backwards
+    
+    page_query = query.order_by(None)
+    if values is not None:
+        key = tuple_(*columns)
+        page_query = page_query.filter(key < tuple_(*values) if reverse else key > tuple_(*values))
+    page_query = page_query.order_by(*[c.desc() if reverse else c.asc() for c in columns])
+    
+    items = page_query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backwards:
+        items.reverse()
+    
+    next_cursor = prev_cursor = None
+    if items:
+        if has_more or backwards:
+            next_cursor = encode_cursor(columns, items[-1], 'next')
+        if (has_more and backwards) or (values is not None and not backwards):
+            prev_cursor = encode_cursor(columns, items[0], 'prev')
+    
+    total = None
+    if count == 'exact':
+        total = query.order_by(None).count()
+    elif count == 'estimate':
+        total = estimate_count(query)
+    
+    return KeysetPagination(items, per_page, next_cursor, prev_cursor, total)
+
+def paginate_listing(query, keyset, descending=False, per_page=10):
+    """Paginate a listing by cursor when enabled, otherwise by page number"""
+    cursor = request.args.get('cursor')
+    if cursor or current_app.config.get('PAGINATION_MODE') == 'keyset':
+        try:
+            return keyset_paginate_query(query, keyset, cursor, per_page, descending,
+                                         count=current_app.config.get('PAGINATION_COUNT'))
+        except BadSignature:
+            abort(400)
+    
+    ordering = [c.desc() if descending else c.asc() for c in keyset]
+    page = request.args.get('page', 1, type=int)
+    return paginate_query(query.order_by(*ordering), page, per_page=per_page)
+
+def _dialect_insert(session):
+    # Both dialects spell ON CONFLICT the same way
+    if session.get_bind().dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def upsert_add(session, model, key, column, amount):
+    """Add to a counter column, inserting the row when its key is new
+
+    A single INSERT ... ON CONFLICT DO UPDATE, so concurrent first writes of
+    the same key both land instead of one failing on the primary key.
+    """
+    statement = _dialect_insert(session)(model).values(**key, **{column.key: amount})
+    session.execute(statement.on_conflict_do_update(
+        index_elements=list(key),
+        set_={column.key: column + statement.excluded[column.key]}
+    ))
+
+def insert_missing(session, model, rows):
+    """Insert rows, skipping those whose primary key is already present"""
+    if rows:
+        session.execute(_dialect_insert(session)(model).on_conflict_do_nothing(), rows)
+
 def generate_filename(original_filename, prefix=''):
     """Generate unique filename"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
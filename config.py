@@ -20,6 +20,16 @@ class Config:
         }
     }
     
+    # Connection strategy: 'queue' (the engine options above), 'pooler' (no
+    # client pool, for PgBouncer-style transaction poolers; DATABASE_POOLER_URL
+    # overrides the URI) or 'warm' (pre-opened LIFO pool for long-lived servers)
+    DB_CONNECTION_STRATEGY = os.environ.get('DB_CONNECTION_STRATEGY', 'queue')
+    DATABASE_POOLER_URL = os.environ.get('DATABASE_POOLER_URL')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    
     # Your Supabase configuration
     SUPABASE_URL = os.environ.get('SUPABASE_URL') or 'https://xssqhifnabymmsvvybgx.supabase.co'
     SUPABASE_KEY = os.environ.get('SUPABASE_ANON_KEY')
@@ -30,6 +40,18 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
     
+    # Streaming uploads: read size per chunk, and resumable (TUS) uploads for
+    # files above the threshold. Supabase requires 6MB resumable chunks.
+    UPLOAD_CHUNK_SIZE = 256 * 1024
+    RESUMABLE_UPLOAD_THRESHOLD = 6 * 1024 * 1024
+    RESUMABLE_UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024
+    UPLOAD_RETRIES = 3
+    
+    # Downloads: remote files redirect to signed URLs valid this many seconds;
+    # local files can be handed to the front-end server with X-Sendfile
+    DOWNLOAD_URL_EXPIRES = int(os.environ.get('DOWNLOAD_URL_EXPIRES', 300))
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'false').lower() in ['true', 'on', '1']
+    
     # Supabase Storage bucket
     SUPABASE_STORAGE_BUCKET = os.environ.get('SUPABASE_STORAGE_BUCKET', 'papers')
     
@@ -47,12 +69,90 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     
-    # Rate limiting - Use Vercel KV or memory
-    RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
+    # Outbound mail queue: send_email enqueues when MAIL_ASYNC is on and
+    # `flask mail-worker` delivers. Retries back off exponentially from
+    # MAIL_RETRY_BACKOFF seconds before a message is dead-lettered.
+    MAIL_ASYNC = os.environ.get('MAIL_ASYNC', 'true').lower() in ['true', 'on', '1']
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 6))
+    MAIL_RETRY_BACKOFF = 60
+    MAIL_RETRY_MAX_BACKOFF = 3600
+    
+    # Listing pagination: 'offset' (page numbers) or 'keyset' (cursor tokens).
+    # Keyset totals are 'exact', 'estimate' (planner estimate on PostgreSQL) or 'none'
+    PAGINATION_MODE = os.environ.get('PAGINATION_MODE', 'offset')
+    PAGINATION_COUNT = os.environ.get('PAGINATION_COUNT', 'estimate')
+    
+    # `flask import`: rows validated and committed per batch; COPY is used on
+    # PostgreSQL (psycopg2) unless IMPORT_USE_COPY is off
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+    IMPORT_USE_COPY = os.environ.get('IMPORT_USE_COPY', 'true').lower() in ['true', 'on', '1']
+    
+    # Papers read per server-side cursor chunk by the metadata export
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Per-request SQL instrumentation: a statement repeated this many times in
+    # one request is logged as a probable N+1; SERVER_TIMING adds the totals to
+    # responses; QUERY_BUDGET_STRICT raises on @query_budget overruns outside tests
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() in ['true', 'on', '1']
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() in ['true', 'on', '1']
+    QUERY_BUDGET_STRICT = False
+    
+    # Prometheus metrics at /metrics. Multi-worker servers need a directory
+    # shared by the workers; METRICS_TOKEN, when set, is required as a bearer token
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ['true', 'on', '1']
+    METRICS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Password hashing: method and parameters in Werkzeug notation; hashes are
+    # computed in a pool of PASSWORD_HASH_WORKERS processes (0 hashes inline),
+    # with at most PASSWORD_HASH_MAX_PENDING calls waiting for a worker.
+    # Older hashes are upgraded to the current policy on the next login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 64))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+    PASSWORD_HASH_START_METHOD = os.environ.get('PASSWORD_HASH_START_METHOD')
+    
+    # Seconds a logged-in user's cached identity is trusted by other processes
+    PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+    
+    # Seconds between checks of the shared version of cached lookup tables
+    REFERENCE_CACHE_CHECK_INTERVAL = int(os.environ.get('REFERENCE_CACHE_CHECK_INTERVAL', 5))
+    
+    # Rendered public pages for anonymous visitors: seconds a page is served from
+    # memory (and by the CDN), then seconds it may still be served while it refreshes
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 60))
+    PAGE_CACHE_STALE = int(os.environ.get('PAGE_CACHE_STALE', 300))
+    
+    # Template fragment cache: 'memory', 'null' or a 'module:Class' store (see
+    # app.fragment_cache), default seconds per fragment, entries kept in memory
+    # and the level of the per-request hit/miss log lines
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 5000))
+    FRAGMENT_CACHE_LOG_LEVEL = os.environ.get('FRAGMENT_CACHE_LOG_LEVEL', 'INFO')
+    
+    # Fingerprinted static files: build folder under app/static, the URL they are
+    # served from and their Cache-Control max-age (they never change under one name)
+    ASSETS_FOLDER = os.environ.get('ASSETS_FOLDER', 'dist')
+    ASSETS_URL_PATH = os.environ.get('ASSETS_URL_PATH', '/assets')
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 31536000))
+    
+    # Rate limiting: Redis when REDIS_URL is set, otherwise a SQLite file shared by
+    # the worker processes on this host (see app.rate_limit). The sliding window
+    # counter strategy avoids the burst a fixed window allows at its boundary
+    RATELIMIT_STORAGE_URI = os.environ.get('REDIS_URL') or os.environ.get('RATELIMIT_STORAGE_URI') or \
+        'sqlite:///' + os.path.join('/tmp', 'paper_cms_ratelimit.db')
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    SERVER_TIMING = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or \
         'sqlite:///paperflow_cms_dev.db'
     SESSION_COOKIE_SECURE = False
@@ -65,8 +165,23 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'postgresql://localhost/paperflow_cms_test'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    WTF_CSRF_ENABLED = False
+    SESSION_COOKIE_SECURE = False
+    MAIL_ASYNC = False
+    PASSWORD_HASH_WORKERS = 0
+    RATELIMIT_STORAGE_URI = 'memory://'
+    PAGE_CACHE_ENABLED = False
+    FRAGMENT_CACHE_BACKEND = 'null'
+
+class BenchmarkConfig(Config):
+    """Benchmark configuration: synthetic data in a local SQLite database"""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or \
+        'sqlite:///paper_cms_benchmark.db'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     WTF_CSRF_ENABLED = False
+    RATELIMIT_ENABLED = False
     SESSION_COOKIE_SECURE = False
 
 class ProductionConfig(Config):
@@ -89,6 +204,13 @@ class ProductionConfig(Config):
 
 class VercelConfig(ProductionConfig):
     """Vercel-specific configuration"""
+    # Serverless functions get a single request at a time and no shared memory for a pool
+    PASSWORD_HASH_WORKERS = 0
+    # No mail worker or cron runs on Vercel to drain the queue, so send inline
+    MAIL_ASYNC = os.environ.get('MAIL_ASYNC', 'false').lower() in ['true', 'on', '1']
+    # Serverless instances go through the transaction pooler when one is configured
+    DB_CONNECTION_STRATEGY = os.environ.get('DB_CONNECTION_STRATEGY') or \
+        ('pooler' if os.environ.get('DATABASE_POOLER_URL') else 'queue')
     # Vercel serverless optimizations
     SQLALCHEMY_ENGINE_OPTIONS = {
         'pool_size': 5,  # Smaller pool for serverless
@@ -105,6 +227,7 @@ class VercelConfig(ProductionConfig):
 config = {
     'development': DevelopmentConfig,
     'testing': TestingConfig,
+    'benchmark': BenchmarkConfig,
     'production': ProductionConfig,
     'vercel': VercelConfig,
     'default': DevelopmentConfig
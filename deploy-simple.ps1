@@ -10,6 +10,11 @@ try {
     npm install -g vercel
 }
 
+# Fingerprint and precompress static files; the Vercel build does not run flask
+Write-Host "Building static assets..." -ForegroundColor Yellow
+flask --app run.py build-assets --clean
+if ($LASTEXITCODE -ne 0) { exit 1 }
+
 # Deploy to Vercel
 Write-Host "Starting deployment..." -ForegroundColor Yellow
 vercel --prod
@@ -51,6 +51,11 @@ Write-Host ""
 Write-Host "✅ All environment variables configured!" -ForegroundColor Green
 Write-Host ""
 
+# Fingerprint and precompress static files; the Vercel build does not run flask
+Write-Host "📦 Building static assets..." -ForegroundColor Green
+flask --app run.py build-assets --clean
+if ($LASTEXITCODE -ne 0) { exit 1 }
+
 # Deploy to Vercel
 Write-Host "🚀 Deploying to Vercel..." -ForegroundColor Green
 vercel --prod
@@ -32,6 +32,10 @@ echo ""
 echo "Get them from: https://supabase.com/dashboard/project/xssqhifnabymmsvvybgx/settings/api"
 echo ""
 
+# Fingerprint and precompress static files; the Vercel build does not run flask
+echo "📦 Building static assets..."
+flask --app run.py build-assets --clean || exit 1
+
 # Deploy to Vercel
 echo "🚀 Deploying to Vercel..."
 vercel --prod
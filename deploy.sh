@@ -51,6 +51,7 @@ echo "   - Fill in your Supabase credentials"
 echo "   - Generate a secure SECRET_KEY"
 echo ""
 echo "3. 🚀 Deploy to Vercel:"
+echo "   - Run: flask --app run.py build-assets --clean (commit app/static/dist)"
 echo "   - Run: vercel"
 echo "   - Add environment variables in Vercel dashboard"
 echo "   - Set up custom domain (optional)"
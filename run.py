@@ -20,9 +20,8 @@ def test(coverage):
         os.environ['FLASK_COVERAGE'] = '1'
         subprocess.run([sys.executable] + sys.argv)
     
-    import unittest
-    tests = unittest.TestLoader().discover('tests')
-    unittest.TextTestRunner(verbosity=2).run(tests)
+    import pytest
+    sys.exit(pytest.main(['-q', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests')]))
 
 @app.cli.command()
 def deploy():
@@ -85,6 +84,281 @@ def init_db():
         db.session.commit()
         print('Database initialized successfully!')
 
+@app.cli.command()
+@click.option('--config', 'profile_config', default=None, help='Configuration to start (defaults to FLASK_CONFIG).')
+@click.option('--limit', default=15, help='Number of packages to list.')
+def startup_profile(profile_config, limit):
+    """Report cold-start time and import cost per module."""
+    from app.startup import profile_startup
+    
+    report = profile_startup(profile_config or config_name)
+    print(f"Cold start: {report['import_ms']:.0f} ms importing, {report['init_ms']:.0f} ms in create_app")
+    print(f"\n{'Package':<30} {'Self ms':>9} {'Modules':>8}")
+    for name, self_ms, count in report['packages'][:limit]:
+        print(f'{name:<30} {self_ms:>9.1f} {count:>8}')
+    print(f"\n{'App module':<30} {'Self ms':>9} {'Total ms':>9}")
+    for name, self_ms, cumulative_ms in report['app_modules']:
+        print(f'{name:<30} {self_ms:>9.1f} {cumulative_ms:>9.1f}')
+
+@app.cli.command()
+def rebuild_stats():
+    """Rebuild the dashboard statistics rollup from scratch."""
+    from app.stats import rebuild_stats as rebuild
+    
+    result = rebuild()
+    print(f"Rebuilt statistics rollup: {result['counters']} counters, {result['daily_rows']} daily rows")
+
+@app.cli.command()
+def rebuild_access():
+    """Rebuild the paper access list from authorships and review assignments."""
+    from app.access import rebuild_access as rebuild
+    
+    result = rebuild()
+    print(f"Rebuilt paper access list: {result['authors']} author rows, {result['reviewers']} reviewer rows")
+
+@app.cli.command()
+def search_index():
+    """Create the paper full-text search index and reindex all papers."""
+    from app.search import rebuild_search_index
+    
+    if rebuild_search_index():
+        print('Full-text search index rebuilt')
+    else:
+        print(f'Full-text search is not supported on {db.engine.dialect.name}, using LIKE matching')
+
+@app.cli.command()
+@click.option('--batch-size', default=5000, help='Papers updated per transaction.')
+def reconcile_reviews(batch_size):
+    """Recompute stored review aggregates for every paper."""
+    from app.models import Paper
+    
+    updated = 0
+    last_id = 0
+    while True:
+        ids = [row.id for row in db.session.query(Paper.id).filter(Paper.id > last_id)
+               .order_by(Paper.id).limit(batch_size)]
+        if not ids:
+            break
+        updated += Paper.refresh_review_aggregates(ids)
+        db.session.commit()
+        last_id = ids[-1]
+    
+    print(f'Reconciled review aggregates for {updated} papers')
+
+@app.cli.command()
+@click.argument('conference_id', type=int)
+@click.option('--max-load', type=int, default=None, help='Maximum open reviews per reviewer.')
+@click.option('--commit', is_flag=True, help='Insert the assignments instead of only previewing them.')
+def assign_reviewers(conference_id, max_load, commit):
+    """Compute reviewer assignments for a whole conference."""
+    from app.models import Conference
+    from app.assignment import plan_assignments, commit_plan
+    
+    conference = Conference.query.get(conference_id)
+    if conference is None:
+        raise click.ClickException(f'Conference {conference_id} not found')
+    
+    plan = plan_assignments(conference, max_load=max_load)
+    for row in plan.diff():
+        added = ', '.join(name for _, name in row['add']) or '-'
+        missing = f" (still missing {row['unfilled']})" if row['unfilled'] else ''
+        print(f"#{row['paper_id']} {row['title'][:60]}: + {added}{missing}")
+    for reviewer_id, name, before, after in plan.load_changes():
+        print(f'  {name}: {before} -> {after} open reviews')
+    
+    if commit:
+        print(f'Created {commit_plan(plan)} reviews')
+    else:
+        print(f'{len(plan.pairs)} reviews planned (preview only, pass --commit to apply)')
+
+@app.cli.command()
+@click.option('--once', is_flag=True, help='Drain the due messages and exit.')
+@click.option('--batch-size', default=None, type=int, help='Messages sent per SMTP connection.')
+@click.option('--interval', default=5.0, help='Seconds to sleep while the queue is empty.')
+def mail_worker(once, batch_size, interval):
+    """Deliver queued emails."""
+    from app.mail_queue import drain_queue, run_worker
+    
+    if once:
+        totals = drain_queue(batch_size)
+        print(f"{totals['sent']} sent, {totals['retry']} scheduled for retry, {totals['dead']} dead-lettered")
+    else:
+        run_worker(interval, batch_size)
+
+@app.cli.command()
+def mail_requeue():
+    """Move dead-lettered emails back onto the queue."""
+    from app.mail_queue import requeue_dead_letters
+    print(f'Requeued {requeue_dead_letters()} emails')
+
+@app.cli.command('import')
+@click.argument('kind', type=click.Choice(['users', 'papers', 'reviews']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='File format (guessed from the extension by default).')
+@click.option('--batch-size', default=None, type=int, help='Rows validated and committed together.')
+@click.option('--dry-run', is_flag=True, help='Validate and insert each batch, then roll it back.')
+@click.option('--errors', 'errors_path', type=click.Path(dir_okay=False), help='Write every rejected row to this file.')
+def import_data(kind, path, file_format, batch_size, dry_run, errors_path):
+    """Bulk import users, papers or review assignments from CSV or JSONL."""
+    from app.bulk_import import import_file
+    
+    def progress(report):
+        print(f'{report.read} rows read, {report.inserted} inserted, {report.rejected} rejected '
+              f'({report.rows_per_second:.0f} rows/s)')
+    
+    errors_file = open(errors_path, 'w') if errors_path else None
+    try:
+        report = import_file(kind, path, file_format, batch_size, dry_run, errors_file, progress)
+    finally:
+        if errors_file:
+            errors_file.close()
+    
+    for line, message in report.errors:
+        print(f'  line {line}: {message}')
+    if report.rejected > len(report.errors):
+        print(f'  ... and {report.rejected - len(report.errors)} more')
+    action = 'Validated' if dry_run else 'Imported'
+    print(f'{action} {report.inserted} {kind} ({report.links} links) from {report.read} rows '
+          f'in {report.elapsed:.1f}s, {report.rows_per_second:.0f} rows/s')
+
+@app.cli.command()
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']), default='csv', help='Output format.')
+@click.option('--conference', default=None, help='Only papers of this conference.')
+@click.option('--status', default='ACCEPTED', help="Comma-separated paper statuses, or 'all'.")
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--output', type=click.Path(dir_okay=False), default=None, help='Write to this file instead of stdout.')
+def export_papers(file_format, conference, status, compress, output):
+    """Export paper metadata for proceedings."""
+    from app.models import PaperStatus
+    from app.export import export_stream
+    
+    try:
+        statuses = None if status == 'all' else [PaperStatus[name.strip().upper()] for name in status.split(',')]
+    except KeyError as e:
+        raise click.BadParameter(f'unknown status {e}', param_hint='--status')
+    
+    chunks = export_stream(file_format, compress, conference_name=conference, statuses=statuses)
+    if output:
+        with open(output, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    else:
+        out = click.get_binary_stream('stdout')
+        for chunk in chunks:
+            out.write(chunk)
+
+@app.cli.command()
+@click.option('--scale', default=1.0, help='Multiply the default data set size (20k users, 150k papers, 500k reviews).')
+@click.option('--seed', default=1, help='Random seed; the same seed always generates the same data.')
+def generate_data(scale, seed):
+    """Fill the benchmark database with synthetic data."""
+    from app.benchmark import DEFAULT_SIZES, generate_dataset
+    
+    bench_app = create_app('benchmark')
+    sizes = {name: max(1, int(DEFAULT_SIZES[name] * scale)) for name in ('users', 'papers', 'reviews')}
+    with bench_app.app_context():
+        print(f"Generating into {bench_app.config['SQLALCHEMY_DATABASE_URI']}")
+        try:
+            counts = generate_dataset(seed=seed, progress=print, **sizes)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    print('Created ' + ', '.join(f'{count} {table}' for table, count in counts.items()))
+
+@app.cli.command()
+@click.option('--iterations', default=20, help='Measured requests per route.')
+@click.option('--route', 'routes', multiple=True, help='Only benchmark routes whose name contains this (repeatable).')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results to this JSON file.')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False), help='Baseline JSON to compare against.')
+@click.option('--tolerance', default=0.2, help='Allowed latency growth over the baseline, as a fraction.')
+def benchmark(iterations, routes, output, baseline_path, tolerance):
+    """Benchmark the hot routes against the synthetic data set."""
+    from app.benchmark import run_benchmark, compare_results, save_results, load_results
+    
+    bench_app = create_app('benchmark')
+    try:
+        results = run_benchmark(bench_app, iterations=iterations, only=routes)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    print(f"{'Route':<32} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'Queries':>8}  Status")
+    for name, row in results['routes'].items():
+        statuses = ', '.join(f'{code} x{count}' for code, count in row['status'].items())
+        if row.get('failed'):
+            print(f"{name:<32} {'-':>8} {'-':>8} {'-':>8} {'-':>8}  {statuses} (failed, not timed)")
+            continue
+        note = ' (placeholder template)' if row.get('placeholder_templates') else ''
+        print(f"{name:<32} {row['p50_ms']:>8} {row['p90_ms']:>8} {row['p99_ms']:>8} {row['queries']:>8}  {statuses}{note}")
+    
+    if output:
+        save_results(results, output)
+        print(f'Saved results to {output}')
+    if baseline_path:
+        regressions = compare_results(load_results(baseline_path), results, tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline')
+
+@app.cli.command()
+@click.option('--logins', default=200, help='Sign-ins per mode.')
+@click.option('--concurrency', default=8, help='Concurrent sign-in threads.')
+@click.option('--workers', type=int, default=None, help='Hashing pool size (defaults to PASSWORD_HASH_WORKERS or the core count).')
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results to this JSON file.')
+def benchmark_logins(logins, concurrency, workers, output):
+    """Benchmark sign-in throughput with inline and pooled password hashing."""
+    from app.benchmark import run_login_benchmark, save_results
+    
+    bench_app = create_app('benchmark')
+    try:
+        results = run_login_benchmark(bench_app, logins=logins, concurrency=concurrency, workers=workers)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    print(f"{results['hash_method']} on {results['cores']} cores, {results['concurrency']} concurrent sign-ins")
+    print(f"{'Mode':<8} {'Workers':>8} {'Logins/s':>9} {'Per core':>9} {'p50 ms':>8} {'p90 ms':>8}  OK")
+    for mode, row in results['modes'].items():
+        print(f"{mode:<8} {row['workers']:>8} {row['logins_per_sec']:>9} {row['logins_per_sec_per_core']:>9} "
+              f"{row['p50_ms']:>8} {row['p90_ms']:>8}  {row['succeeded']}/{row['logins']}")
+    
+    if output:
+        save_results(results, output)
+        print(f'Saved results to {output}')
+
+@app.cli.command()
+@click.option('--hits', default=2000, help='Timed hits per process.')
+@click.option('--processes', default=4, help='Concurrent worker processes.')
+@click.option('--strategy', default=None, help='Rate limit strategy (defaults to RATELIMIT_STRATEGY).')
+@click.option('--storage', 'uris', multiple=True, help='Storage URI to compare (repeatable; defaults to memory:// and a scratch SQLite file).')
+def benchmark_ratelimit(hits, processes, strategy, uris):
+    """Benchmark rate limit storages for per-hit overhead and accuracy across processes."""
+    import tempfile
+    from app.benchmark import run_rate_limit_benchmark
+    
+    with tempfile.TemporaryDirectory() as directory:
+        uris = uris or ['memory://', 'sqlite:///' + os.path.join(directory, 'ratelimit.db')]
+        results = run_rate_limit_benchmark(
+            uris, strategy=strategy or app.config.get('RATELIMIT_STRATEGY', 'fixed-window'),
+            hits=hits, processes=processes
+        )
+    
+    print(f"{results['strategy']}, {results['processes']} processes x {results['hits']} hits")
+    print(f"{'Storage':<40} {'p50 us':>8} {'p99 us':>8} {'Hits/s':>9}  Accepted on shared key")
+    for uri, row in results['storages'].items():
+        name = uri if len(uri) <= 40 else '...' + uri[-37:]
+        print(f"{name:<40} {row['p50_us']:>8} {row['p99_us']:>8} {row['hits_per_sec']:>9}  {row['accepted']} (limit {row['limit']})")
+
+@app.cli.command()
+@click.option('--clean/--no-clean', default=False, help='Delete hashed files from earlier builds.')
+def build_assets(clean):
+    """Write fingerprinted, precompressed copies of the static files."""
+    from app.assets import build_assets as build
+    
+    report = build(app, clean=clean)
+    print(f"Built {report['files']} assets: {report['bytes']} bytes, "
+          f"{report['gzip_bytes']} gzipped, {report['brotli_bytes'] or 'no'} brotli")
+
 # For Vercel serverless deployment
 def handler(request):
     """Vercel serverless handler"""
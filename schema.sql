@@ -310,7 +310,7 @@ END //
 DELIMITER ;
 
 -- Create indexes for better performance
-CREATE INDEX idx_papers_full_search ON papers (title, abstract, keywords);
+-- Text search uses the FULLTEXT index idx_papers_search on the papers table
 CREATE INDEX idx_reviews_score ON reviews (score);
 CREATE INDEX idx_reviews_recommendation ON reviews (recommendation);
 CREATE INDEX idx_activity_logs_date ON activity_logs (created_at);
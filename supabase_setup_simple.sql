@@ -56,7 +56,15 @@ CREATE TABLE IF NOT EXISTS papers (
     conference_name VARCHAR(200) NOT NULL,
     keywords VARCHAR(500),
     submitted_by INTEGER NOT NULL REFERENCES users(id),
-    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Review aggregates maintained by the application (`flask reconcile-reviews`)
+    assigned_review_count INTEGER NOT NULL DEFAULT 0,
+    completed_review_count INTEGER NOT NULL DEFAULT 0,
+    avg_score DOUBLE PRECISION,
+    avg_technical_quality DOUBLE PRECISION,
+    avg_novelty DOUBLE PRECISION,
+    avg_clarity DOUBLE PRECISION,
+    avg_significance DOUBLE PRECISION
 );
 
 -- Reviews table
@@ -101,16 +109,101 @@ CREATE TABLE IF NOT EXISTS paper_categories (
     PRIMARY KEY (paper_id, category_id)
 );
 
+-- Paper access list: one row per user and reason (author, reviewer), maintained by the application
+-- Rebuild with `flask rebuild-access`; accepted papers are public and need no rows
+CREATE TABLE IF NOT EXISTS paper_access (
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    paper_id INTEGER REFERENCES papers(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL,
+    PRIMARY KEY (user_id, paper_id, kind)
+);
+
+-- Fill in rows for papers and assignments that predate the table
+INSERT INTO paper_access (user_id, paper_id, kind)
+SELECT user_id, paper_id, 'author' FROM paper_authors
+ON CONFLICT DO NOTHING;
+INSERT INTO paper_access (user_id, paper_id, kind)
+SELECT DISTINCT reviewer_id, paper_id, 'reviewer' FROM reviews
+ON CONFLICT DO NOTHING;
+
+-- Dashboard statistics rollup (maintained by the application, rebuild with `flask rebuild-stats`)
+CREATE TABLE IF NOT EXISTS stats_counters (
+    metric VARCHAR(50) NOT NULL,
+    dimension VARCHAR(50) NOT NULL,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, dimension)
+);
+
+CREATE TABLE IF NOT EXISTS stats_daily_submissions (
+    day DATE NOT NULL,
+    conference_name VARCHAR(200) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, conference_name)
+);
+
+-- Change counters for the process-local lookup table cache
+CREATE TABLE IF NOT EXISTS reference_data_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Outbound mail queue, drained by `flask mail-worker`
+CREATE TABLE IF NOT EXISTS outbound_emails (
+    id SERIAL PRIMARY KEY,
+    recipient VARCHAR(120) NOT NULL,
+    sender VARCHAR(120),
+    subject VARCHAR(255) NOT NULL,
+    html TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS dead_letter_emails (
+    id SERIAL PRIMARY KEY,
+    recipient VARCHAR(120) NOT NULL,
+    sender VARCHAR(120),
+    subject VARCHAR(255) NOT NULL,
+    html TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMP,
+    failed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS idx_papers_status ON papers(status);
 CREATE INDEX IF NOT EXISTS idx_papers_conference ON papers(conference_name);
 CREATE INDEX IF NOT EXISTS idx_papers_submitted_by ON papers(submitted_by);
+CREATE INDEX IF NOT EXISTS idx_papers_submission_date_id ON papers(submission_date, id);
+CREATE INDEX IF NOT EXISTS idx_users_name_id ON users(name, id);
+CREATE INDEX IF NOT EXISTS idx_outbound_emails_next_attempt ON outbound_emails(next_attempt_at, id);
 CREATE INDEX IF NOT EXISTS idx_reviews_paper ON reviews(paper_id);
-CREATE INDEX IF NOT EXISTS idx_reviews_reviewer ON reviews(reviewer_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_reviewer_deadline ON reviews(reviewer_id, is_completed, deadline);
+CREATE INDEX IF NOT EXISTS idx_paper_authors_user ON paper_authors(user_id, paper_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_completed ON reviews(is_completed);
 
+-- Review aggregate columns for databases created before they were added
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS assigned_review_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS completed_review_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS avg_score DOUBLE PRECISION;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS avg_technical_quality DOUBLE PRECISION;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS avg_novelty DOUBLE PRECISION;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS avg_clarity DOUBLE PRECISION;
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS avg_significance DOUBLE PRECISION;
+
+-- Full-text search over title, keywords and abstract
+ALTER TABLE papers ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(keywords, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(abstract, '')), 'C')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_papers_search_vector ON papers USING GIN (search_vector);
+
 -- Create trigger to update last_updated on papers
 CREATE OR REPLACE FUNCTION update_last_updated()
 RETURNS TRIGGER AS $$
@@ -120,8 +213,10 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+-- Only edits to the paper itself count, not review aggregate refreshes
+DROP TRIGGER IF EXISTS update_papers_last_updated ON papers;
 CREATE TRIGGER update_papers_last_updated
-    BEFORE UPDATE ON papers
+    BEFORE UPDATE OF title, abstract, status, file_path, conference_name, keywords, submitted_by ON papers
     FOR EACH ROW
     EXECUTE FUNCTION update_last_updated();
 
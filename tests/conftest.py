@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+import pytest
+from app import create_app, db
+from app.models import (User, UserRole, Paper, PaperStatus, Review, ReviewRecommendation,
+                        Conference, ConferenceStatus)
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def seeded(app):
+    """Two conferences, an author with a dozen papers and a reviewer with a review on each"""
+    admin = User(name='Admin', email='admin@example.com', role=UserRole.ADMIN, password_hash='-')
+    author = User(name='Author', email='author@example.com', role=UserRole.AUTHOR, password_hash='-')
+    coauthor = User(name='Co-author', email='coauthor@example.com', role=UserRole.AUTHOR, password_hash='-')
+    reviewer = User(name='Reviewer', email='reviewer@example.com', role=UserRole.REVIEWER, password_hash='-')
+    db.session.add_all([admin, author, coauthor, reviewer])
+    now = datetime.utcnow()
+    for name in ('ICML', 'NeurIPS'):
+        db.session.add(Conference(name=name, year=now.year, submission_deadline=now + timedelta(days=30),
+                                  status=ConferenceStatus.ACTIVE, reviews_per_paper=3))
+    db.session.commit()
+
+    for i in range(12):
+        paper = Paper(title=f'Paper {i}', abstract='Abstract', conference_name=('ICML', 'NeurIPS')[i % 2],
+                      submitted_by=author.id, submission_date=now - timedelta(days=i),
+                      status=(PaperStatus.SUBMITTED, PaperStatus.UNDER_REVIEW, PaperStatus.ACCEPTED)[i % 3])
+        paper.authors.append(author)
+        if i % 2:
+            paper.authors.append(coauthor)
+        db.session.add(paper)
+        db.session.flush()
+        review = Review(paper_id=paper.id, reviewer_id=reviewer.id, deadline=now + timedelta(days=i))
+        if i % 3 == 0:
+            review.score = 7
+            review.recommendation = ReviewRecommendation.ACCEPT
+            review.mark_completed()
+        db.session.add(review)
+    db.session.commit()
+    Paper.refresh_review_aggregates()
+    db.session.commit()
+    return {'admin': admin.id, 'author': author.id, 'reviewer': reviewer.id}
+
+@pytest.fixture
+def login(client):
+    """Sign the test client in as a user id, without going through the password check"""
+    def login(user_id):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return login
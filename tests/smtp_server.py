@@ -0,0 +1,101 @@
+"""
+Local stand-in SMTP server
+
+Speaks just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP and QUIT, without authentication or TLS. Accepted messages are kept
+as (sender, recipients, data) in `messages`. Recipients in `rejected` get a
+permanent 550, those in `deferred` a temporary 451, and while `down` is
+set every connection is closed before the greeting, the way an unreachable
+relay looks to the client.
+"""
+import socketserver
+import threading
+
+class SMTPServer:
+    """SMTP on a free localhost port, run in a background thread"""
+
+    def __init__(self, rejected=(), deferred=()):
+        self.messages = []
+        self.rejected = set(rejected)
+        self.deferred = set(deferred)
+        self.down = False
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _reply(self, line):
+                self.wfile.write(f'{line}\r\n'.encode('ascii'))
+
+            def _address(self, argument):
+                return argument.split(':', 1)[1].strip().split(' ')[0].strip('<>')
+
+            def handle(self):
+                with server._lock:
+                    server.connections += 1
+                if server.down:
+                    return
+                self._reply('220 localhost stand-in SMTP')
+                sender, recipients = None, []
+                for raw in self.rfile:
+                    line = raw.decode('utf-8').rstrip('\r\n')
+                    command = line[:4].upper()
+                    if command == 'EHLO':
+                        self._reply('250-localhost')
+                        self._reply('250 8BITMIME')
+                    elif command == 'HELO':
+                        self._reply('250 localhost')
+                    elif command == 'MAIL':
+                        sender, recipients = self._address(line), []
+                        self._reply('250 OK')
+                    elif command == 'RCPT':
+                        recipient = self._address(line)
+                        if recipient in server.rejected:
+                            self._reply('550 No such user')
+                        elif recipient in server.deferred:
+                            self._reply('451 Try again later')
+                        else:
+                            recipients.append(recipient)
+                            self._reply('250 OK')
+                    elif command == 'DATA':
+                        self._reply('354 End data with <CR><LF>.<CR><LF>')
+                        data = []
+                        for raw in self.rfile:
+                            if raw in (b'.\r\n', b'.\n'):
+                                break
+                            data.append(raw[1:] if raw.startswith(b'..') else raw)
+                        server.messages.append((sender, recipients, b''.join(data)))
+                        self._reply('250 Queued')
+                    elif command == 'RSET':
+                        sender, recipients = None, []
+                        self._reply('250 OK')
+                    elif command == 'NOOP':
+                        self._reply('250 OK')
+                    elif command == 'QUIT':
+                        self._reply('221 Bye')
+                        return
+                    else:
+                        self._reply('502 Command not implemented')
+
+        return Handler
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Supabase Storage API
+
+Implements just what SupabaseClient uploads with: plain object POSTs and
+the TUS resumable endpoints (create, PATCH at an offset, HEAD for the
+current offset). Stored objects are kept in memory. `fail_patches` names
+PATCH requests (1-based) that store half of their chunk and then drop the
+connection, the way an interrupted upload leaves the server.
+"""
+import base64
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = '/storage/v1'
+
+class StorageServer:
+    """Storage API on a free localhost port, run in a background thread"""
+
+    def __init__(self, fail_patches=()):
+        self.objects = {}
+        self.uploads = {}
+        self.fail_patches = set(fail_patches)
+        self.requests = []
+        self._ids = itertools.count(1)
+        self._patches = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def storage_url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}{PREFIX}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def _body(self, length=None):
+                if length is None:
+                    length = int(self.headers.get('Content-Length', 0))
+                return self.rfile.read(length)
+
+            def do_POST(self):
+                server.requests.append(('POST', self.path, None))
+                if self.path == f'{PREFIX}/upload/resumable':
+                    metadata = dict(
+                        (key, base64.b64decode(value).decode())
+                        for key, value in (item.split(' ', 1) for item in self.headers['Upload-Metadata'].split(','))
+                    )
+                    upload_id = str(next(server._ids))
+                    server.uploads[upload_id] = {
+                        'length': int(self.headers['Upload-Length']),
+                        'data': bytearray(),
+                        'path': f"{metadata['bucketName']}/{metadata['objectName']}",
+                    }
+                    return self._reply(201, {'Location': f'{PREFIX}/upload/resumable/{upload_id}'})
+                if self.path.startswith(f'{PREFIX}/object/'):
+                    server.objects[self.path[len(f'{PREFIX}/object/'):]] = self._body()
+                    return self._reply(200)
+                self._reply(404)
+
+            def _upload(self):
+                return server.uploads.get(self.path.rsplit('/', 1)[-1])
+
+            def do_HEAD(self):
+                server.requests.append(('HEAD', self.path, None))
+                upload = self._upload()
+                if upload is None:
+                    return self._reply(404)
+                self._reply(200, {'Upload-Offset': str(len(upload['data'])),
+                                  'Upload-Length': str(upload['length'])})
+
+            def do_PATCH(self):
+                upload = self._upload()
+                offset = int(self.headers['Upload-Offset'])
+                server.requests.append(('PATCH', self.path, offset))
+                if upload is None:
+                    return self._reply(404)
+                if offset != len(upload['data']):
+                    return self._reply(409)
+
+                length = int(self.headers['Content-Length'])
+                with server._lock:
+                    failing = next(server._patches) in server.fail_patches
+                if failing:
+                    # Keep what arrived before the interruption, then hang up
+                    upload['data'] += self._body(length // 2)
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                upload['data'] += self._body(length)
+                if len(upload['data']) == upload['length']:
+                    server.objects[upload['path']] = bytes(upload['data'])
+                self._reply(204, {'Upload-Offset': str(len(upload['data']))})
+
+        return Handler
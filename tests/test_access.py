@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+from app import db
+from app.access import AUTHOR, REVIEWER, can_access, grant_access, rebuild_access
+from app.models import User, UserRole, Paper, Review, PaperAccess
+
+def access_rows():
+    return set(db.session.query(PaperAccess.user_id, PaperAccess.paper_id, PaperAccess.kind))
+
+def add_reviewer(name):
+    reviewer = User(name=name, email=f'{name.lower()}@example.com', role=UserRole.REVIEWER, password_hash='-')
+    db.session.add(reviewer)
+    db.session.commit()
+    return reviewer
+
+def test_authors_and_reviewers_get_rows(app, seeded):
+    rows = access_rows()
+    paper_ids = [paper_id for paper_id, in db.session.query(Paper.id)]
+    assert {(seeded['author'], paper_id, AUTHOR) for paper_id in paper_ids} <= rows
+    assert {(seeded['reviewer'], paper_id, REVIEWER) for paper_id in paper_ids} <= rows
+
+def test_reassigned_review_moves_access(app, seeded):
+    other = add_reviewer('Other')
+    review = Review.query.first()
+    paper_id = review.paper_id
+    db.session.commit()
+
+    # The commit expired the review, so the old reviewer_id is not in memory when it is set
+    review.reviewer_id = other.id
+    db.session.commit()
+
+    rows = access_rows()
+    assert (seeded['reviewer'], paper_id, REVIEWER) not in rows
+    assert (other.id, paper_id, REVIEWER) in rows
+
+def test_deleted_review_revokes_access(app, seeded):
+    review = Review.query.first()
+    paper_id = review.paper_id
+    db.session.commit()
+
+    db.session.delete(review)
+    db.session.commit()
+
+    assert (seeded['reviewer'], paper_id, REVIEWER) not in access_rows()
+    assert not can_access(db.session.get(User, seeded['reviewer']), db.session.get(Paper, paper_id), public=False)
+
+def test_removed_author_loses_access(app, seeded):
+    paper = Paper.query.filter(Paper.authors.any(User.email == 'coauthor@example.com')).first()
+    coauthor = User.query.filter_by(email='coauthor@example.com').one()
+    paper.authors.remove(coauthor)
+    db.session.commit()
+
+    assert (coauthor.id, paper.id, AUTHOR) not in access_rows()
+
+def test_duplicate_assignment_is_ignored(app, seeded):
+    review = Review.query.first()
+    db.session.add(Review(paper_id=review.paper_id, reviewer_id=review.reviewer_id,
+                          deadline=datetime.utcnow() + timedelta(days=7)))
+    db.session.commit()
+
+    grant_access(db.session, [(review.reviewer_id, review.paper_id, REVIEWER)])
+    db.session.commit()
+    assert (review.reviewer_id, review.paper_id, REVIEWER) in access_rows()
+
+def test_rebuild_matches_hooks(app, seeded):
+    before = access_rows()
+    rebuild_access()
+    assert access_rows() == before
+
+def test_table_created_on_existing_database_is_filled(app, seeded):
+    before = access_rows()
+    PaperAccess.__table__.drop(db.engine)
+    db.create_all()
+    assert access_rows() == before
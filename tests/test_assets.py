@@ -0,0 +1,17 @@
+import os
+import shutil
+from flask import Flask
+from app.assets import build_assets, load_manifest
+
+STATIC = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app', 'static')
+
+def test_committed_manifest_is_current(tmp_path):
+    # Deploys serve the committed build, so it must match the static files as they are now
+    shutil.copytree(STATIC, tmp_path / 'static', ignore=shutil.ignore_patterns('dist'))
+    fresh = Flask(__name__, static_folder=str(tmp_path / 'static'))
+    build_assets(fresh)
+
+    committed = Flask(__name__, static_folder=STATIC)
+    assert load_manifest(committed) == load_manifest(fresh)
+    for hashed in load_manifest(committed).values():
+        assert os.path.isfile(os.path.join(STATIC, 'dist', hashed))
@@ -0,0 +1,39 @@
+import logging
+import pytest
+from app import db
+from app.fragment_cache import MemoryBackend
+from app.models import Paper, User
+
+@pytest.fixture
+def fragments(app):
+    app.extensions['fragment_cache'] = MemoryBackend()
+    return app.extensions['fragment_cache']
+
+@pytest.fixture
+def production_logging(app):
+    # Outside debug the app logger is at WARNING; apps sharing the logger may have changed it
+    level = app.logger.level
+    app.logger.setLevel(logging.WARNING)
+    yield
+    app.logger.setLevel(level)
+
+def test_hits_and_misses_are_logged(app, client, login, seeded, fragments, production_logging, caplog):
+    login(seeded['author'])
+    client.get('/author/dashboard')
+    caplog.clear()
+    client.get('/author/dashboard')
+    assert 'Fragment cache in main.author_dashboard: 10 hits, 0 misses' in caplog.messages
+
+def test_log_level_is_configured(app):
+    assert app.logger.getChild('fragment_cache').level == logging.INFO
+
+def test_new_coauthor_refreshes_row(app, client, login, seeded, fragments):
+    login(seeded['author'])
+    before = client.get('/author/dashboard').get_data(as_text=True).count('2 authors')
+
+    paper = Paper.query.filter_by(title='Paper 0').one()
+    paper.authors.append(User.query.filter_by(email='coauthor@example.com').one())
+    db.session.commit()
+
+    after = client.get('/author/dashboard').get_data(as_text=True).count('2 authors')
+    assert after == before + 1
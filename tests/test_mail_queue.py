@@ -0,0 +1,75 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.mail_queue import enqueue_email
+from app.models import OutboundEmail, DeadLetterEmail
+from run import mail_worker
+from tests.smtp_server import SMTPServer
+
+@pytest.fixture
+def smtp(app):
+    with SMTPServer(rejected={'nobody@example.com'}, deferred={'busy@example.com'}) as server:
+        app.config.update(MAIL_SERVER=server.host, MAIL_PORT=server.port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+                          MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False,
+                          MAIL_DEFAULT_SENDER='noreply@example.com')
+        yield server
+
+def queue(*recipients):
+    for recipient in recipients:
+        enqueue_email(recipient, f'Hello {recipient}', '<p>Hello</p>')
+    db.session.commit()
+
+def run_worker(app):
+    result = app.test_cli_runner().invoke(mail_worker, ['--once'])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+def make_due():
+    OutboundEmail.query.update({OutboundEmail.next_attempt_at: datetime.utcnow()})
+    db.session.commit()
+
+def test_worker_delivers_queue_over_one_connection(app, smtp):
+    queue('a@example.com', 'b@example.com', 'c@example.com')
+
+    assert run_worker(app).startswith('3 sent, 0 scheduled for retry, 0 dead-lettered')
+    assert sorted(recipients[0] for _, recipients, _ in smtp.messages) == ['a@example.com', 'b@example.com', 'c@example.com']
+    assert all(sender == 'noreply@example.com' for sender, _, _ in smtp.messages)
+    assert smtp.connections == 1
+    assert OutboundEmail.query.count() == 0
+
+def test_unreachable_server_is_retried(app, smtp):
+    queue('a@example.com', 'b@example.com')
+    smtp.down = True
+
+    assert run_worker(app).startswith('0 sent, 2 scheduled for retry')
+    emails = OutboundEmail.query.all()
+    assert [email.attempts for email in emails] == [1, 1]
+    assert all(email.next_attempt_at > datetime.utcnow() and email.last_error for email in emails)
+
+    # Not due yet: nothing happens until the backoff has passed
+    smtp.down = False
+    assert run_worker(app).startswith('0 sent, 0 scheduled for retry')
+    make_due()
+    assert run_worker(app).startswith('2 sent')
+    assert len(smtp.messages) == 2
+
+def test_permanent_rejection_is_dead_lettered(app, smtp):
+    queue('a@example.com', 'nobody@example.com', 'b@example.com')
+
+    # The rejection is per message; the rest of the batch goes out on the same connection
+    assert run_worker(app).startswith('2 sent, 0 scheduled for retry, 1 dead-lettered')
+    dead = DeadLetterEmail.query.one()
+    assert dead.recipient == 'nobody@example.com'
+    assert dead.attempts == 1
+    assert '550' in dead.last_error
+    assert OutboundEmail.query.count() == 0
+
+def test_temporary_rejection_is_dead_lettered_after_max_attempts(app, smtp):
+    app.config['MAIL_MAX_ATTEMPTS'] = 2
+    queue('busy@example.com')
+
+    assert run_worker(app).startswith('0 sent, 1 scheduled for retry, 0 dead-lettered')
+    make_due()
+    assert run_worker(app).startswith('0 sent, 0 scheduled for retry, 1 dead-lettered')
+    assert DeadLetterEmail.query.one().attempts == 2
+    assert smtp.messages == []
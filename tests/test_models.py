@@ -0,0 +1,29 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.orm import joinedload, selectinload
+from app import db
+from app.models import User, UserRole, Paper, Conference, ConferenceStatus
+
+@pytest.fixture
+def editions(app):
+    """ICML 2023-2025 with January deadlines, and papers submitted around them"""
+    author = User(name='Author', email='author@example.com', role=UserRole.AUTHOR, password_hash='-')
+    db.session.add(author)
+    for year in (2023, 2024, 2025):
+        db.session.add(Conference(name='ICML', year=year, submission_deadline=datetime(year, 1, 31),
+                                  status=ConferenceStatus.ACTIVE))
+    db.session.commit()
+    for title, submitted in (('early', datetime(2023, 1, 10)), ('on time', datetime(2024, 1, 10)),
+                             ('next year', datetime(2024, 6, 1)), ('late', datetime(2026, 1, 1))):
+        db.session.add(Paper(title=title, abstract='Abstract', conference_name='ICML',
+                             submitted_by=author.id, submission_date=submitted))
+    db.session.add(Paper(title='unknown', abstract='Abstract', conference_name='Other', submitted_by=author.id))
+    db.session.commit()
+    db.session.expunge_all()
+
+EXPECTED = {'early': 2023, 'on time': 2024, 'next year': 2025, 'late': 2025, 'unknown': None}
+
+@pytest.mark.parametrize('options', [(), (selectinload(Paper.conference),), (joinedload(Paper.conference),)])
+def test_paper_conference_is_the_edition_submitted_to(editions, options):
+    papers = Paper.query.options(*options).all()
+    assert {paper.title: paper.conference and paper.conference.year for paper in papers} == EXPECTED
@@ -0,0 +1,21 @@
+from datetime import datetime
+from app import db
+from app.models import Paper
+from app.search import search_papers
+
+def test_input_without_terms_keeps_newest_first_order(app, seeded):
+    # Two papers submitted at the same moment are ordered by id
+    same_time = datetime(2020, 1, 1)
+    Paper.query.filter(Paper.title.in_(['Paper 10', 'Paper 11'])).update({Paper.submission_date: same_time})
+    db.session.commit()
+
+    papers = search_papers(Paper.query, '?!').all()
+    expected = sorted(Paper.query.all(), key=lambda paper: (paper.submission_date, paper.id), reverse=True)
+    assert [paper.id for paper in papers] == [paper.id for paper in expected]
+
+def test_terms_filter_to_matches(app, seeded):
+    paper = Paper.query.filter_by(title='Paper 3').one()
+    paper.title = 'Graph neural networks'
+    db.session.commit()
+
+    assert [match.id for match in search_papers(Paper.query, 'graph').all()] == [paper.id]